@@ -6,16 +6,75 @@ from dotenv import load_dotenv
 # Load environment variables before any other imports
 load_dotenv()
 
-from graph import app
+from graph import build_app, configure_logging
+from runner import GraphRunner
 from state import AgentState
+from executor import RunExecutor
+from metrics import start_metrics_server
+from backends import clients
+from reports import parse_segments, resolve_image
 
 st.set_page_config(page_title="LangGraph Research Suite", layout="wide")
 
+@st.cache_resource
+def get_app():
+    # Built once per Streamlit server; reruns reuse the app and its checkpointer
+    configure_logging()
+    return build_app()
+
+app = get_app()
+
+@st.cache_resource
+def get_executor():
+    # One executor per Streamlit server, shared by every browser session; the graph
+    # itself runs on the runner's event loop, workers only wait for its events
+    return RunExecutor(GraphRunner(app), max_workers=int(os.getenv("UI_MAX_CONCURRENT_RUNS", "8")))
+
+executor = get_executor()
+
+@st.cache_resource
+def start_metrics():
+    # Prometheus scrape endpoint, once per server process
+    port = os.getenv("METRICS_PORT")
+    return start_metrics_server(int(port)) if port else None
+
+start_metrics()
+
+@st.cache_data(max_entries=64)
+def load_report(report_hash):
+    # Content-addressed, so the cache never goes stale; reruns skip reading and parsing.
+    # The store is the one the app publishes to (see `build_app`)
+    store = clients.get("reports")
+    return store.read(report_hash), store.segments(report_hash)
+
+@st.cache_data(max_entries=64)
+def load_report_file(report_path, mtime):
+    # Reports published before the report store existed
+    with open(report_path, "r") as f:
+        content = f.read()
+    return content, parse_segments(content)
+
+@st.fragment(run_every=1.0)
+def show_progress(thread_id):
+    progress = executor.progress(thread_id)
+    if not executor.is_busy(thread_id):
+        st.rerun()
+    node = progress.get("node")
+    label = f"Running {node}... ({progress.get('node_elapsed', 0):.0f}s)" if node else "Queued..."
+    with st.status(label, expanded=True):
+        for event in progress["events"][-10:]:
+            st.write(f"✔ {event['node']} ({event['seconds']}s)")
+        st.caption(f"Elapsed: {progress.get('elapsed', 0):.0f}s")
+    if progress.get("partial"):
+        # Draft renders incrementally while the writer is still generating
+        st.markdown(progress["partial"] + "▌")
+
 st.title("🚀 LangGraph Research Suite")
 st.markdown("Automated Technical Research with Human-in-the-Loop")
 
 if "thread_id" not in st.session_state:
-    st.session_state.thread_id = None
+    # Restore the session from the URL so a browser refresh re-attaches to its run
+    st.session_state.thread_id = st.query_params.get("thread")
 if "final_report" not in st.session_state:
     st.session_state.final_report = None
 
@@ -28,20 +87,38 @@ with st.sidebar:
         # Use timestamp to ensure a completely new research session every time
         st.session_state.thread_id = f"st_{topic.replace(' ', '_')[:10]}_{int(time.time())}"
         st.session_state.final_report = None
+        st.query_params["thread"] = st.session_state.thread_id
+        executor.submit(st.session_state.thread_id, input={"topic": topic})
         st.success("New session started!")
 
 if st.session_state.thread_id:
-    config = {"configurable": {"thread_id": st.session_state.thread_id}}
+    thread_id = st.session_state.thread_id
+    config = {"configurable": {"thread_id": thread_id}}
+
+    # 1. Graph steps run in the background; just poll while busy
+    if executor.is_busy(thread_id):
+        show_progress(thread_id)
+        st.stop()
+
+    progress = executor.progress(thread_id)
+    if progress.get("status") == "error":
+        st.error(f"Run failed: {progress.get('error')}")
+        if st.button("Retry"):
+            executor.submit(thread_id)
+            st.rerun()
+        st.stop()
+
     state = app.get_state(config)
     
-    # 1. Start or Resume
+    # 2. Start or Resume
     if not state.values:
-        with st.status("Initializing Graph..."):
-            for event in app.stream({"topic": topic}, config, stream_mode="values"):
-                pass
-        st.rerun()
+        if topic:
+            executor.submit(thread_id, input={"topic": topic})
+            st.rerun()
+        st.info("Enter a topic in the sidebar to begin.")
+        st.stop()
 
-    # 2. Handle Interrupts
+    # 3. Handle Interrupts
     if state.next:
         next_step = state.next[0]
         
@@ -55,9 +132,7 @@ if st.session_state.thread_id:
             
             col1, col2 = st.columns(2)
             if col1.button("Approve & Continue"):
-                app.update_state(config, {"plan": edited_questions})
-                with st.spinner("Conducting Research..."):
-                    for event in app.stream(None, config, stream_mode="values"): pass
+                executor.submit(thread_id, update={"plan": edited_questions})
                 st.rerun()
             
         elif next_step == "publisher":
@@ -66,14 +141,12 @@ if st.session_state.thread_id:
             st.markdown(f"**Editor Feedback:** {state.values.get('critique')}")
             
             if st.button("Confirm Publication"):
-                with st.spinner("Saving Report..."):
-                    for event in app.stream(None, config, stream_mode="values"): pass
+                executor.submit(thread_id)
                 st.rerun()
         
         else:
-            # Auto-run internal nodes (writer, editor)
-            with st.status(f"Running {next_step}..."):
-                for event in app.stream(None, config, stream_mode="values"): pass
+            # Internal nodes (writer, editor) pending without a run, e.g. after a restart: resume
+            executor.submit(thread_id)
             st.rerun()
     else:
         # Finished
@@ -81,12 +154,17 @@ if st.session_state.thread_id:
         final_values = state.values
         
         # 1. Display and Download Report first
-        if final_values.get("report_path"):
+        segments = []
+        if final_values.get("report_hash"):
+            try:
+                st.session_state.final_report, segments = load_report(final_values["report_hash"])
+            except KeyError:
+                st.error(f"Report {final_values['report_hash'][:12]} not found in the report store.")
+                st.session_state.final_report = None
+        elif final_values.get("report_path"):
             report_path = final_values["report_path"]
             if os.path.exists(report_path):
-                with open(report_path, "r") as f:
-                    content = f.read()
-                    st.session_state.final_report = content
+                st.session_state.final_report, segments = load_report_file(report_path, os.path.getmtime(report_path))
             else:
                 st.error(f"Report file not found: {report_path}. It might have failed to save.")
                 st.session_state.final_report = None
@@ -97,24 +175,20 @@ if st.session_state.thread_id:
             with col1:
                 st.subheader(f"📄 Research Report: {final_values.get('topic')}")
             with col2:
-                st.download_button("📥 Download Markdown", content, file_name=final_values.get("report_path", "report.md"))
+                st.download_button("📥 Download Markdown", content, file_name=f"report_{final_values.get('topic', '').lower().replace(' ', '_')}.md")
             
             # Show report with custom rendering for images
             with st.container():
                 st.markdown("---")
-                import re
-                parts = re.split(r'(!\[.*?\]\(.*?\))', content)
-                for part in parts:
-                    img_match = re.match(r'!\[(.*?)\]\((.*?)\)', part)
-                    if img_match:
-                        caption, img_path = img_match.groups()
-                        img_path = img_path.strip()
-                        if os.path.exists(img_path):
-                            st.image(img_path, caption=caption, use_container_width=True)
+                for segment in segments:
+                    if segment["type"] == "image":
+                        img_path = resolve_image(segment["path"])
+                        if img_path:
+                            st.image(img_path, caption=segment["caption"], use_container_width=True)
                         else:
-                            st.error(f"Image not found: {img_path}")
+                            st.error(f"Image not found: {segment['path']}")
                     else:
-                        st.markdown(part)
+                        st.markdown(segment["text"])
                 st.markdown("---")
 
             st.subheader("💬 Have questions? Ask below!")
@@ -133,32 +207,21 @@ if st.session_state.thread_id:
                     st.write(prompt)
                 
                 with st.chat_message("assistant"):
-                    from nodes import llm
-                    from langchain_core.messages import HumanMessage, SystemMessage
-                    
-                    qa_prompt = f"""
-                    You are a technical expert on the topic: {final_values.get('topic')}.
-                    Research Context: {content}
-                    USER QUESTION: {prompt}
-                    """
+                    from nodes import qa_node
                     
-                    full_response = ""
                     message_placeholder = st.empty()
+                    streamed = []
                     
-                    for chunk in llm.stream([
-                        SystemMessage(content="Analyse the context and answer the user question politely. If off-topic, decline."),
-                        HumanMessage(content=qa_prompt)
-                    ]):
-                        full_response += chunk.content
-                        message_placeholder.markdown(full_response + "▌")
+                    def show_token(token):
+                        streamed.append(token)
+                        message_placeholder.markdown("".join(streamed) + "▌")
                     
-                    message_placeholder.markdown(full_response)
+                    # Answers from the top report/research chunks, streaming tokens as they arrive
+                    update = qa_node(AgentState(**final_values), prompt, thread_id, on_token=show_token)
+                    new_history = update["chat_history"]
+                    message_placeholder.markdown(new_history[-1]["content"])
                 
                 # Update state
-                new_history = final_values.get("chat_history", []) + [
-                    {"role": "user", "content": prompt},
-                    {"role": "assistant", "content": full_response}
-                ]
                 app.update_state(config, {"chat_history": new_history})
                 st.rerun()
 else:
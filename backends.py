@@ -0,0 +1,209 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from cache import SqliteCache, CachedLLM, CachedSearch
+from checkpointing import CHECKPOINT_DB, create_checkpointer
+from metrics import Instrumented
+from reports import REPORTS_DIR
+from ratelimit import Throttled, llm_limiter, small_llm_limiter, search_limiter
+from routing import ModelRouter, parse_routes
+
+logger = logging.getLogger("ResearchSuite")
+
+KINDS = ("llm", "search", "checkpointer", "progress", "reports")
+
+# kind -> backend name -> factory(config) returning the client
+BACKENDS: Dict[str, Dict[str, Callable[[dict], Any]]] = {kind: {} for kind in KINDS}
+
+
+def register(kind: str, name: str):
+    """Decorator adding a backend factory; `build_app` picks it when `config[kind] == name`."""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend kind {kind!r}; expected one of {', '.join(KINDS)}")
+
+    def decorator(factory: Callable[[dict], Any]):
+        BACKENDS[kind][name] = factory
+        return factory
+    return decorator
+
+
+def app_config(**overrides) -> dict:
+    """Backends and their options for `graph.build_app`: the environment's choice unless overridden."""
+    config = {
+        "llm": os.getenv("LLM_BACKEND", "groq"),
+        "search": os.getenv("SEARCH_BACKEND", "tavily"),
+        "checkpointer": os.getenv("CHECKPOINTER", "sqlite"),
+        "checkpoint_db": CHECKPOINT_DB,
+        "reports_dir": REPORTS_DIR,
+        "interrupt_before": ["researcher", "publisher"],
+        # Keyword arguments for the fake backends (e.g. {"latency": 0})
+        "llm_options": {},
+        "search_options": {},
+    }
+    config.update(overrides)
+    # Memoized node progress is kept next to sqlite checkpoints; other checkpointers run without it
+    config.setdefault("progress", "sqlite" if config["checkpointer"] == "sqlite" else "none")
+    # So is the index of published reports; the report files always go to `reports_dir`
+    config.setdefault("reports", "sqlite" if config["checkpointer"] == "sqlite" else "memory")
+    return config
+
+
+def create(kind: str, config: dict):
+    name = config[kind]
+    try:
+        factory = BACKENDS[kind][name]
+    except KeyError:
+        raise ValueError(f"Unknown {kind} backend {name!r}; expected one of {', '.join(sorted(BACKENDS[kind]))}") from None
+    return factory(config)
+
+
+class Clients:
+    """The process's LLM and search clients (and progress and report stores), each created on first use.
+
+    Nodes call the module-level `llm` / `search` / `progress` / `reports` proxies, so one
+    set of clients serves every app in the process; `configure` (called by
+    `build_app`) swaps the backends for clients created after it.
+    """
+
+    def __init__(self):
+        self.config: Optional[dict] = None
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config: dict):
+        with self._lock:
+            self.config = config
+            self._clients.clear()
+
+    def get(self, kind: str):
+        with self._lock:
+            if kind not in self._clients:
+                config = self.config or app_config()
+                self._clients[kind] = create(kind, config)
+                logger.info(f"Created {kind} backend {config[kind]!r}")
+            return self._clients[kind]
+
+
+clients = Clients()
+
+
+class Lazy:
+    """Stands in for the `kind` client of `clients`; nothing is constructed until an attribute is used."""
+
+    def __init__(self, kind: str, registry: Clients = clients):
+        self.kind = kind
+        self.registry = registry
+
+    def __getattr__(self, name):
+        return getattr(self.registry.get(self.kind), name)
+
+    def __repr__(self):
+        return f"Lazy({self.kind!r})"
+
+
+# Built-in backends. Provider SDKs are imported inside the factories, so only the ones in use are loaded.
+
+@register("llm", "groq")
+def groq_llm(config: dict):
+    from langchain_groq import ChatGroq
+
+    cache = SqliteCache(
+        os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite"),
+        ttl=float(os.getenv("LLM_CACHE_TTL", "604800")),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500")),
+    )
+    cache_nodes = [n.strip() for n in os.getenv("LLM_CACHE_NODES", "planner,writer,editor,qa").split(",") if n.strip()]
+
+    def chat_model(model: str, limiter):
+        # Every call is recorded as a span in metrics.telemetry
+        return Instrumented(CachedLLM(
+            Throttled(ChatGroq(model=model, temperature=0), limiter), cache, nodes=cache_nodes,
+        ), "llm")
+
+    # Planner and editor try the small model first and escalate to the large one (see routing.py)
+    small_model = os.getenv("LLM_SMALL_MODEL", "openai/gpt-oss-20b")
+    return ModelRouter(
+        chat_model(os.getenv("LLM_MODEL", "openai/gpt-oss-120b"), llm_limiter),
+        chat_model(small_model, small_llm_limiter) if small_model else None,
+        routes=parse_routes(os.getenv("LLM_ROUTES", "planner=cascade,editor=cascade,writer=large,qa=large")),
+        min_confidence=float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", "0.7")),
+    )
+
+
+@register("llm", "fake")
+def fake_llm(config: dict):
+    from fakes import FakeLLM
+
+    return ModelRouter(Instrumented(FakeLLM(**config.get("llm_options", {})), "llm"))
+
+
+@register("search", "tavily")
+def tavily_search(config: dict):
+    from langchain_tavily import TavilySearch
+
+    return Instrumented(CachedSearch(
+        Throttled(TavilySearch(max_results=3), search_limiter),
+        SqliteCache(
+            os.getenv("SEARCH_CACHE_PATH", "search_cache.sqlite"),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000")),
+        ),
+        mode=os.getenv("SEARCH_CACHE_MODE", "readwrite"),
+    ), "search")
+
+
+@register("search", "fake")
+def fake_search(config: dict):
+    from fakes import FakeSearch
+
+    return Instrumented(FakeSearch(**config.get("search_options", {})), "search")
+
+
+@register("checkpointer", "sqlite")
+def sqlite_checkpointer(config: dict):
+    # WAL mode, one connection per thread; optional per-thread retention,
+    # delta encoding of unchanged/appended fields and compression of large payloads
+    keep_last = os.getenv("CHECKPOINT_KEEP_LAST")
+    return create_checkpointer(
+        config["checkpoint_db"],
+        keep_last=int(keep_last) if keep_last else None,
+        delta=os.getenv("CHECKPOINT_DELTA", "1") == "1",
+        compress=os.getenv("CHECKPOINT_COMPRESS", "1") == "1",
+    )
+
+
+@register("checkpointer", "memory")
+def memory_checkpointer(config: dict):
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    return InMemorySaver()
+
+
+@register("progress", "sqlite")
+def sqlite_progress(config: dict):
+    from progress import ProgressStore
+
+    return ProgressStore(config["checkpoint_db"])
+
+
+@register("progress", "none")
+def no_progress(config: dict):
+    from progress import NoProgress
+
+    return NoProgress()
+
+
+@register("reports", "sqlite")
+def sqlite_reports(config: dict):
+    from reports import ReportStore
+
+    return ReportStore(config["reports_dir"], config["checkpoint_db"])
+
+
+@register("reports", "memory")
+def memory_reports(config: dict):
+    from reports import ReportStore
+
+    return ReportStore(config["reports_dir"], db=None)
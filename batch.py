@@ -0,0 +1,193 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("ResearchSuite")
+
+
+class AutoApprove:
+    """Approve every interrupt."""
+
+    def decide(self, next_step: str, values: dict) -> str:
+        return "approve"
+
+
+class MinQuestions:
+    """Approve the plan only if it has at least `n` questions; publication is always approved."""
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def decide(self, next_step: str, values: dict) -> str:
+        if next_step == "researcher" and len(values.get("plan", [])) < self.n:
+            return "park"
+        return "approve"
+
+
+class ParkForReview:
+    """Stop at the first interrupt and leave the thread for a human (main.py / Streamlit)."""
+
+    def decide(self, next_step: str, values: dict) -> str:
+        return "park"
+
+
+def make_policy(spec: str):
+    """Build an interrupt policy from "auto", "review" or "min-questions:N"."""
+    name, _, arg = spec.partition(":")
+    if name == "auto":
+        return AutoApprove()
+    if name == "review":
+        return ParkForReview()
+    if name == "min-questions":
+        return MinQuestions(int(arg or 3))
+    raise ValueError(f"Unknown policy: {spec}")
+
+
+def read_topics(stream: io.TextIOBase, fmt: str = "auto") -> List[dict]:
+    """Parse JSONL (`{"topic": ...}`), CSV (with a `topic` column) or one topic per line."""
+    text = stream.read()
+    if fmt == "auto":
+        first = text.lstrip()[:1]
+        fmt = "jsonl" if first == "{" else "csv" if text.split("\n", 1)[0].strip().lower().startswith("topic") else "lines"
+    if fmt == "jsonl":
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif fmt == "csv":
+        items = [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    else:
+        items = [{"topic": line.strip()} for line in text.splitlines() if line.strip()]
+    return [item for item in items if item.get("topic")]
+
+
+def batch_thread_id(topic: str) -> str:
+    # Deterministic so a rerun after a crash resumes the same checkpoints
+    slug = re.sub(r"[^a-z0-9]+", "_", topic.lower()).strip("_")[:24]
+    return f"batch_{slug}_{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:8]}"
+
+
+def run_topic(app, item: dict, policy, duplicates: int = 0) -> dict:
+    topic = item["topic"]
+    thread_id = item.get("thread_id") or batch_thread_id(topic)
+    config = {"configurable": {"thread_id": thread_id}}
+    timings = {}
+    start = time.perf_counter()
+
+    def advance(input):
+        last = time.perf_counter()
+        for event in app.stream(input, config, stream_mode="updates"):
+            now = time.perf_counter()
+            for node in event:
+                if not node.startswith("__"):
+                    timings[node] = round(timings.get(node, 0.0) + now - last, 3)
+            last = now
+
+    result = {"topic": topic, "thread_id": thread_id, "duplicates_dropped": duplicates}
+    try:
+        snapshot = app.get_state(config)
+        if not snapshot.values:
+            advance({"topic": topic})
+        elif snapshot.next:
+            logger.info(f"Resuming {thread_id} at {snapshot.next[0]}")
+        while True:
+            snapshot = app.get_state(config)
+            if not snapshot.next:
+                status = "published" if snapshot.values.get("report_path") else "ended"
+                break
+            next_step = snapshot.next[0]
+            if next_step in ("researcher", "publisher") and policy.decide(next_step, snapshot.values) == "park":
+                status = f"parked_at_{next_step}"
+                # Enough context in the summary line for a reviewer to decide without opening the thread
+                result.update(plan=snapshot.values.get("plan", []), critique=snapshot.values.get("critique", ""))
+                break
+            advance(None)
+        result.update(status=status, report_path=snapshot.values.get("report_path"),
+                      revision_count=snapshot.values.get("revision_count"))
+    except Exception as e:
+        logger.exception(f"Batch topic failed: {topic}")
+        result.update(status="failed", error=str(e))
+    result.update(seconds=round(time.perf_counter() - start, 3), node_seconds=timings)
+    return result
+
+
+def unique_threads(items: Iterable[dict]) -> List[Tuple[dict, int]]:
+    """First item of each thread id, with the number of later items dropped as its duplicates.
+
+    Two runs must never advance the same thread.
+    """
+    unique = {}
+    for item in items:
+        thread_id = item.get("thread_id") or batch_thread_id(item["topic"])
+        if thread_id in unique:
+            logger.warning(f"Skipping duplicate topic {item['topic']!r} (thread {thread_id})")
+            unique[thread_id][1] += 1
+            continue
+        unique[thread_id] = [item, 0]
+    return [(item, duplicates) for item, duplicates in unique.values()]
+
+
+def run_batch(app, items: Iterable[dict], policy, workers: int = 4, out=None) -> List[dict]:
+    """Run topics concurrently; each result is written to `out` as a JSONL line as soon as it finishes.
+
+    Duplicate topics (same thread id) run once; their summary line counts them in `duplicates_dropped`.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        futures = [pool.submit(run_topic, app, item, policy, duplicates)
+                   for item, duplicates in unique_threads(items)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if out is not None:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many research topics without interaction")
+    parser.add_argument("input", nargs="?", default="-", help="Topics file (JSONL, CSV or one per line); '-' for stdin")
+    parser.add_argument("--format", choices=["auto", "jsonl", "csv", "lines"], default="auto")
+    parser.add_argument("--workers", type=int, default=4, help="Topics to run concurrently")
+    parser.add_argument("--policy", default="auto", help="auto | review | min-questions:N")
+    parser.add_argument("--out", default="-", help="JSONL summary path; '-' for stdout")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    parser.add_argument("--metrics-host", help="Interface for --metrics-port (default: METRICS_HOST or 127.0.0.1)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    from graph import configure_logging, runner
+    from metrics import start_metrics_server
+
+    configure_logging()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port, host=args.metrics_host)
+
+    policy = make_policy(args.policy)
+    if args.input == "-":
+        items = read_topics(sys.stdin, args.format)
+    else:
+        with open(args.input) as f:
+            items = read_topics(f, args.format)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "a")
+    try:
+        # Runs share one event loop; workers only bound how many topics are in flight
+        results = run_batch(runner, items, policy, args.workers, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    published = sum(r["status"] == "published" for r in results)
+    print(f"{published}/{len(results)} topics published", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Checkpoint storage benchmark: bytes written per step and state load latency.
+
+Runs a synthetic research thread (growing research_data and chat_history,
+a multi-KB draft rewritten every revision) against the stock SqliteSaver
+serde and against compressed / delta-encoded variants.
+
+    python benchmarks/checkpoint_serde.py --steps 12 --loads 200
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.graph import StateGraph, END  # noqa: E402
+
+from checkpointing import CompressedSerializer, PooledSqliteSaver  # noqa: E402
+from state import AgentState  # noqa: E402
+
+VARIANTS = {
+    "default": {},
+    "compressed": {"serde": CompressedSerializer},
+    "delta": {"delta": True},
+    "delta+compressed": {"delta": True, "serde": CompressedSerializer},
+}
+
+
+def prose(rng: random.Random, words: int) -> str:
+    # Pseudo-random text so compression ratios resemble real reports rather than repeated strings
+    vocab = [f"{rng.choice('bcdfghklmnprst')}{rng.choice('aeiou')}{rng.choice('nrstlm')}{i}" for i in range(2000)]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def build(saver, steps: int):
+    def revise(state: AgentState):
+        n = state.revision_count
+        rng = random.Random(n)
+        return {
+            "research_data": [f"Q: question {n}\nA: " + prose(rng, 250)],
+            "draft": "\n\n".join(f"## Section {i}\n" + prose(rng, 200) for i in range(6)),
+            "chat_history": state.chat_history + [{"role": "user", "content": f"question {n}"}],
+            "revision_count": n + 1,
+        }
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("writer", revise)
+    workflow.set_entry_point("writer")
+    workflow.add_conditional_edges("writer", lambda s: END if s.revision_count >= steps else "writer")
+    return workflow.compile(checkpointer=saver)
+
+
+def run_variant(name: str, options: dict, steps: int, loads: int, workdir: str) -> dict:
+    path = os.path.join(workdir, f"{name}.sqlite")
+    kwargs = {"delta": options.get("delta", False)}
+    if "serde" in options:
+        kwargs["serde"] = options["serde"]()
+    saver = PooledSqliteSaver(path, **kwargs)
+    config = {"configurable": {"thread_id": "bench"}}
+
+    start = time.perf_counter()
+    build(saver, steps).invoke({"topic": "benchmark"}, config)
+    write_seconds = time.perf_counter() - start
+    saver.close()
+
+    conn = sqlite3.connect(path)
+    rows, total = conn.execute("SELECT COUNT(*), SUM(LENGTH(checkpoint)) FROM checkpoints").fetchone()
+    conn.close()
+
+    # Load latency from a cold saver, so reconstruction is not served from its cache
+    fresh = PooledSqliteSaver(path, **kwargs)
+    app = build(fresh, steps)
+    start = time.perf_counter()
+    for _ in range(loads):
+        app.get_state(config)
+        fresh._decoded.clear()
+    load_ms = (time.perf_counter() - start) / loads * 1000
+    fresh.close()
+
+    return {
+        "variant": name,
+        "checkpoints": rows,
+        "bytes_total": total,
+        "bytes_per_step": round(total / rows),
+        "run_seconds": round(write_seconds, 3),
+        "get_state_ms": round(load_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=12, help="Writer revisions per thread")
+    parser.add_argument("--loads", type=int, default=200, help="get_state calls to time")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_variant(name, options, args.steps, args.loads, workdir) for name, options in VARIANTS.items()]
+
+    baseline = results[0]["bytes_total"]
+    print(f"{'variant':<18}{'bytes/step':>12}{'total':>12}{'ratio':>8}{'get_state ms':>14}")
+    for r in results:
+        print(f"{r['variant']:<18}{r['bytes_per_step']:>12}{r['bytes_total']:>12}{r['bytes_total'] / baseline:>8.2f}{r['get_state_ms']:>14}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""End-to-end graph benchmark against local fake LLM and search clients.
+
+Drives full planner -> publisher runs of `graph.workflow` (plan and
+publication interrupts auto-approved, editor revision loops included) at
+several concurrency levels. Reports per-node latency percentiles, checkpoint
+write cost, peak memory and throughput. Everything runs in a temporary
+directory; no network or API keys are needed.
+
+    python benchmarks/graph_runs.py --concurrency 1 10 100 --json bench.json
+    python benchmarks/graph_runs.py --compare bench.json   # diff against a previous run
+    python benchmarks/graph_runs.py --small-llm-latency 0.01 --compare bench.json   # small-model cascade
+    python benchmarks/graph_runs.py --async --concurrency 10 100 500   # every run on one event loop
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import FakeLLM, FakeSearch  # noqa: E402
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(np.mean(samples)) * 1000, 2),
+        "p50_ms": round(float(p50) * 1000, 2),
+        "p95_ms": round(float(p95) * 1000, 2),
+        "p99_ms": round(float(p99) * 1000, 2),
+    }
+
+
+class Recorder:
+    """Thread-safe sample sink for node and checkpoint timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.nodes = {}
+        self.checkpoint = {"put": [], "put_writes": []}
+
+    def node(self, name: str, seconds: float):
+        with self._lock:
+            self.nodes.setdefault(name, []).append(seconds)
+
+    def timed(self, kind: str, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.checkpoint[kind].append(time.perf_counter() - start)
+        return wrapper
+
+
+def drive(app, thread_id: str, topic: str, recorder: Recorder) -> str:
+    """One full thread, approving every interrupt. Returns the final status."""
+    config = {"configurable": {"thread_id": thread_id}}
+    started = {}
+    input = {"topic": topic}
+    while True:
+        for payload in app.stream(input, config, stream_mode="tasks"):
+            if "result" in payload or "error" in payload:
+                recorder.node(payload["name"], time.perf_counter() - started.pop(payload["id"]))
+            else:
+                started[payload["id"]] = time.perf_counter()
+        snapshot = app.get_state(config)
+        if not snapshot.next:
+            return "published" if snapshot.values.get("report_path") else "ended"
+        input = None
+
+
+async def adrive(app, thread_id: str, topic: str, recorder: Recorder) -> str:
+    """`drive` through `astream`, for runs multiplexed on one event loop."""
+    config = {"configurable": {"thread_id": thread_id}}
+    started = {}
+    input = {"topic": topic}
+    while True:
+        async for payload in app.astream(input, config, stream_mode="tasks"):
+            if "result" in payload or "error" in payload:
+                recorder.node(payload["name"], time.perf_counter() - started.pop(payload["id"]))
+            else:
+                started[payload["id"]] = time.perf_counter()
+        snapshot = await app.aget_state(config)
+        if not snapshot.next:
+            return "published" if snapshot.values.get("report_path") else "ended"
+        input = None
+
+
+async def drive_all(app, concurrency: int, threads: int, recorder: Recorder, peak_threads: list) -> list:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> str:
+        async with gate:
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            return await adrive(app, f"bench_{concurrency}_{i}", f"benchmark topic {i}", recorder)
+
+    return await asyncio.gather(*(one(i) for i in range(threads)), return_exceptions=True)
+
+
+def run_level(workflow, interrupts, concurrency: int, threads: int, workdir: str, options: dict) -> dict:
+    import nodes
+    from catalog import SessionCatalog
+    from checkpointing import create_checkpointer, db_size
+    from progress import ProgressStore
+
+    db = os.path.join(workdir, f"bench_{concurrency}.sqlite")
+    saver = create_checkpointer(db, delta=options["delta"], compress=options["compress"])
+    catalog = SessionCatalog(db)
+    saver.listeners.append(catalog.on_checkpoint)
+    nodes.progress = ProgressStore(db)
+    saver.listeners.append(nodes.progress.on_checkpoint)
+    recorder = Recorder()
+    saver.put = recorder.timed("put", saver.put)
+    saver.put_writes = recorder.timed("put_writes", saver.put_writes)
+    app = workflow.compile(checkpointer=saver, interrupt_before=interrupts)
+
+    if options["tracemalloc"]:
+        tracemalloc.start()
+    outcomes = {}
+    peak_threads = [threading.active_count()]
+    start = time.perf_counter()
+    if options["async"]:
+        results = asyncio.run(drive_all(app, concurrency, threads, recorder, peak_threads))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(drive, app, f"bench_{concurrency}_{i}", f"benchmark topic {i}", recorder)
+                       for i in range(threads)]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+                peak_threads[0] = max(peak_threads[0], threading.active_count())
+    for status in results:
+        if isinstance(status, BaseException):
+            status = f"failed:{type(status).__name__}"
+        outcomes[status] = outcomes.get(status, 0) + 1
+    wall = time.perf_counter() - start
+    heap_peak = None
+    if options["tracemalloc"]:
+        heap_peak = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    put = recorder.checkpoint["put"]
+    result = {
+        "concurrency": concurrency,
+        "threads": threads,
+        "mode": "async" if options["async"] else "threads",
+        "peak_os_threads": peak_threads[0],
+        "outcomes": outcomes,
+        "wall_seconds": round(wall, 3),
+        "threads_per_second": round(threads / wall, 3),
+        "nodes_per_second": round(sum(len(v) for v in recorder.nodes.values()) / wall, 2),
+        "nodes": {name: percentiles(samples) for name, samples in sorted(recorder.nodes.items())},
+        "checkpoint": {
+            "put": percentiles(put),
+            "put_writes": percentiles(recorder.checkpoint["put_writes"]),
+            "put_seconds_share": round(sum(put) / (wall * concurrency), 4),
+            "db_bytes": db_size(db),
+        },
+        # ru_maxrss is the process high-water mark (KiB on Linux), so it only grows across levels
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_heap_mb": heap_peak,
+    }
+    saver.close()
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(previous: dict, current: dict):
+    before = {level["concurrency"]: level for level in previous["levels"]}
+    print(f"\nvs {previous.get('commit', '?')}:")
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if not old:
+            continue
+        ratio = level["threads_per_second"] / old["threads_per_second"] if old["threads_per_second"] else float("nan")
+        print(f"  c={level['concurrency']:<4} throughput x{ratio:.2f}")
+        for name, stats in level["nodes"].items():
+            prev = old["nodes"].get(name, {})
+            if prev.get("p50_ms"):
+                print(f"    {name:<11} p50 {prev['p50_ms']:>9} -> {stats['p50_ms']:>9} ms  p95 {prev['p95_ms']:>9} -> {stats['p95_ms']:>9} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100], help="Concurrent threads per level")
+    parser.add_argument("--threads", type=int, help="Threads per level (default: 2x concurrency, at least 5)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds before the first token")
+    parser.add_argument("--llm-jitter", type=float, default=0.02)
+    parser.add_argument("--llm-tokens", type=int, default=400, help="Tokens per free-text reply")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="Seconds between streamed tokens")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--small-llm-latency", type=float,
+                        help="Route planner and editor through a small-model cascade with this first-token latency")
+    parser.add_argument("--small-llm-invalid-rate", type=float, default=0.1,
+                        help="Share of small-model structured replies that fail to parse and escalate")
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--search-jitter", type=float, default=0.1)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--approve-rate", type=float, default=0.5, help="Chance the editor approves a draft")
+    parser.add_argument("--no-delta", action="store_true", help="Disable checkpoint delta encoding")
+    parser.add_argument("--no-compress", action="store_true", help="Disable checkpoint compression")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run each level on one event loop through astream instead of a thread pool")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also measure peak Python heap (slows runs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Previous --json output to compare against")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix="graph_bench_")
+    # Keep reports, Q&A indexes and the default checkpoint DB out of the working tree
+    os.environ["CHECKPOINT_DB"] = os.path.join(workdir, "default.sqlite")
+    os.environ.setdefault("GROQ_API_KEY", "offline")
+    os.environ.setdefault("TAVILY_API_KEY", "offline")
+    os.chdir(workdir)
+
+    import logging
+    import nodes
+    from backends import app_config
+    from graph import workflow
+    from metrics import Instrumented
+    from routing import ModelRouter, parse_routes
+    logging.getLogger("ResearchSuite").setLevel(logging.WARNING)
+
+    # Wrapped like the real clients, so instrumentation overhead is part of the measurement
+    fake_llm = FakeLLM(latency=args.llm_latency, jitter=args.llm_jitter, tokens=args.llm_tokens,
+                       token_latency=args.llm_token_latency, failure_rate=args.llm_failure_rate,
+                       approve_rate=args.approve_rate, seed=args.seed)
+    small_llm = None
+    if args.small_llm_latency is not None:
+        small_llm = FakeLLM(latency=args.small_llm_latency, jitter=args.llm_jitter, tokens=args.llm_tokens,
+                            token_latency=args.llm_token_latency, failure_rate=args.llm_failure_rate,
+                            approve_rate=args.approve_rate, invalid_rate=args.small_llm_invalid_rate,
+                            seed=args.seed, model_name="fake-small")
+    nodes.llm = ModelRouter(Instrumented(fake_llm, "llm"), Instrumented(small_llm, "llm") if small_llm else None,
+                            routes=parse_routes(os.getenv("LLM_ROUTES", "planner=cascade,editor=cascade")))
+    nodes.search = Instrumented(FakeSearch(latency=args.search_latency, jitter=args.search_jitter,
+                                           failure_rate=args.search_failure_rate, seed=args.seed), "search")
+    options = {"delta": not args.no_delta, "compress": not args.no_compress, "tracemalloc": args.tracemalloc,
+               "async": args.use_async}
+
+    levels = []
+    for concurrency in args.concurrency:
+        threads = args.threads or max(5, 2 * concurrency)
+        levels.append(run_level(workflow, app_config()["interrupt_before"], concurrency, threads, workdir, options))
+        level = levels[-1]
+        print(f"c={concurrency:<4} {threads} threads in {level['wall_seconds']}s "
+              f"({level['threads_per_second']} threads/s, {level['nodes_per_second']} nodes/s, "
+              f"{level['peak_os_threads']} OS threads) {level['outcomes']}")
+        print(f"  checkpoint put p50 {level['checkpoint']['put'].get('p50_ms')} ms, "
+              f"p95 {level['checkpoint']['put'].get('p95_ms')} ms, {level['checkpoint']['db_bytes']} bytes; "
+              f"peak RSS {level['peak_rss_mb']} MB")
+        for name, stats in level["nodes"].items():
+            print(f"  {name:<11} n={stats['count']:<5} p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms")
+
+    for node, stats in nodes.llm.routing_stats().items():
+        print(f"  routing {node:<8} {stats['cascades']} cascades, {stats['escalations']} escalated, "
+              f"~{stats['saved_seconds']}s saved, {stats['wasted_seconds']}s wasted")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "settings": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        "fakes": {"llm_calls": fake_llm.calls, "llm_failures": fake_llm.failures,
+                  "small_llm_calls": small_llm.calls if small_llm else 0,
+                  "search_calls": nodes.search.calls, "search_failures": nodes.search.failures},
+        "levels": levels,
+        "routing": nodes.llm.routing_stats(),
+    }
+    if compare_path:
+        with open(compare_path) as f:
+            compare(json.load(f), report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {json_path}")
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Cold-start benchmark: import and startup cost of each entry point.
+
+Every sample runs in a fresh interpreter inside an empty temporary directory,
+so module caches and files from earlier samples do not help. Scenarios:
+
+    import     `import graph` (visualize_graph.py, anything that only needs the workflow)
+    tests      importing tests/test_graph.py
+    cli        importing main.py, which builds the default app
+    streamlit  first run of app_streamlit.py under Streamlit's AppTest, then reruns
+
+    python benchmarks/startup.py --repeat 5 --json startup.json
+    python benchmarks/startup.py --compare startup.json   # after a change
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMED = """
+import json, time
+start = time.perf_counter()
+{code}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+STREAMLIT = """
+import json, statistics, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=120)
+at.run()
+cold = time.perf_counter() - start
+reruns = []
+for _ in range({reruns}):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{"seconds": cold, "rerun_seconds": statistics.median(reruns)}}))
+"""
+
+SCENARIOS = {
+    "import": TIMED.format(code="import graph"),
+    "tests": TIMED.format(code="import test_graph"),
+    "cli": TIMED.format(code="import main"),
+    "streamlit": STREAMLIT.format(path=os.path.join(ROOT, "app_streamlit.py"), reruns=5),
+}
+
+
+def sample(script: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "tests")]))
+    # Placeholders, so trees that still build clients at import time can be measured too
+    env.setdefault("GROQ_API_KEY", "offline")
+    env.setdefault("TAVILY_API_KEY", "offline")
+    with tempfile.TemporaryDirectory(prefix="startup_bench_") as workdir:
+        env["CHECKPOINT_DB"] = os.path.join(workdir, "checkpoints.sqlite")
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        files = sorted(os.listdir(workdir))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = wall
+    result["files"] = files
+    return result
+
+
+def summarize(samples) -> dict:
+    summary = {"files_created": samples[-1]["files"]}
+    for key in ("seconds", "process_seconds", "rerun_seconds"):
+        if key in samples[0]:
+            summary[key.replace("seconds", "ms")] = round(statistics.median(s[key] for s in samples) * 1000, 1)
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Previous --json output to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios:
+        try:
+            results[name] = summarize([sample(SCENARIOS[name]) for _ in range(args.repeat)])
+        except RuntimeError as e:
+            print(f"{name:<10} failed: {e}")
+            continue
+        r = results[name]
+        rerun = f", rerun {r['rerun_ms']} ms" if "rerun_ms" in r else ""
+        print(f"{name:<10} {r['ms']:>8} ms in-process, {r['process_ms']:>8} ms with interpreter start{rerun}; "
+              f"files created: {', '.join(r['files_created']) or 'none'}")
+
+    report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": sys.version.split()[0], "repeat": args.repeat, "scenarios": results}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"\nvs {previous.get('commit', '?')}:")
+        for name, r in results.items():
+            old = previous["scenarios"].get(name)
+            if old:
+                print(f"  {name:<10} {old['ms']:>8} -> {r['ms']:>8} ms (x{r['ms'] / old['ms']:.2f})")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Job queue throughput for different worker process and concurrency counts.
+
+Queues `--jobs` topics in a temporary checkpoint database, then times
+`worker.py --policy auto --until-idle` draining them with the fake LLM and
+search backends (no network or API keys). Each configuration starts from an
+empty database.
+
+    python benchmarks/worker_scaling.py --processes 1 2 4 --concurrency 1 8 --jobs 40
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def run(processes: int, concurrency: int, jobs: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="worker_bench_") as workdir:
+        env = dict(os.environ, PYTHONPATH=ROOT, CHECKPOINT_DB=os.path.join(workdir, "checkpoints.sqlite"),
+                   LLM_BACKEND="fake", SEARCH_BACKEND="fake", TRACE_FILE="")
+        subprocess.run([sys.executable, "-c", (
+            "from jobqueue import JobQueue\n"
+            "queue = JobQueue()\n"
+            f"for i in range({jobs}): queue.enqueue(f'bench_{{i}}', {{'topic': f'benchmark topic {{i}}'}})"
+        )], cwd=workdir, env=env, check=True)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "worker.py"), "--policy", "auto", "--until-idle",
+                        "--processes", str(processes), "--concurrency", str(concurrency), "--poll-interval", "0.05"],
+                       cwd=workdir, env=env, check=True, capture_output=True)
+        wall = time.perf_counter() - start
+        counts = json.loads(subprocess.run([sys.executable, "-c", (
+            "import json; from jobqueue import JobQueue; print(json.dumps(JobQueue().counts()))"
+        )], cwd=workdir, env=env, check=True, capture_output=True, text=True).stdout)
+    return {"processes": processes, "concurrency": concurrency, "jobs": jobs, "wall_seconds": round(wall, 3),
+            "jobs_per_second": round(counts.get("done", 0) / wall, 3), "outcomes": counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU cores")
+    results = []
+    for processes in args.processes:
+        for concurrency in args.concurrency:
+            result = run(processes, concurrency, args.jobs)
+            results.append(result)
+            print(f"processes={processes:<3} concurrency={concurrency:<4} {result['jobs']} jobs in "
+                  f"{result['wall_seconds']}s ({result['jobs_per_second']} jobs/s) {result['outcomes']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
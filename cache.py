@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from langchain_core.messages import messages_from_dict, message_to_dict
+from langgraph.config import get_config
+
+from metrics import annotate
+
+logger = logging.getLogger("ResearchSuite")
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay-only mode when a request has no cached response."""
+
+
+class SqliteCache:
+    """Small persistent key/value cache with TTL expiry and LRU eviction.
+
+    Values are stored as JSON. The connection is opened on first use so that
+    constructing a cache never touches the filesystem.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = 86400, max_entries: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access);
+                """
+            )
+        return self._conn
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def put(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            # Evict least recently used entries beyond the size bound
+            conn.execute(
+                "DELETE FROM cache WHERE key NOT IN (SELECT key FROM cache ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache")
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": size,
+        }
+
+
+def normalize_query(text: str) -> str:
+    """Collapse case, whitespace and trailing punctuation so near-identical questions share a key."""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip("?.!; ")
+
+
+def cache_key(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedSearch:
+    """Wraps a search client (anything with `invoke(query)`) with a `SqliteCache`.
+
+    Modes: "readwrite" (default) serves hits and stores misses, "replay" only
+    serves hits and raises `ReplayMiss` otherwise, "off" bypasses the cache.
+    """
+
+    def __init__(self, client, cache: SqliteCache, mode: str = "readwrite"):
+        if mode not in ("readwrite", "replay", "off"):
+            raise ValueError(f"Unknown search cache mode: {mode}")
+        self.client = client
+        self.cache = cache
+        self.mode = mode
+
+    def _lookup(self, query: str):
+        """(key, cached result) for a query; key is None when the cache is off."""
+        if self.mode == "off":
+            annotate(cache="bypassed")
+            return None, None
+        key = cache_key("search", normalize_query(query))
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"Search cache hit: {query}")
+            annotate(cache="hit")
+            return key, cached
+        annotate(cache="miss")
+        if self.mode == "replay":
+            raise ReplayMiss(f"No cached search result for: {query}")
+        return key, None
+
+    def _store(self, key: Optional[str], query: str, result):
+        if key is None:
+            return
+        try:
+            self.cache.put(key, result)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Search result not cacheable for {query}: {e}")
+
+    def invoke(self, query: str):
+        key, cached = self._lookup(query)
+        if cached is not None:
+            return cached
+        result = self.client.invoke(query)
+        self._store(key, query, result)
+        return result
+
+    async def ainvoke(self, query: str):
+        # SQLite reads and writes (and their lock waits) stay off the event loop
+        key, cached = await asyncio.to_thread(self._lookup, query)
+        if cached is not None:
+            return cached
+        result = await self.client.ainvoke(query)
+        await asyncio.to_thread(self._store, key, query, result)
+        return result
+
+
+def _current_node() -> str:
+    """Name of the graph node making the call, or "qa" for calls outside a graph run."""
+    try:
+        return get_config().get("metadata", {}).get("langgraph_node") or "qa"
+    except RuntimeError:
+        return "qa"
+
+
+class CachedLLM:
+    """Response cache in front of a chat model, keyed on (model, messages, output schema).
+
+    Covers `invoke`, `stream` and `with_structured_output(...).invoke`;
+    `invoke` and `stream` share entries. Caching is enabled per graph node
+    via `nodes`; other attributes are delegated to the wrapped model.
+    """
+
+    def __init__(self, llm, cache: SqliteCache, nodes=("planner", "writer", "editor", "qa"), schema=None, _bound=None, _counters=None):
+        self.llm = llm
+        self.cache = cache
+        self.nodes = set(nodes)
+        self.schema = schema
+        self._bound = _bound if _bound is not None else llm
+        self._counters = _counters if _counters is not None else {}
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def with_structured_output(self, schema, **kwargs):
+        return CachedLLM(
+            self.llm, self.cache, self.nodes, schema=schema,
+            _bound=self.llm.with_structured_output(schema, **kwargs),
+            _counters=self._counters,
+        )
+
+    def _key(self, messages) -> str:
+        model = getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None)
+        schema = self.schema.model_json_schema() if self.schema is not None else None
+        return cache_key(
+            "llm",
+            model,
+            getattr(self.llm, "temperature", None),
+            [(m.type, m.content) for m in messages],
+            schema,
+        )
+
+    def _count(self, node: str, outcome: str):
+        annotate(cache={"hits": "hit", "misses": "miss"}.get(outcome, outcome))
+        counts = self._counters.setdefault(node, {"hits": 0, "misses": 0, "bypassed": 0})
+        counts[outcome] += 1
+
+    def _lookup(self, messages, streaming: bool = False):
+        """(key, cached response) for a call; key is None when this node bypasses the cache."""
+        node = _current_node()
+        if node not in self.nodes or (streaming and self.schema is not None):
+            self._count(node, "bypassed")
+            return None, None
+        key = self._key(messages)
+        cached = self.cache.get(key)
+        if cached is None:
+            self._count(node, "misses")
+            return key, None
+        self._count(node, "hits")
+        logger.info(f"LLM cache hit ({node})")
+        if self.schema is not None:
+            return key, self.schema.model_validate(cached)
+        return key, messages_from_dict([cached])[0]
+
+    def _store(self, key: Optional[str], response):
+        if key is None or response is None:
+            return
+        self.cache.put(key, response.model_dump() if self.schema is not None else message_to_dict(response))
+
+    def invoke(self, messages, *args, **kwargs):
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            return cached
+        response = self._bound.invoke(messages, *args, **kwargs)
+        self._store(key, response)
+        return response
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        # SQLite reads and writes (and their lock waits) stay off the event loop
+        key, cached = await asyncio.to_thread(self._lookup, messages)
+        if cached is not None:
+            return cached
+        response = await self._bound.ainvoke(messages, *args, **kwargs)
+        await asyncio.to_thread(self._store, key, response)
+        return response
+
+    def stream(self, messages, *args, **kwargs):
+        """Stream chunks, replaying a cached response as a single chunk on a hit."""
+        key, cached = self._lookup(messages, streaming=True)
+        if cached is not None:
+            yield cached
+            return
+        full = None
+        for chunk in self._bound.stream(messages, *args, **kwargs):
+            full = chunk if full is None else full + chunk
+            yield chunk
+        self._store(key, full)
+
+    async def astream(self, messages, *args, **kwargs):
+        key, cached = await asyncio.to_thread(self._lookup, messages, True)
+        if cached is not None:
+            yield cached
+            return
+        full = None
+        async for chunk in self._bound.astream(messages, *args, **kwargs):
+            full = chunk if full is None else full + chunk
+            yield chunk
+        await asyncio.to_thread(self._store, key, full)
+
+    def stats(self) -> dict:
+        return {"cache": self.cache.stats(), "nodes": {k: dict(v) for k, v in self._counters.items()}}
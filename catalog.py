@@ -0,0 +1,160 @@
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from checkpointing import CHECKPOINT_DB, connect, create_checkpointer
+
+logger = logging.getLogger("ResearchSuite")
+
+# Pending-node channels LangGraph keeps in checkpoint values, e.g. "branch:to:researcher"
+BRANCH_PREFIX = "branch:to:"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    thread_id TEXT PRIMARY KEY,
+    topic TEXT,
+    status TEXT NOT NULL,
+    revision_count INTEGER NOT NULL DEFAULT 0,
+    last_updated REAL NOT NULL,
+    report_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_updated ON sessions (last_updated DESC);
+CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status, last_updated DESC);
+"""
+
+
+def pending_nodes(values: dict) -> List[str]:
+    return [k[len(BRANCH_PREFIX):] for k in values if k.startswith(BRANCH_PREFIX)]
+
+
+def session_status(values: dict, next_nodes: List[str]) -> str:
+    if values.get("report_path"):
+        return "published"
+    if "researcher" in next_nodes:
+        return "plan_review"
+    if "publisher" in next_nodes:
+        return "final_review"
+    if next_nodes:
+        return "running"
+    return "ended"
+
+
+class SessionCatalog:
+    """Materialized one-row-per-thread summary of the checkpoint store.
+
+    Kept current by `record`, which `PooledSqliteSaver` calls after every
+    checkpoint write once the catalog is attached as a listener. Queries hit
+    only this table, never the checkpoint blobs.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB):
+        self.path = path
+        self._local = threading.local()
+        self._setup_done = False
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            if not self._setup_done:
+                conn.executescript(SCHEMA)
+                self._setup_done = True
+        return conn
+
+    def record(self, thread_id: str, values: dict, next_nodes: Optional[List[str]] = None, updated: Optional[float] = None):
+        conn = self.conn
+        conn.execute(
+            """
+            INSERT INTO sessions (thread_id, topic, status, revision_count, last_updated, report_path)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(thread_id) DO UPDATE SET
+                topic = excluded.topic, status = excluded.status, revision_count = excluded.revision_count,
+                last_updated = excluded.last_updated, report_path = excluded.report_path
+            """,
+            (
+                str(thread_id),
+                values.get("topic"),
+                session_status(values, next_nodes or []),
+                values.get("revision_count", 0) or 0,
+                updated if updated is not None else time.time(),
+                values.get("report_path"),
+            ),
+        )
+        conn.commit()
+
+    def on_checkpoint(self, config, checkpoint, metadata):
+        """Checkpointer listener: summarise the checkpoint that was just written."""
+        # Only top-level graph checkpoints describe the session
+        if config["configurable"].get("checkpoint_ns"):
+            return
+        values = checkpoint["channel_values"]
+        self.record(config["configurable"]["thread_id"], values, pending_nodes(values))
+
+    def _where(self, status: Optional[str], search: Optional[str]):
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if search:
+            clauses.append("(topic LIKE ? OR thread_id LIKE ?)")
+            params.extend([f"%{search}%", f"%{search}%"])
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def list(self, status: Optional[str] = None, search: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[dict]:
+        where, params = self._where(status, search)
+        cur = self.conn.execute(
+            f"SELECT thread_id, topic, status, revision_count, last_updated, report_path FROM sessions {where} "
+            "ORDER BY last_updated DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        columns = [c[0] for c in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def count(self, status: Optional[str] = None, search: Optional[str] = None) -> int:
+        where, params = self._where(status, search)
+        return self.conn.execute(f"SELECT COUNT(*) FROM sessions {where}", params).fetchone()[0]
+
+    def get(self, thread_id: str) -> Optional[dict]:
+        cur = self.conn.execute(
+            "SELECT thread_id, topic, status, revision_count, last_updated, report_path FROM sessions WHERE thread_id = ?",
+            (str(thread_id),),
+        )
+        row = cur.fetchone()
+        return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone() is None
+
+    def backfill(self, saver) -> int:
+        """One-off import of threads that predate the catalog. Returns the number of threads recorded."""
+        with saver.cursor(transaction=False) as cur:
+            thread_ids = [row[0] for row in cur.execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall()]
+        for thread_id in thread_ids:
+            latest = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+            if latest is None:
+                continue
+            ts = latest.checkpoint.get("ts")
+            updated = datetime.fromisoformat(ts).timestamp() if ts else None
+            values = latest.checkpoint["channel_values"]
+            self.record(thread_id, values, pending_nodes(values), updated=updated)
+        return len(thread_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Session catalog maintenance")
+    parser.add_argument("--db", default=CHECKPOINT_DB, help="Path to the checkpoint database")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild the catalog from existing checkpoints")
+    args = parser.parse_args(argv)
+
+    catalog = SessionCatalog(args.db)
+    if args.backfill:
+        print(f"Recorded {catalog.backfill(create_checkpointer(args.db))} threads")
+    print(f"{catalog.count()} sessions in catalog")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("ResearchSuite")
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA busy_timeout=5000;
+PRAGMA temp_store=MEMORY;
+"""
+
+
+# Delta encoding markers stored in place of a channel value:
+#   {DELTA_REF: parent_id}                 -> value unchanged since the parent checkpoint
+#   {DELTA_REF: parent_id, "tail": [...]}  -> parent's list value with `tail` appended
+DELTA_REF = "__ckpt_ref__"
+DELTA_DEPTH = "__ckpt_delta_depth__"
+# Every Nth checkpoint in a chain is stored in full to bound reconstruction cost
+KEYFRAME_INTERVAL = 16
+
+
+class CompressedSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer that compresses payloads above `threshold` bytes.
+
+    The codec is recorded in the type tag (e.g. "msgpack+zstd"), so rows written
+    by the default serializer still load unchanged.
+    """
+
+    def __init__(self, threshold: int = 1024, codec: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if self.codec == "zstd" and zstandard is None:
+            raise ValueError("zstd codec requires the 'zstandard' package")
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = super().dumps_typed(obj)
+        if len(data) < self.threshold:
+            return type_, data
+        if self.codec == "zstd":
+            return f"{type_}+zstd", zstandard.ZstdCompressor(level=3).compress(data)
+        return f"{type_}+zlib", zlib.compress(data, 6)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith("+zlib"):
+            return super().loads_typed((type_[:-5], zlib.decompress(payload)))
+        if type_.endswith("+zstd"):
+            if zstandard is None:
+                raise ValueError("Checkpoint is zstd-compressed but 'zstandard' is not installed")
+            return super().loads_typed((type_[:-5], zstandard.ZstdDecompressor().decompress(payload)))
+        return super().loads_typed(data)
+
+
+def _worth_referencing(value: Any) -> bool:
+    # A reference marker costs ~40 bytes; small scalars are cheaper stored inline
+    if isinstance(value, (str, bytes)):
+        return len(value) > 64
+    return isinstance(value, (list, dict)) and bool(value)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a connection tuned for concurrent use: WAL, relaxed fsync, and a busy timeout instead of SQLITE_BUSY."""
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+    conn.executescript(PRAGMAS)
+    return conn
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """SqliteSaver with one connection per OS thread instead of one shared, locked connection.
+
+    Under WAL, readers never block and writers are serialised by SQLite
+    itself, so concurrent graph runs no longer queue on a single Python lock.
+    With `keep_last`, only the newest N checkpoints of a thread are retained.
+    `listeners` are called as `fn(config, checkpoint, metadata)` after each
+    checkpoint write (e.g. `SessionCatalog.on_checkpoint`).
+
+    With `delta=True`, channel values that are unchanged since the parent
+    checkpoint are stored as references, and lists that only grew (e.g.
+    `research_data`, `chat_history`) as their appended tail. Reads always
+    reconstruct full state, whichever mode wrote the row.
+
+    The async methods (`aput`, `aget_tuple`, ...) run the same code on a worker
+    thread, so `astream` runs share the database, encoding and listeners.
+    """
+
+    def __init__(self, path: str, *, keep_last: Optional[int] = None, delta: bool = False, serde=None, listeners=()):
+        if path == ":memory:":
+            raise ValueError("PooledSqliteSaver needs a file path; use SqliteSaver for in-memory databases")
+        self.path = path
+        self.keep_last = max(2, keep_last) if keep_last else None
+        self.delta = delta
+        self.listeners = list(listeners)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # (thread_id, checkpoint_ns, checkpoint_id) -> (channel_values, depth) of recently seen checkpoints
+        self._decoded = OrderedDict()
+        self._decoded_lock = threading.Lock()
+        super().__init__(connect(path), serde=serde)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            self.conn = conn
+        return conn
+
+    @conn.setter
+    def conn(self, conn: sqlite3.Connection):
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+        conn = self.conn
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            if transaction:
+                conn.commit()
+            cur.close()
+
+    def _remember(self, key: tuple, values: dict, depth: int):
+        with self._decoded_lock:
+            self._decoded[key] = (values, depth)
+            self._decoded.move_to_end(key)
+            while len(self._decoded) > 256:
+                self._decoded.popitem(last=False)
+
+    def _resolved(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        key = (thread_id, checkpoint_ns, checkpoint_id)
+        with self._decoded_lock:
+            if key in self._decoded:
+                return self._decoded[key]
+        found = self.get_tuple({"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+        }})
+        if found is None:
+            raise LookupError(f"Delta base checkpoint {checkpoint_id} missing for thread {thread_id}")
+        with self._decoded_lock:
+            return self._decoded[key]
+
+    def _encode(self, config, checkpoint):
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        if not parent_id:
+            return checkpoint, 0
+        try:
+            parent_values, parent_depth = self._resolved(thread_id, checkpoint_ns, parent_id)
+        except LookupError:
+            return checkpoint, 0
+        if parent_depth + 1 >= KEYFRAME_INTERVAL:
+            return checkpoint, 0
+
+        encoded, referenced = {}, False
+        for name, value in checkpoint["channel_values"].items():
+            base = parent_values.get(name, DELTA_REF)
+            if base is DELTA_REF:
+                encoded[name] = value
+            elif _worth_referencing(value) and (value is base or value == base):
+                encoded[name] = {DELTA_REF: parent_id}
+                referenced = True
+            elif isinstance(value, list) and isinstance(base, list) and base and value[:len(base)] == base:
+                encoded[name] = {DELTA_REF: parent_id, "tail": value[len(base):]}
+                referenced = True
+            else:
+                encoded[name] = value
+        if not referenced:
+            return checkpoint, 0
+        return {**checkpoint, "channel_values": encoded, DELTA_DEPTH: parent_depth + 1}, parent_depth + 1
+
+    def _decode(self, checkpoint_tuple):
+        if checkpoint_tuple is None:
+            return None
+        configurable = checkpoint_tuple.config["configurable"]
+        thread_id, checkpoint_ns = str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+        checkpoint = checkpoint_tuple.checkpoint
+        depth = checkpoint.pop(DELTA_DEPTH, 0)
+        values = checkpoint["channel_values"]
+        for name, value in values.items():
+            if isinstance(value, dict) and DELTA_REF in value:
+                base = self._resolved(thread_id, checkpoint_ns, value[DELTA_REF])[0][name]
+                if "tail" in value:
+                    values[name] = base + value["tail"]
+                else:
+                    values[name] = list(base) if isinstance(base, list) else base
+        self._remember((thread_id, checkpoint_ns, configurable["checkpoint_id"]), dict(values), depth)
+        return checkpoint_tuple
+
+    def get_tuple(self, config):
+        return self._decode(super().get_tuple(config))
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        for checkpoint_tuple in super().list(config, filter=filter, before=before, limit=limit):
+            yield self._decode(checkpoint_tuple)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        stored, depth = self._encode(config, checkpoint) if self.delta else (checkpoint, 0)
+        saved = super().put(config, stored, metadata, new_versions)
+        configurable = saved["configurable"]
+        self._remember(
+            (str(configurable["thread_id"]), configurable["checkpoint_ns"], configurable["checkpoint_id"]),
+            dict(checkpoint["channel_values"]), depth,
+        )
+        if self.keep_last:
+            self.prune(configurable["thread_id"], self.keep_last)
+        for listener in self.listeners:
+            try:
+                listener(saved, checkpoint, metadata)
+            except Exception as e:
+                # Listeners are best-effort; never fail a graph step because of them
+                logger.warning(f"Checkpoint listener {listener} failed: {e}")
+        return saved
+
+    # Async API for `astream` / `ainvoke` runs: the sync methods on a worker thread, so delta
+    # encoding, compression and listeners apply unchanged. Each call is a short local SQLite
+    # transaction; the event loop only awaits it.
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def _materialize(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        """Rewrite a delta-encoded checkpoint in full so its ancestors can be deleted."""
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+        raw = SqliteSaver.get_tuple(self, config)
+        if raw is None or DELTA_DEPTH not in raw.checkpoint:
+            return
+        full = self.get_tuple(config).checkpoint
+        type_, blob = self.serde.dumps_typed(full)
+        with self.cursor() as cur:
+            cur.execute(
+                "UPDATE checkpoints SET type = ?, checkpoint = ? WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (type_, blob, thread_id, checkpoint_ns, checkpoint_id),
+            )
+        self._remember((thread_id, checkpoint_ns, checkpoint_id), dict(full["channel_values"]), 0)
+
+    def prune(self, thread_id: str, keep_last: int) -> int:
+        thread_id = str(thread_id)
+        with self.cursor(transaction=False) as cur:
+            kept = cur.execute(
+                "SELECT checkpoint_ns, checkpoint_id, parent_checkpoint_id FROM checkpoints WHERE thread_id = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?",
+                (thread_id, keep_last),
+            ).fetchall()
+        kept_ids = {checkpoint_id for _, checkpoint_id, _ in kept}
+        for checkpoint_ns, checkpoint_id, parent_id in kept:
+            if parent_id and parent_id not in kept_ids:
+                self._materialize(thread_id, checkpoint_ns, checkpoint_id)
+        with self.cursor() as cur:
+            return prune_thread(cur, thread_id, keep_last)
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+def create_checkpointer(path: str = CHECKPOINT_DB, keep_last: Optional[int] = None, delta: bool = False,
+                        compress: bool = False) -> SqliteSaver:
+    serde = CompressedSerializer() if compress else None
+    if path == ":memory:":
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False), serde=serde)
+    return PooledSqliteSaver(path, keep_last=keep_last, delta=delta, serde=serde)
+
+
+def prune_thread(cur: sqlite3.Cursor, thread_id: str, keep_last: int) -> int:
+    """Delete all but the newest `keep_last` checkpoints of a thread, and their pending writes.
+
+    Delta-encoded rows must be materialized first; use `PooledSqliteSaver.prune`.
+    """
+    cur.execute(
+        """
+        DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id NOT IN (
+            SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?
+            ORDER BY checkpoint_id DESC LIMIT ?
+        )
+        """,
+        (thread_id, thread_id, keep_last),
+    )
+    removed = cur.rowcount
+    if removed:
+        cur.execute(
+            """
+            DELETE FROM writes WHERE thread_id = ? AND checkpoint_id NOT IN (
+                SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?
+            )
+            """,
+            (thread_id, thread_id),
+        )
+    return removed
+
+
+def _is_finished(saver: SqliteSaver, thread_id: str) -> bool:
+    snapshot = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+    return bool(snapshot and snapshot.checkpoint["channel_values"].get("report_path"))
+
+
+def db_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def maintain(path: str = CHECKPOINT_DB, keep_last: Optional[int] = None, compact_finished: bool = False,
+             vacuum: bool = True) -> dict:
+    """Apply the retention policy to every thread and reclaim space. Returns a size report."""
+    before = db_size(path)
+    # Compressed rows are readable regardless of this flag; it only affects rows rewritten here
+    saver = create_checkpointer(path, compress=True)
+    removed = 0
+    with saver.cursor() as cur:
+        thread_ids = [row[0] for row in cur.execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall()]
+    for thread_id in thread_ids:
+        keep = keep_last
+        if compact_finished and _is_finished(saver, thread_id):
+            keep = 1
+        if keep:
+            removed += saver.prune(thread_id, keep)
+    saver.close()
+
+    if vacuum:
+        conn = sqlite3.connect(path)
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+    return {
+        "threads": len(thread_ids),
+        "checkpoints_removed": removed,
+        "bytes_before": before,
+        "bytes_after": db_size(path),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checkpoint database maintenance")
+    parser.add_argument("--db", default=CHECKPOINT_DB, help="Path to the checkpoint database")
+    parser.add_argument("--keep-last", type=int, default=None, help="Checkpoints to keep per thread")
+    parser.add_argument("--compact-finished", action="store_true", help="Keep only the final checkpoint of published threads")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM after pruning")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"Database not found: {args.db}")
+    report = maintain(args.db, args.keep_last, args.compact_finished, vacuum=not args.no_vacuum)
+    print(json.dumps(report, indent=2))
+    print(f"Size: {report['bytes_before'] / 1024:.1f} KiB -> {report['bytes_after'] / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
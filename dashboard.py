@@ -1,7 +1,9 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-from graph import app
+from catalog import SessionCatalog
+from checkpointing import CHECKPOINT_DB
+from graph import build_app, configure_logging
+from metrics import read_spans, telemetry, thread_breakdown
 from state import AgentState
 import os
 from dotenv import load_dotenv
@@ -12,12 +14,50 @@ st.set_page_config(page_title="LangGraph Research Dashboard", layout="wide")
 
 st.title("🛡️ LangGraph Adaptive Research Dashboard")
 
+@st.cache_resource
+def get_app():
+    # Built once per Streamlit server; reruns reuse the app and its checkpointer
+    configure_logging()
+    return build_app()
+
+app = get_app()
+memory = app.checkpointer
+
+PAGE_SIZE = 20
+STATUSES = ["All", "plan_review", "running", "final_review", "published", "ended"]
+
+@st.cache_resource
+def get_catalog():
+    # One handle per server; threads created before the catalog existed are imported once
+    catalog = SessionCatalog(CHECKPOINT_DB)
+    if catalog.is_empty():
+        catalog.backfill(memory)
+    return catalog
+
+@st.cache_data(ttl=5)
+def load_sessions(status, search, page):
+    catalog = get_catalog()
+    status = None if status == "All" else status
+    return catalog.list(status, search or None, PAGE_SIZE, page * PAGE_SIZE), catalog.count(status, search or None)
+
+@st.cache_data(ttl=5)
+def load_timings(thread_id):
+    return thread_breakdown(read_spans(telemetry.trace_path, thread_id))
+
 # Sidebar for session management
 st.sidebar.header("Session Management")
-conn = sqlite3.connect("checkpoints.sqlite")
 try:
-    sessions = pd.read_sql_query("SELECT DISTINCT thread_id FROM checkpoints", conn)
-    selected_thread = st.sidebar.selectbox("Select Research Thread", sessions['thread_id'] if not sessions.empty else ["None"])
+    status_filter = st.sidebar.selectbox("Status", STATUSES)
+    search = st.sidebar.text_input("Search topic or thread")
+    page = st.sidebar.number_input("Page", min_value=1, value=1, step=1) - 1
+    sessions, total = load_sessions(status_filter, search, page)
+    st.sidebar.caption(f"{total} sessions")
+    if sessions:
+        labels = {s["thread_id"]: f"{s['topic'] or s['thread_id']} · {s['status']} · rev {s['revision_count']}" for s in sessions}
+        selected_thread = st.sidebar.selectbox("Select Research Thread", list(labels), format_func=labels.get)
+    else:
+        st.sidebar.warning("No sessions found yet.")
+        selected_thread = "None"
 except Exception:
     st.sidebar.warning("No sessions found yet.")
     selected_thread = "None"
@@ -27,9 +67,7 @@ st.header("🗺️ Workflow Visualization")
 try:
     # Generate Mermaid
     mermaid_code = app.get_graph().draw_mermaid()
-    st.markdown(f"```mermaid
-{mermaid_code}
-```")
+    st.markdown(f"```mermaid\n{mermaid_code}\n```")
     st.info("💡 Tip: Use a browser extension or paste into Mermaid Live Editor to see the full rendered diagram.")
 except Exception as e:
     st.error(f"Error drawing graph: {e}")
@@ -62,9 +100,28 @@ if selected_thread != "None":
         
         st.subheader("Editor's Critique")
         st.info(state.values.get("critique", "No critique yet."))
+
+        if state.values.get("failures"):
+            with st.expander(f"⚠️ {len(state.values['failures'])} failed searches or calls"):
+                st.dataframe(pd.DataFrame(state.values["failures"]), width="stretch")
+
+        if state.values.get("convergence_log"):
+            with st.expander("Revision convergence decisions"):
+                st.dataframe(pd.DataFrame(state.values["convergence_log"]), width="stretch")
+
+        st.divider()
+        st.subheader("⏱️ Timing Breakdown")
+        timings = load_timings(selected_thread)
+        if timings:
+            df = pd.DataFrame(timings).set_index("node")
+            st.bar_chart(df[["seconds", "wait_seconds"]])
+            st.dataframe(df, width="stretch")
+        else:
+            st.caption(f"No spans recorded for this thread in {telemetry.trace_path or 'TRACE_FILE (disabled)'}.")
     else:
         st.write("No data found for this thread.")
 
 st.sidebar.divider()
 if st.sidebar.button("Refresh Dashboard"):
+    load_sessions.clear()
     st.rerun()
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+logger = logging.getLogger("ResearchSuite")
+
+
+class RunExecutor:
+    """Runs graph steps on a background pool so UI scripts never block on a node.
+
+    Commands are queued per `thread_id` and executed in order by at most one
+    worker at a time for that thread; different threads run concurrently.
+    Progress (status, current node, timings, streamed tokens of the running
+    node, last error) is published to an in-process store that the UI polls
+    via `progress()`.
+    """
+
+    def __init__(self, app, max_workers: int = 4):
+        self.app = app
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph-run")
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._active = set()
+        self._progress = {}
+
+    def submit(self, thread_id: str, input: Optional[dict] = None, update: Optional[dict] = None):
+        """Queue a run: `input` starts a thread, `None` resumes it; `update` is applied via `update_state` first."""
+        with self._lock:
+            self._queues.setdefault(thread_id, deque()).append((input, update))
+            progress = self._progress.setdefault(thread_id, {"events": []})
+            progress.update(status="queued", error=None, queued_at=time.time())
+            if thread_id not in self._active:
+                self._active.add(thread_id)
+                self._pool.submit(self._drain, thread_id)
+
+    def is_busy(self, thread_id: str) -> bool:
+        with self._lock:
+            return thread_id in self._active
+
+    def progress(self, thread_id: str) -> dict:
+        with self._lock:
+            progress = dict(self._progress.get(thread_id, {"status": "idle", "events": []}))
+        progress["events"] = list(progress.get("events", []))
+        if progress.get("status") == "running" and progress.get("node_started"):
+            progress["node_elapsed"] = time.time() - progress["node_started"]
+        if progress.get("run_started"):
+            progress["elapsed"] = (progress.get("run_finished") or time.time()) - progress["run_started"]
+        return progress
+
+    def _publish(self, thread_id: str, **fields: Any):
+        with self._lock:
+            self._progress.setdefault(thread_id, {"events": []}).update(fields)
+
+    def _event(self, thread_id: str, event: dict):
+        with self._lock:
+            events = self._progress.setdefault(thread_id, {"events": []})["events"]
+            events.append(event)
+            del events[:-50]
+
+    def _drain(self, thread_id: str):
+        while True:
+            with self._lock:
+                queue = self._queues.get(thread_id)
+                if not queue:
+                    self._active.discard(thread_id)
+                    return
+                input, update = queue.popleft()
+            self._run(thread_id, input, update)
+
+    def _run(self, thread_id: str, input: Optional[dict], update: Optional[dict]):
+        config = {"configurable": {"thread_id": thread_id}}
+        self._publish(thread_id, status="running", node=None, partial="", run_started=time.time(), run_finished=None)
+        try:
+            if update:
+                self.app.update_state(config, update)
+            for mode, payload in self.app.stream(input, config, stream_mode=["tasks", "custom"]):
+                if mode == "custom":
+                    # Token stream from the running node (e.g. the writer's draft)
+                    if "token" in payload:
+                        with self._lock:
+                            self._progress[thread_id]["partial"] += payload["token"]
+                elif "result" in payload or "error" in payload:
+                    started = self.progress(thread_id).get("node_started") or time.time()
+                    self._event(thread_id, {"node": payload["name"], "seconds": round(time.time() - started, 2)})
+                else:
+                    self._publish(thread_id, node=payload["name"], node_started=time.time(), partial="")
+            snapshot = self.app.get_state(config)
+            self._publish(
+                thread_id,
+                status="waiting" if snapshot.next else "done",
+                next=list(snapshot.next),
+                node=None,
+                run_finished=time.time(),
+            )
+        except Exception as e:
+            logger.exception(f"Background run failed for {thread_id}")
+            self._publish(thread_id, status="error", error=str(e), run_finished=time.time())
+            # Drop queued follow-ups; they were issued against the state this run failed to reach
+            with self._lock:
+                self._queues.get(thread_id, deque()).clear()
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import typing
+from typing import List
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, AIMessageChunk
+from pydantic import BaseModel
+
+
+class FakeServiceError(ConnectionError):
+    """Injected (transient) failure from a fake LLM or search client."""
+
+
+def _seeded(seed: int, *parts) -> random.Random:
+    # Output depends only on the request, so concurrent runs stay reproducible
+    digest = hashlib.sha256(repr((seed, parts)).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _words(rng: random.Random, n: int) -> List[str]:
+    return [f"{rng.choice('bcdfghklmnprst')}{rng.choice('aeiou')}{rng.choice('nrstlm')}{rng.randrange(500)}" for _ in range(n)]
+
+
+class _Fake:
+    def __init__(self, latency: float, jitter: float, failure_rate: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+    def _begin(self):
+        delay, fail = self._draw()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise FakeServiceError(f"{type(self).__name__}: injected failure")
+
+    async def _abegin(self):
+        # Same latency, awaited: one event loop can keep many fake calls in flight
+        delay, fail = self._draw()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if fail:
+            raise FakeServiceError(f"{type(self).__name__}: injected failure")
+
+
+class FakeLLM(_Fake):
+    """Deterministic local stand-in for `ChatGroq`.
+
+    Replies are generated from a hash of the prompt. `latency` (plus up to
+    `jitter`) is slept before the first token and `token_latency` between
+    streamed tokens. `failure_rate` of calls raise `FakeServiceError`.
+    Free-text replies contain `sections` markdown headings.
+    Structured output fills the schema's fields. String lists get
+    `plan_questions` items and lists of models up to two. An `approved` flag is true with probability `approve_rate`, so the
+    editor loop takes a realistic number of revisions. A `confidence` field
+    is set to `confidence`, and `invalid_rate` of structured replies fail to
+    parse (`OutputParserException`), as a weaker model's would.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, tokens: int = 200, token_latency: float = 0.0,
+                 failure_rate: float = 0.0, plan_questions: int = 4, approve_rate: float = 0.5, seed: int = 0,
+                 sections: int = 4, confidence: float = 0.9, invalid_rate: float = 0.0, model_name: str = "fake",
+                 schema=None, _parent=None):
+        super().__init__(latency, jitter, failure_rate, seed)
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.plan_questions = plan_questions
+        self.approve_rate = approve_rate
+        self.sections = sections
+        self.confidence = confidence
+        self.invalid_rate = invalid_rate
+        self.model_name = model_name
+        self.schema = schema
+        self._parent = _parent
+
+    def _draw(self):
+        # Structured views share the parent's counters and failure stream
+        if self._parent is not None:
+            return self._parent._draw()
+        return super()._draw()
+
+    def with_structured_output(self, schema, **kwargs):
+        return FakeLLM(self.latency, self.jitter, self.tokens, self.token_latency, self.failure_rate,
+                       self.plan_questions, self.approve_rate, self.seed, self.sections, self.confidence,
+                       self.invalid_rate, self.model_name, schema=schema, _parent=self._parent or self)
+
+    def _prompt(self, messages) -> str:
+        if isinstance(messages, str):
+            return messages
+        return "\n".join(str(getattr(m, "content", m)) for m in messages)
+
+    def _text(self, prompt: str) -> List[str]:
+        rng = _seeded(self.seed, prompt)
+        tokens = [w + " " for w in _words(rng, self.tokens)]
+        # Markdown headings split the reply into `sections` parts, like a real report
+        step = max(1, self.tokens // self.sections) if self.sections else 0
+        for i in range(self.sections - 1, -1, -1) if step else ():
+            tokens.insert(i * step, f"\n\n## Section {i + 1}\n")
+        return tokens
+
+    def _fill(self, schema, rng: random.Random):
+        values = {}
+        for name, field in schema.model_fields.items():
+            annotation = field.annotation
+            item = typing.get_args(annotation)[0] if typing.get_origin(annotation) is list else None
+            if annotation is bool:
+                values[name] = rng.random() < self.approve_rate if name == "approved" else False
+            elif annotation is list or item is str:
+                values[name] = [" ".join(_words(rng, 8)) + "?" for _ in range(self.plan_questions)]
+            elif isinstance(item, type) and issubclass(item, BaseModel):
+                values[name] = [self._fill(item, rng) for _ in range(rng.randrange(3))]
+            elif name == "confidence":
+                values[name] = self.confidence
+            elif annotation is str:
+                values[name] = " ".join(_words(rng, max(1, self.tokens // 10)))
+            elif annotation in (int, float):
+                values[name] = annotation(rng.randrange(10))
+            else:
+                values[name] = field.get_default()
+        return schema(**values)
+
+    def _structured(self, prompt: str):
+        if self.invalid_rate and _seeded(self.seed, "invalid", prompt).random() < self.invalid_rate:
+            raise OutputParserException(f"{self.model_name}: reply did not match {self.schema.__name__}")
+        return self._fill(self.schema, _seeded(self.seed, self.schema.__name__, prompt))
+
+    def _reply(self, messages):
+        prompt = self._prompt(messages)
+        if self.schema is not None:
+            return self._structured(prompt)
+        return AIMessage(content="".join(self._text(prompt)))
+
+    def invoke(self, messages, *args, **kwargs):
+        self._begin()
+        return self._reply(messages)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        await self._abegin()
+        return self._reply(messages)
+
+    def stream(self, messages, *args, **kwargs):
+        self._begin()
+        for token in self._text(self._prompt(messages)):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield AIMessageChunk(content=token)
+
+    async def astream(self, messages, *args, **kwargs):
+        await self._abegin()
+        for token in self._text(self._prompt(messages)):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield AIMessageChunk(content=token)
+
+
+class FakeSearch(_Fake):
+    """Deterministic local stand-in for `TavilySearch`, returning Tavily-shaped results."""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, results: int = 3, words: int = 120,
+                 failure_rate: float = 0.0, seed: int = 0):
+        super().__init__(latency, jitter, failure_rate, seed)
+        self.results = results
+        self.words = words
+
+    def invoke(self, query, *args, **kwargs):
+        self._begin()
+        return self._results(query)
+
+    async def ainvoke(self, query, *args, **kwargs):
+        await self._abegin()
+        return self._results(query)
+
+    def _results(self, query) -> dict:
+        rng = _seeded(self.seed, query)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": " ".join(_words(rng, 5)),
+                    "url": f"https://example.com/{i}/{rng.randrange(10**6)}",
+                    "content": " ".join(_words(rng, self.words)),
+                    "score": round(rng.random(), 3),
+                }
+                for i in range(self.results)
+            ],
+        }
@@ -1,13 +1,27 @@
-import sqlite3
+import logging
+import threading
+from typing import Optional
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.sqlite import SqliteSaver
+import nodes
+from backends import app_config, clients, create
+from checkpointing import CHECKPOINT_DB
+from catalog import SessionCatalog
+from metrics import instrument_node
 from state import AgentState
-from nodes import planner_node, researcher_node, writer_node, editor_node, publisher_node
+from nodes import (planner_node, researcher_node, writer_node, editor_node, publisher_node,
+                   aplanner_node, aresearcher_node, awriter_node, aeditor_node, apublisher_node,
+                   RESEARCH_PREFETCH)
+from runner import GraphRunner
 
 def router_logic(state: AgentState):
     # If max revisions reached, force to publisher
     if state.revision_count >= 3 and not state.approved:
         return "publisher"
+
+    # Successive drafts/critiques stopped changing (see nodes.check_convergence)
+    if state.converged and not state.approved:
+        return "publisher"
     
     # Use the next_node determined by the editor
     return state.next_node or "writer"
@@ -15,12 +29,17 @@ def router_logic(state: AgentState):
 # Define the graph with Pydantic state
 workflow = StateGraph(AgentState)
 
+def node(name: str, fn, afn):
+    # `stream`/`invoke` run the sync function, `astream`/`ainvoke` the async one;
+    # each run is recorded as a span with latency, token and wait totals
+    return RunnableLambda(instrument_node(name, fn), afunc=instrument_node(name, afn), name=name)
+
 # Add nodes
-workflow.add_node("planner", planner_node)
-workflow.add_node("researcher", researcher_node)
-workflow.add_node("writer", writer_node)
-workflow.add_node("editor", editor_node)
-workflow.add_node("publisher", publisher_node)
+workflow.add_node("planner", node("planner", planner_node, aplanner_node))
+workflow.add_node("researcher", node("researcher", researcher_node, aresearcher_node))
+workflow.add_node("writer", node("writer", writer_node, awriter_node))
+workflow.add_node("editor", node("editor", editor_node, aeditor_node))
+workflow.add_node("publisher", node("publisher", publisher_node, apublisher_node))
 
 # Entry point
 workflow.set_entry_point("planner")
@@ -42,12 +61,49 @@ workflow.add_conditional_edges(
     }
 )
 
-# Persistence
-conn = sqlite3.connect("checkpoints.sqlite", check_same_thread=False)
-memory = SqliteSaver(conn)
+def configure_logging(level: int = logging.INFO):
+    """Log format of the CLI, batch, worker and Streamlit entry points."""
+    logging.basicConfig(level=level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Compile with interrupts for HIL (Human-in-the-Loop)
-app = workflow.compile(
-    checkpointer=memory, 
-    interrupt_before=["researcher", "publisher"]
-)
+
+def build_app(config: Optional[dict] = None):
+    """Compile the workflow with the backends in `config` (see `backends.app_config`).
+
+    Nothing is constructed at import time: the checkpointer is created here,
+    the LLM and search clients on first use. Clients are process-wide, so the
+    last app built decides the backends its nodes call.
+    """
+    config = app_config(**(config or {}))
+    clients.configure(config)
+    memory = create("checkpointer", config)
+
+    if hasattr(memory, "listeners"):
+        # Per-thread summary for the dashboard, refreshed on every checkpoint write
+        memory.listeners.append(SessionCatalog(config["checkpoint_db"]).on_checkpoint)
+        # Memoized sub-items of a node run are kept next to the checkpoints and
+        # dropped once its output is checkpointed
+        memory.listeners.append(nodes.progress.on_checkpoint)
+        # Start plan searches as soon as the plan is checkpointed, before it is approved
+        if RESEARCH_PREFETCH:
+            memory.listeners.append(nodes.prefetcher.on_checkpoint)
+
+    # Compile with interrupts for HIL (Human-in-the-Loop)
+    return workflow.compile(checkpointer=memory, interrupt_before=list(config["interrupt_before"]))
+
+
+_default = {}
+_default_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    # `from graph import app` (and `memory`, `catalog`, `runner`) builds the app
+    # configured by the environment on first access, once per process
+    if name not in ("app", "memory", "catalog", "runner"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _default_lock:
+        if not _default:
+            app = build_app()
+            _default.update(app=app, memory=app.checkpointer, catalog=SessionCatalog(CHECKPOINT_DB),
+                            # astream-driven entry point; `runner.stream` / `runner.invoke` are its sync wrappers
+                            runner=GraphRunner(app))
+        return _default[name]
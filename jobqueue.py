@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from checkpointing import CHECKPOINT_DB, connect
+
+# Lease renewed by the worker's heartbeat; a job whose lease runs out is claimed by another worker
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Backoff before a failed job is retried, doubled on every attempt
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+
+# Active = not finished; a thread has at most one active job, so its runs never overlap
+ACTIVE = ("queued", "running", "parked")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id TEXT NOT NULL,
+    command TEXT NOT NULL,
+    input TEXT,
+    state_update TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    next_node TEXT,
+    checkpoint_id TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_thread ON jobs (thread_id)
+    WHERE status IN ('queued', 'running', 'parked');
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, available_at, id);
+"""
+
+COLUMNS = ("id", "thread_id", "command", "input", "state_update", "status", "attempts", "max_attempts",
+           "available_at", "worker", "lease_until", "next_node", "checkpoint_id", "error", "created", "updated")
+
+
+def _row(cur, row) -> Optional[dict]:
+    if row is None:
+        return None
+    job = dict(zip([c[0] for c in cur.description], row))
+    for key in ("input", "state_update"):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+    """Graph runs queued in the checkpoint database, claimed by workers under a lease.
+
+    `enqueue` starts a thread, `resume` continues one. A worker `claim`s the
+    oldest runnable job for `lease` seconds and keeps it with `heartbeat`;
+    a job whose lease expires (the worker died) is claimed again by another
+    worker, which resumes the thread from its last checkpoint. A job that
+    reaches a human-in-the-loop interrupt is `park`ed until `resume` brings
+    the approval (and any `update_state` values), then queued again. The
+    approval covers only the checkpoint the job was parked at (`checkpoint_id`),
+    so a retried job never runs past a later interrupt unapproved.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB, lease: float = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 retry_delay: float = JOB_RETRY_DELAY):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._local = threading.local()
+        self._setup_done = False
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            if not self._setup_done:
+                conn.executescript(SCHEMA)
+                self._setup_done = True
+        return conn
+
+    def _insert(self, thread_id: str, command: str, input: Optional[dict], update: Optional[dict]) -> int:
+        now = time.time()
+        conn = self.conn
+        try:
+            cur = conn.execute(
+                "INSERT INTO jobs (thread_id, command, input, state_update, status, max_attempts, available_at, created, updated) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (str(thread_id), command, json.dumps(input) if input is not None else None,
+                 json.dumps(update) if update else None, self.max_attempts, now, now, now),
+            )
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise ValueError(f"Thread {thread_id} already has an active job") from None
+        conn.commit()
+        return cur.lastrowid
+
+    def enqueue(self, thread_id: str, input: dict) -> int:
+        """Queue a new thread run with graph `input` (e.g. `{"topic": ...}`). Returns the job id."""
+        return self._insert(thread_id, "start", input, None)
+
+    def resume(self, thread_id: str, update: Optional[dict] = None) -> int:
+        """Approve a parked job (applying `update` via `update_state` first), or queue a resume of the thread."""
+        now = time.time()
+        conn = self.conn
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'queued', command = 'resume', state_update = ?, attempts = 0, available_at = ?, "
+            "next_node = NULL, error = NULL, updated = ? WHERE thread_id = ? AND status = 'parked' RETURNING id",
+            (json.dumps(update) if update else None, now, now, str(thread_id)),
+        )
+        row = cur.fetchone()
+        conn.commit()
+        if row:
+            return row[0]
+        return self._insert(thread_id, "resume", None, update)
+
+    def claim(self, worker: str) -> Optional[dict]:
+        """Lease the oldest queued job, or one whose lease expired, to `worker`."""
+        now = time.time()
+        conn = self.conn
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+            "WHERE id = (SELECT id FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+            "OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1) "
+            f"RETURNING {', '.join(COLUMNS)}",
+            (worker, now + self.lease, now, now, now),
+        )
+        job = _row(cur, cur.fetchone())
+        conn.commit()
+        if job and job["attempts"] > job["max_attempts"]:
+            # Every attempt so far died without releasing the job
+            self._finish(job["id"], worker, "failed", error=job["error"] or "lease expired too many times")
+            return self.claim(worker)
+        return job
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Extend the lease; False if the job is no longer held by `worker` (its lease expired and was taken)."""
+        now = time.time()
+        conn = self.conn
+        cur = conn.execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (now + self.lease, now, job_id, worker),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+
+    def approve(self, job_id: int, worker: str, checkpoint_id: str):
+        """Record the checkpoint the job's approval covers; its state update is applied, so drop it."""
+        conn = self.conn
+        conn.execute("UPDATE jobs SET checkpoint_id = ?, state_update = NULL WHERE id = ? AND worker = ?",
+                     (checkpoint_id, job_id, worker))
+        conn.commit()
+
+    def _finish(self, job_id: int, worker: str, status: str, next_node: Optional[str] = None,
+                error: Optional[str] = None, available_at: Optional[float] = None,
+                checkpoint_id: Optional[str] = None, attempts: int = 0) -> bool:
+        now = time.time()
+        conn = self.conn
+        cur = conn.execute(
+            "UPDATE jobs SET status = ?, next_node = ?, error = ?, available_at = COALESCE(?, available_at), "
+            "checkpoint_id = COALESCE(?, checkpoint_id), attempts = attempts + ?, worker = NULL, lease_until = NULL, "
+            "updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (status, next_node, error, available_at, checkpoint_id, attempts, now, job_id, worker),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+
+    def park(self, job_id: int, worker: str, next_node: str, checkpoint_id: str) -> bool:
+        """Hold the job at an interrupt until `resume` approves `checkpoint_id`."""
+        return self._finish(job_id, worker, "parked", next_node=next_node, checkpoint_id=checkpoint_id)
+
+    def complete(self, job_id: int, worker: str) -> bool:
+        return self._finish(job_id, worker, "done")
+
+    def release(self, job_id: int, worker: str) -> bool:
+        """Hand an unfinished job back (worker shutdown) without using up an attempt."""
+        return self._finish(job_id, worker, "queued", attempts=-1)
+
+    def fail(self, job_id: int, worker: str, error: str, attempts: int) -> bool:
+        """Queue the job again after a backoff, or fail it once its attempts are used up."""
+        if attempts < self.max_attempts:
+            delay = self.retry_delay * (2 ** (attempts - 1))
+            return self._finish(job_id, worker, "queued", error=error, available_at=time.time() + delay)
+        return self._finish(job_id, worker, "failed", error=error)
+
+    def get(self, job_id: int) -> Optional[dict]:
+        cur = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        return _row(cur, cur.fetchone())
+
+    def active(self, thread_id: str) -> Optional[dict]:
+        cur = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE thread_id = ? AND status IN ('queued', 'running', 'parked')",
+            (str(thread_id),),
+        )
+        return _row(cur, cur.fetchone())
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        cur = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs {where} ORDER BY id DESC LIMIT ?", (*params, limit))
+        return [_row(cur, row) for row in cur.fetchall()]
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Queue research runs for worker.py")
+    parser.add_argument("--db", default=CHECKPOINT_DB, help="Path to the checkpoint database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    start = commands.add_parser("start", help="Queue a new research thread")
+    start.add_argument("topic")
+    start.add_argument("--thread-id", help="Defaults to a slug of the topic")
+    resume = commands.add_parser("resume", help="Approve a parked thread (or resume a stalled one)")
+    resume.add_argument("thread_id")
+    resume.add_argument("--plan", help="Replace the plan before resuming; questions separated by ';'")
+    status = commands.add_parser("status", help="List jobs")
+    status.add_argument("--status", choices=[*ACTIVE, "done", "failed"])
+    args = parser.parse_args(argv)
+
+    jobs = JobQueue(args.db)
+    if args.command in ("start", "resume"):
+        try:
+            if args.command == "start":
+                from batch import batch_thread_id
+                thread_id = args.thread_id or batch_thread_id(args.topic)
+                job_id = jobs.enqueue(thread_id, {"topic": args.topic})
+            else:
+                thread_id = args.thread_id
+                update = {"plan": [q.strip() for q in args.plan.split(";") if q.strip()]} if args.plan else None
+                job_id = jobs.resume(thread_id, update)
+        except ValueError as e:
+            # e.g. the thread already has a queued or running job
+            sys.exit(f"error: {e}")
+        print(f"Queued job {job_id} for {thread_id}")
+    else:
+        for job in jobs.list(args.status):
+            detail = f" at {job['next_node']}" if job["next_node"] else ""
+            error = f" ({job['error']})" if job["error"] else ""
+            print(f"{job['id']:>6} {job['thread_id']:<40} {job['status']}{detail} attempts={job['attempts']}{error}")
+        print(jobs.counts())
+
+
+if __name__ == "__main__":
+    main()
@@ -6,24 +6,54 @@ from dotenv import load_dotenv
 # Load env vars before importing app
 load_dotenv()
 
-from graph import app
+from graph import app, configure_logging, runner
 from state import AgentState
 
+configure_logging()
 # Silence noisy libraries
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
+def run_graph(input, config):
+    """Advance the graph until the next interrupt, echoing streamed tokens (e.g. the draft) as they arrive."""
+    current = None
+    for event in runner.stream(input, config, stream_mode="custom"):
+        if "token" not in event:
+            continue
+        if event["node"] != current:
+            current = event["node"]
+            print(f"\n✍️  {current}:\n")
+        print(event["token"], end="", flush=True)
+    if current:
+        print()
+
 def run_suite(topic: str):
     thread_id = f"prod_{topic.replace(' ', '_')[:10]}"
     config = {"configurable": {"thread_id": thread_id}}
-    
+    try:
+        drive_session(topic, config)
+    except Exception as e:
+        # Every finished step is checkpointed, so the session can pick up where it failed
+        failed = app.get_state(config).next
+        step = f" in {failed[0]}" if failed else ""
+        print(f"\n❌ Run failed{step}: {type(e).__name__}: {e}")
+        print(f"Progress is saved. Run again with the topic '{topic}' to resume this session.")
+        return
+
+    final = app.get_state(config).values
+    if final.get("report_path"):
+        print(f"\n✅ SUCCESS: Report generated at {final['report_path']}")
+    else:
+        print("\n⚠️ Session ended without publication.")
+
+def drive_session(topic: str, config: dict):
+    """Start or resume the session, asking for approval at each interrupt."""
     # Check for existing state
     current_state = app.get_state(config)
     
     if not current_state.values:
         print(f"\n🌟 Initializing new research session: {topic}")
         # Start initial run
-        for event in app.stream({"topic": topic}, config, stream_mode="values"):
-            pass
+        run_graph({"topic": topic}, config)
     else:
         print(f"\n🔄 Resuming existing session for: {topic}")
 
@@ -45,11 +75,11 @@ def run_suite(topic: str):
             ans = input("\nApprove plan? (y/n) or edit questions (e): ").lower()
             if ans == 'y':
                 print("Proceeding...")
-                for event in app.stream(None, config, stream_mode="values"): pass
+                run_graph(None, config)
             elif ans == 'e':
                 new_q = input("Enter questions (sep by ;): ").split(";")
                 app.update_state(config, {"plan": [q.strip() for q in new_q if q.strip()]})
-                for event in app.stream(None, config, stream_mode="values"): pass
+                run_graph(None, config)
             else:
                 print("Session paused.")
                 break
@@ -61,20 +91,14 @@ def run_suite(topic: str):
             
             ans = input("\nPublish report? (y/n): ").lower()
             if ans == 'y':
-                for event in app.stream(None, config, stream_mode="values"): pass
+                run_graph(None, config)
             else:
                 print("Publication cancelled.")
                 break
         
         else:
             # For other nodes (writer, editor), just continue
-            for event in app.stream(None, config, stream_mode="values"): pass
-
-    final = app.get_state(config).values
-    if final.get("report_path"):
-        print(f"\n✅ SUCCESS: Report generated at {final['report_path']}")
-    else:
-        print("\n⚠️ Session ended without publication.")
+            run_graph(None, config)
 
 if __name__ == "__main__":
     if not os.getenv("GROQ_API_KEY"):
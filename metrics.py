@@ -0,0 +1,468 @@
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from langgraph.config import get_config
+
+logger = logging.getLogger("ResearchSuite")
+
+# Seconds; shared by node and call latency histograms
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Numeric call attributes rolled up into the enclosing node span
+ROLLUP = ("wait_seconds", "retries", "prompt_tokens", "completion_tokens", "request_bytes", "response_bytes",
+          "escalations", "saved_seconds", "wasted_seconds")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, kind: str, name: str, node: Optional[str], thread_id: Optional[str], parent: Optional["Span"]):
+        self.kind = kind
+        self.name = name
+        self.node = node
+        self.thread_id = thread_id
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self.end = None
+        self.outcome = "ok"
+        self.error = None
+        self.attributes: Dict[str, Any] = {}
+
+    def annotate(self, **attributes):
+        for key, value in attributes.items():
+            if key == "outcome":
+                self.outcome = value
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.attributes[key] = self.attributes.get(key, 0) + value
+            else:
+                self.attributes[key] = value
+
+    def fail(self, error: BaseException):
+        if isinstance(error, GeneratorExit):
+            # Consumer stopped reading a stream early
+            self.outcome = "cancelled"
+        else:
+            self.outcome, self.error = "error", f"{type(error).__name__}: {error}"
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_otel(self) -> dict:
+        # One trace per graph thread, so every run of a session lines up in a trace viewer
+        trace_source = self.thread_id or self.span_id
+        return {
+            "traceId": hashlib.sha256(str(trace_source).encode("utf-8")).hexdigest()[:32],
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else None,
+            "name": f"{self.kind} {self.name}",
+            "kind": "CLIENT" if self.kind in ("llm", "search") else "INTERNAL",
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int((self.end or self.start) * 1e9),
+            "attributes": {"thread_id": self.thread_id, "node": self.node, "outcome": self.outcome, **self.attributes},
+            "status": {"code": "ERROR", "message": self.error} if self.outcome == "error" else {"code": "OK"},
+        }
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+def _run_context() -> tuple:
+    """(thread_id, node) of the graph run making the call; (None, "qa") outside a run."""
+    try:
+        config = get_config()
+    except RuntimeError:
+        return None, "qa"
+    return config.get("configurable", {}).get("thread_id"), config.get("metadata", {}).get("langgraph_node") or "qa"
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+class Telemetry:
+    """In-process metrics registry and span exporter.
+
+    Every node run and every LLM/search call is a `Span`. Finished spans
+    update Prometheus-style counters and histograms (labelled by kind, node
+    and outcome, never by thread) and are appended to `trace_path` as one
+    OpenTelemetry-style JSON object per line. An empty `trace_path` disables
+    the file export. Once the file reaches `max_bytes` it is renamed to
+    `<trace_path>.1` (replacing the previous one) and a new file is started.
+    """
+
+    def __init__(self, trace_path: Optional[str] = None, max_bytes: int = 0):
+        self.trace_path = trace_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._durations: Dict[tuple, Histogram] = {}
+        self._counters: Dict[tuple, float] = {}
+
+    def begin(self, kind: str, name: str, node: Optional[str] = None, thread_id: Optional[str] = None) -> Span:
+        """Open a span under the current one without making it current (see `span`)."""
+        parent = _current_span.get()
+        if parent is not None:
+            run_thread, parent_node = parent.thread_id, parent.node
+        else:
+            run_thread, parent_node = _run_context()
+        return Span(kind, name, node or parent_node, thread_id or run_thread, parent)
+
+    @contextmanager
+    def span(self, kind: str, name: str, node: Optional[str] = None, thread_id: Optional[str] = None):
+        span = self.begin(kind, name, node, thread_id)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.finish(span)
+
+    def finish(self, span: Span):
+        span.end = time.time()
+        with self._lock:
+            key = (span.kind, span.node, span.name, span.outcome)
+            self._durations.setdefault(key, Histogram()).observe(span.duration)
+            for attr in ROLLUP:
+                value = span.attributes.get(attr)
+                # Node spans only carry their calls' rolled-up totals; count those once, at the call
+                if not value or span.kind == "node":
+                    continue
+                counter = (attr, span.kind, span.node)
+                self._counters[counter] = self._counters.get(counter, 0) + value
+                if span.parent is not None:
+                    span.parent.attributes[attr] = span.parent.attributes.get(attr, 0) + value
+        self.export(span)
+
+    def export(self, span: Span):
+        if not self.trace_path:
+            return
+        line = json.dumps(span.to_otel(), default=str) + "\n"
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.trace_path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._file.close()
+                    self._file = None
+                    os.replace(self.trace_path, self.trace_path + ".1")
+        except OSError as e:
+            logger.warning(f"Span export to {self.trace_path} failed: {e}")
+
+    def prometheus(self) -> str:
+        """Current metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP research_span_duration_seconds Wall time of graph nodes and LLM/search calls.",
+            "# TYPE research_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            durations = sorted(self._durations.items())
+            counters = sorted(self._counters.items())
+        for (kind, node, name, outcome), hist in durations:
+            labels = _labels(kind=kind, node=node, name=name, outcome=outcome)
+            for bound, count in zip(BUCKETS, hist.counts):
+                lines.append(f'research_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'research_span_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.total}')
+            lines.append(f"research_span_duration_seconds_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"research_span_duration_seconds_count{{{labels}}} {hist.total}")
+        seen = set()
+        for (attr, kind, node), value in counters:
+            metric = f"research_{attr}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{{{_labels(kind=kind, node=node)}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def annotate(**attributes):
+    """Add to the current span's attributes; numbers accumulate (e.g. several waits or retries)."""
+    span = _current_span.get()
+    if span is not None:
+        span.annotate(**attributes)
+
+
+def instrument_node(name: str, fn, registry: Optional[Telemetry] = None):
+    """Wrap a graph node (sync or async) so each run is recorded as a span; keeps the node's `config` parameter."""
+    takes_config = "config" in inspect.signature(fn).parameters
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(state, config):
+            with (registry or telemetry).span("node", name, node=name):
+                return await (fn(state, config) if takes_config else fn(state))
+    else:
+        @functools.wraps(fn)
+        def wrapper(state, config):
+            with (registry or telemetry).span("node", name, node=name):
+                return fn(state, config) if takes_config else fn(state)
+
+    # functools.wraps copies the original signature; LangGraph must see `config`
+    del wrapper.__wrapped__
+    return wrapper
+
+
+def _size(payload) -> int:
+    if isinstance(payload, (list, tuple)):
+        return sum(_size(p) for p in payload)
+    if hasattr(payload, "model_dump_json"):
+        return len(payload.model_dump_json())
+    return len(str(getattr(payload, "content", payload)))
+
+
+class Instrumented:
+    """Records a span per `invoke` / `stream` (or `ainvoke` / `astream`) of an LLM or search client.
+
+    Wrappers underneath (`Throttled`, `CachedLLM`) add rate-limit waits,
+    retries and cache outcomes to the span via `annotate`.
+    """
+
+    def __init__(self, client, kind: str, registry: Optional[Telemetry] = None):
+        self.client = client
+        self.kind = kind
+        self.registry = registry
+
+    @property
+    def _registry(self) -> Telemetry:
+        return self.registry or telemetry
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def with_structured_output(self, *args, **kwargs):
+        return Instrumented(self.client.with_structured_output(*args, **kwargs), self.kind, self.registry)
+
+    def _record_usage(self, span: Span, payload, response):
+        from ratelimit import estimate_tokens
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        attrs = {"request_bytes": _size(payload), "response_bytes": _size(response)}
+        if self.kind == "llm":
+            attrs["prompt_tokens"] = usage.get("input_tokens") or estimate_tokens(payload)
+            attrs["completion_tokens"] = usage.get("output_tokens") or attrs["response_bytes"] // 4 + 1
+        span.annotate(**attrs)
+
+    def invoke(self, payload, *args, **kwargs):
+        with self._registry.span(self.kind, "invoke") as span:
+            response = self.client.invoke(payload, *args, **kwargs)
+            self._record_usage(span, payload, response)
+            return response
+
+    async def ainvoke(self, payload, *args, **kwargs):
+        with self._registry.span(self.kind, "invoke") as span:
+            response = await self.client.ainvoke(payload, *args, **kwargs)
+            self._record_usage(span, payload, response)
+            return response
+
+    def stream(self, payload, *args, **kwargs):
+        # The span is only current while the wrapped stream runs, never across our own
+        # yields; otherwise the consumer's code would execute inside it.
+        registry = self._registry
+        span = registry.begin(self.kind, "stream")
+        try:
+            chunks = iter(self.client.stream(payload, *args, **kwargs))
+            full = None
+            while True:
+                token = _current_span.set(span)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    _current_span.reset(token)
+                if full is None:
+                    span.attributes["first_token_seconds"] = round(time.time() - span.start, 4)
+                full = chunk if full is None else full + chunk
+                yield chunk
+            self._record_usage(span, payload, full if full is not None else "")
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            registry.finish(span)
+
+    async def astream(self, payload, *args, **kwargs):
+        registry = self._registry
+        span = registry.begin(self.kind, "stream")
+        try:
+            chunks = self.client.astream(payload, *args, **kwargs).__aiter__()
+            full = None
+            while True:
+                token = _current_span.set(span)
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_span.reset(token)
+                if full is None:
+                    span.attributes["first_token_seconds"] = round(time.time() - span.start, 4)
+                full = chunk if full is None else full + chunk
+                yield chunk
+            self._record_usage(span, payload, full if full is not None else "")
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            registry.finish(span)
+
+
+class SpanIndex:
+    """Byte offsets of each thread's lines in a span file.
+
+    `refresh` parses only what was appended since the last call, so the
+    dashboard does not re-read the whole file on every rerun. A rotated or
+    truncated file is indexed again from the start.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inode = None
+        self.offset = 0
+        self.threads: Dict[Any, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        stat = os.stat(self.path)
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode, self.offset, self.threads = stat.st_ino, 0, {}
+        if stat.st_size == self.offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written; picked up on the next refresh
+                    break
+                try:
+                    thread_id = json.loads(line)["attributes"].get("thread_id")
+                except (ValueError, KeyError):
+                    thread_id = None
+                self.threads.setdefault(thread_id, []).append(self.offset)
+                self.offset += len(line)
+
+    def read(self, thread_id: Any, limit: int) -> List[dict]:
+        with self._lock:
+            self.refresh()
+            offsets = self.threads.get(thread_id, [])[-limit:]
+        spans = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                spans.append(json.loads(f.readline()))
+        return spans
+
+
+_span_indexes: Dict[str, SpanIndex] = {}
+_span_indexes_lock = threading.Lock()
+
+
+def read_spans(path: str, thread_id: Optional[str] = None, limit: int = 5000) -> List[dict]:
+    """Exported spans, optionally for one thread (newest `limit`)."""
+    if not path or not os.path.exists(path):
+        return []
+    if thread_id is None:
+        with open(path, encoding="utf-8") as f:
+            lines = deque(f, maxlen=limit)
+        return [json.loads(line) for line in lines if line.endswith("\n")]
+    with _span_indexes_lock:
+        index = _span_indexes.setdefault(os.path.abspath(path), SpanIndex(path))
+    return index.read(thread_id, limit)
+
+
+def thread_breakdown(spans: List[dict]) -> List[dict]:
+    """Per-node totals for one thread: runs, wall time, waits, tokens, model escalations and failures."""
+    rows = {}
+    for span in spans:
+        attrs = span["attributes"]
+        node = attrs.get("node") or "?"
+        row = rows.setdefault(node, {"node": node, "runs": 0, "seconds": 0.0, "llm_calls": 0, "search_calls": 0,
+                                     "wait_seconds": 0.0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                     "escalations": 0, "saved_seconds": 0.0, "wasted_seconds": 0.0,
+                                     "errors": 0})
+        seconds = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+        kind = span["name"].split(" ", 1)[0]
+        if kind == "node":
+            row["runs"] += 1
+            row["seconds"] = round(row["seconds"] + seconds, 3)
+            for attr in ("wait_seconds", "retries", "prompt_tokens", "completion_tokens",
+                         "escalations", "saved_seconds", "wasted_seconds"):
+                row[attr] = round(row[attr] + attrs.get(attr, 0), 3)
+        else:
+            row[f"{kind}_calls"] = row.get(f"{kind}_calls", 0) + 1
+        row["errors"] += attrs.get("outcome") == "error"
+    return sorted(rows.values(), key=lambda r: -r["seconds"])
+
+
+def start_metrics_server(port: int, registry: Optional[Telemetry] = None, host: Optional[str] = None) -> ThreadingHTTPServer:
+    """Serve `/metrics` in Prometheus text format from a daemon thread.
+
+    Binds to localhost unless `host` (or `METRICS_HOST`, e.g. `0.0.0.0`) opts in to another interface.
+    """
+    registry = registry or telemetry
+    host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on {host}:{port}/metrics")
+    return server
+
+
+# Shared by every node and client in the process
+# Span export is off unless TRACE_FILE is set; the file rotates at TRACE_MAX_BYTES
+telemetry = Telemetry(trace_path=os.getenv("TRACE_FILE", ""),
+                      max_bytes=int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024))))
@@ -1,57 +1,344 @@
+import asyncio
+import contextvars
 import os
 import logging
 import requests
-import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional
 from pydantic import BaseModel, Field
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_tavily import TavilySearch
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 from state import AgentState
+from backends import Lazy
+from metrics import annotate, telemetry
+from checkpointing import CHECKPOINT_DB
+from prefetch import SearchPrefetcher
+from retry import RetryError, RetryPolicy
+from retrieval import pack_context, get_report_index, publish_report_index
+from similarity import MinHash, minhash, text_similarity
+from search_results import ResultDeduper, format_entry, parse_results
+from sections import split_sections, join_sections, section_heading, section_hash, outline, splice, batch_by_chars
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("ResearchSuite")
 
-# Initialize the LLM
-llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0)
-search = TavilySearch(max_results=3)
+# LLM and search clients, created on first use from the backends chosen by
+# `graph.build_app` (see backends.py); tests patch these names directly
+llm = Lazy("llm")
+search = Lazy("search")
+# Finished searches and LLM calls of node runs not yet checkpointed, so a resumed node skips them
+# (the checkpointer listener that clears them is attached in graph.py)
+progress = Lazy("progress")
+# Published reports, stored by content hash and indexed per thread and version
+reports = Lazy("reports")
+
+# Research fan-out settings
+RESEARCH_MAX_QUESTIONS = 4
+RESEARCH_MAX_CONCURRENCY = int(os.getenv("RESEARCH_MAX_CONCURRENCY", "4"))
+RESEARCH_TIMEOUT = float(os.getenv("RESEARCH_TIMEOUT", "30"))
+
+# Per-question share of research_data, and how similar two results may be before one is dropped
+RESEARCH_RESULT_CHARS = int(os.getenv("RESEARCH_RESULT_CHARS", "1500"))
+RESEARCH_DUP_SIMILARITY = float(os.getenv("RESEARCH_DUP_SIMILARITY", "0.8"))
+
+# Speculative plan searches while the plan awaits approval (attached in graph.py)
+RESEARCH_PREFETCH = os.getenv("RESEARCH_PREFETCH", "0") == "1"
+RESEARCH_PREFETCH_TTL = float(os.getenv("RESEARCH_PREFETCH_TTL", "900"))
+
+# Upper bound on research context tokens in the writer prompt
+WRITER_CONTEXT_TOKENS = int(os.getenv("WRITER_CONTEXT_TOKENS", "3000"))
+# Smaller budget when only one flagged section is rewritten
+WRITER_SECTION_CONTEXT_TOKENS = int(os.getenv("WRITER_SECTION_CONTEXT_TOKENS", "1200"))
+# Draft characters per editor call; longer reviews are split across calls instead of truncated
+EDITOR_REVIEW_CHARS = int(os.getenv("EDITOR_REVIEW_CHARS", "12000"))
+
+# Per-thread Q&A retrieval index, stored alongside the checkpoint database
+QA_INDEX_DIR = os.getenv("QA_INDEX_DIR", os.path.join(os.path.dirname(CHECKPOINT_DB), "qa_indexes"))
+QA_TOP_K = int(os.getenv("QA_TOP_K", "4"))
+
+# Revision loop stops once successive drafts are this similar, or the editor repeats itself
+CONVERGENCE_DRAFT_SIMILARITY = float(os.getenv("CONVERGENCE_DRAFT_SIMILARITY", "0.95"))
+CONVERGENCE_CRITIQUE_SIMILARITY = float(os.getenv("CONVERGENCE_CRITIQUE_SIMILARITY", "0.8"))
+
+# Transient failures of a single search or LLM call are retried before they count as failed
+retry_policy = RetryPolicy(
+    max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("RETRY_BASE_DELAY", "1.0")),
+    max_delay=float(os.getenv("RETRY_MAX_DELAY", "30")),
+    jitter=float(os.getenv("RETRY_JITTER", "0.5")),
+)
 
 # Structured Output Models
 class ResearchPlan(BaseModel):
     questions: List[str] = Field(..., description="List of 3-4 specific technical research questions.")
 
+    def acceptable(self) -> bool:
+        # Checked before a small-model plan is kept (see ModelRouter)
+        return len({q.strip().lower() for q in self.questions if q.strip()}) >= 3
+
+class SectionFeedback(BaseModel):
+    index: int = Field(..., description="The [index] of a section under review that must change.")
+    feedback: str = Field(..., description="Concrete changes required in that section.")
+
 class EditorFeedback(BaseModel):
     approved: bool = Field(..., description="Whether the draft is ready for publication.")
     feedback: str = Field(..., description="A short summary of required changes or 'APPROVED'.")
     research_needed: bool = Field(default=False, description="Whether more research is required.")
+    sections: List[SectionFeedback] = Field(default_factory=list, description="Per-section changes, only for sections under review that need them.")
+    confidence: float = Field(default=1.0, description="How confident you are in this verdict, from 0 to 1.")
 
-def planner_node(state: AgentState):
-    logger.info("Starting planning phase")
-    planner_llm = llm.with_structured_output(ResearchPlan)
+    def acceptable(self) -> bool:
+        # A rejection must say what to change
+        return self.approved or bool(self.feedback.strip() or self.sections)
+
+def _stream_writer():
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (e.g. Q&A from the UI)
+        return None
+
+def _stream_llm(messages, node: str, on_token=None) -> str:
+    """Stream an LLM reply, forwarding each token to the graph's custom stream (and `on_token`).
+
+    Transient failures are retried only until the first chunk arrives, so no token is emitted twice.
+    """
+    emit = _stream_writer()
+    content = ""
+    for chunk in retry_policy.stream(llm.stream, messages):
+        token = chunk.content
+        if not token:
+            continue
+        content += token
+        if emit:
+            emit({"node": node, "token": token})
+        if on_token:
+            on_token(token)
+    return content
+
+async def _astream_llm(messages, node: str, on_token=None) -> str:
+    emit = _stream_writer()
+    content = ""
+    async for chunk in retry_policy.astream(llm.astream, messages):
+        token = chunk.content
+        if not token:
+            continue
+        content += token
+        if emit:
+            emit({"node": node, "token": token})
+        if on_token:
+            on_token(token)
+    return content
+
+def _planner_messages(state: AgentState):
     prompt = f"Create a targeted research plan for: {state.topic}. Focus on core architecture and essential mathematical derivations. Aim for high information density."
-    response = planner_llm.invoke([
+    return [
         SystemMessage(content="You are a senior research strategist specializing in concise yet deep technical analysis."),
         HumanMessage(content=prompt)
-    ])
+    ]
+
+def planner_node(state: AgentState):
+    logger.info("Starting planning phase")
+    planner_llm = llm.with_structured_output(ResearchPlan)
+    response = retry_policy.call(planner_llm.invoke, _planner_messages(state))
     return {"plan": response.questions}
 
-def researcher_node(state: AgentState):
-    logger.info("Starting research phase")
-    results = []
-    for question in state.plan[:4]: 
-        logger.info(f"Researching: {question}")
+async def aplanner_node(state: AgentState):
+    logger.info("Starting planning phase")
+    planner_llm = llm.with_structured_output(ResearchPlan)
+    response = await retry_policy.acall(planner_llm.ainvoke, _planner_messages(state))
+    return {"plan": response.questions}
+
+def _prefetch_search(question: str, thread_id: str):
+    # Runs on the prefetch pool, outside any graph run
+    with telemetry.span("prefetch", "search", node="prefetch", thread_id=thread_id):
+        return search.invoke(question)
+
+prefetcher = SearchPrefetcher(_prefetch_search, max_workers=RESEARCH_MAX_CONCURRENCY, ttl=RESEARCH_PREFETCH_TTL)
+
+def _research_question(question: str, thread_id: Optional[str] = None):
+    staged = prefetcher.take(thread_id, question) if thread_id else None
+    if staged is not None:
         try:
-            search_results = search.invoke(question)
-            results.append(f"Q: {question}\nA: {str(search_results)[:1500]}") 
+            search_results = staged.result(timeout=RESEARCH_TIMEOUT)
+            logger.info(f"Using prefetched results: {question}")
+            annotate(prefetched=1)
+            return search_results
         except Exception as e:
-            logger.error(f"Search failed for {question}: {e}")
-    
-    return {"research_data": results}
+            logger.warning(f"Prefetched search failed for {question}, searching again: {e}")
+    logger.info(f"Researching: {question}")
+    return retry_policy.call(search.invoke, question)
 
-def writer_node(state: AgentState):
-    logger.info(f"Writing draft (Revision {state.revision_count + 1})")
-    data_context = "\n\n".join(state.research_data)
+async def _aresearch_question(question: str, thread_id: Optional[str] = None):
+    staged = prefetcher.take(thread_id, question) if thread_id else None
+    if staged is not None:
+        try:
+            search_results = await asyncio.wrap_future(staged)
+            logger.info(f"Using prefetched results: {question}")
+            annotate(prefetched=1)
+            return search_results
+        except Exception as e:
+            logger.warning(f"Prefetched search failed for {question}, searching again: {e}")
+    logger.info(f"Researching: {question}")
+    return await retry_policy.acall(search.ainvoke, question)
+
+def _failure(node: str, item: str, error: Exception) -> dict:
+    """Entry for `state.failures`: a sub-item that still failed after retries."""
+    return {"node": node, "item": item, "error": str(error) or type(error).__name__,
+            "attempts": error.attempts if isinstance(error, RetryError) else 1}
+
+def researcher_node(state: AgentState, config: Optional[RunnableConfig] = None):
+    logger.info("Starting research phase")
+    thread_id = (config or {}).get("configurable", {}).get("thread_id")
+    questions = state.plan[:RESEARCH_MAX_QUESTIONS]
+    if not questions:
+        return {"research_data": []}
+
+    # One search per question, bounded by RESEARCH_MAX_CONCURRENCY; results are
+    # collected in plan order so the writer sees a stable context.
+    raw_results, failures = [], []
+    # Searches finished before an interruption are reused when this step is resumed
+    done = progress.scope("researcher", config)
+    pool = ThreadPoolExecutor(max_workers=max(1, min(RESEARCH_MAX_CONCURRENCY, len(questions))))
+    try:
+        # copy_context keeps each search attached to this node's span
+        futures = [
+            (question, pool.submit(contextvars.copy_context().run, done.memo, f"search:{question}",
+                                   lambda q=question: _research_question(q, thread_id)))
+            for question in questions
+        ]
+        for question, future in futures:
+            try:
+                raw_results.append((question, future.result(timeout=RESEARCH_TIMEOUT)))
+            except FutureTimeoutError:
+                logger.error(f"Search timed out after {RESEARCH_TIMEOUT}s for {question}")
+                failures.append(_failure("researcher", question, TimeoutError(f"timed out after {RESEARCH_TIMEOUT}s")))
+            except Exception as e:
+                logger.error(f"Search failed for {question}: {e}")
+                failures.append(_failure("researcher", question, e))
+    finally:
+        # Don't let a hung search hold the node open past its timeout
+        pool.shutdown(wait=False, cancel_futures=True)
+        if thread_id:
+            # Speculation for questions edited out of the plan is no longer needed
+            prefetcher.discard(thread_id)
+
+    return _research_update(state, raw_results, failures)
+
+async def aresearcher_node(state: AgentState, config: Optional[RunnableConfig] = None):
+    logger.info("Starting research phase")
+    thread_id = (config or {}).get("configurable", {}).get("thread_id")
+    questions = state.plan[:RESEARCH_MAX_QUESTIONS]
+    if not questions:
+        return {"research_data": []}
+
+    done = progress.scope("researcher", config)
+    limit = asyncio.Semaphore(max(1, RESEARCH_MAX_CONCURRENCY))
+
+    async def research(question: str):
+        async with limit:
+            return await asyncio.wait_for(
+                done.amemo(f"search:{question}", lambda: _aresearch_question(question, thread_id)), RESEARCH_TIMEOUT)
+
+    try:
+        outcomes = await asyncio.gather(*(research(q) for q in questions), return_exceptions=True)
+    finally:
+        if thread_id:
+            prefetcher.discard(thread_id)
+
+    raw_results, failures = [], []
+    for question, outcome in zip(questions, outcomes):
+        if isinstance(outcome, TimeoutError):
+            logger.error(f"Search timed out after {RESEARCH_TIMEOUT}s for {question}")
+            failures.append(_failure("researcher", question, TimeoutError(f"timed out after {RESEARCH_TIMEOUT}s")))
+        elif isinstance(outcome, Exception):
+            logger.error(f"Search failed for {question}: {outcome}")
+            failures.append(_failure("researcher", question, outcome))
+        else:
+            raw_results.append((question, outcome))
+    return _research_update(state, raw_results, failures)
+
+def _research_update(state: AgentState, raw_results, failures: List[dict]) -> dict:
+    # Parse into records and drop sources already used by an earlier question or research loop
+    deduper = ResultDeduper(RESEARCH_DUP_SIMILARITY).seed(state.research_data)
+    results = []
+    for question, raw in raw_results:
+        entry = format_entry(question, parse_results(raw), RESEARCH_RESULT_CHARS, deduper)
+        if entry is None:
+            logger.info(f"All results for {question} were duplicates")
+            continue
+        results.append(entry)
+    logger.info(f"Research: {len(results)} entries, {deduper.dropped} duplicate results dropped, {len(failures)} searches failed")
+    return {"research_data": results, "failures": failures}
+
+def _fix_latex(content: str) -> str:
+    # Post-processing to fix common LaTeX delimiter mistakes
+    content = content.replace(r"\[", "$$").replace(r"\]", "$$")
+    return content.replace(r"\(", "$").replace(r"\)", "$")
+
+def _packed_context(state: AgentState, query: str, budget: int) -> str:
+    data_context, pack_stats = pack_context(state.research_data, query, budget)
+    logger.info(
+        f"Packed research context: {pack_stats['selected']}/{pack_stats['chunks']} chunks, "
+        f"{pack_stats['tokens_used']} tokens used, {pack_stats['tokens_dropped']} dropped, "
+        f"{pack_stats['duplicates']} duplicates removed"
+    )
+    return data_context
+
+def _section_messages(state: AgentState, sections: List[str], item: dict):
+    index = item["index"]
+    data_context = _packed_context(state, " ".join([state.topic, section_heading(sections[index]), item["feedback"]]),
+                                   WRITER_SECTION_CONTEXT_TOKENS)
+    prompt = r"""
+    Topic: """ + state.topic + r"""
+    Report outline:
+    """ + outline(sections, [index], "to rewrite") + r"""
+    Research Context: """ + data_context + r"""
+
+    TASK: Rewrite ONLY section [""" + str(index) + r"""] of the report, addressing the editor's feedback: """ + item["feedback"] + r"""
+    Keep its heading line and its place in the outline. Return the section only, nothing else.
+    Math MUST use $$ formula $$ for blocks and $ symbol $ inline; never \[ \] or \( \).
+
+    CURRENT SECTION:
+    """ + sections[index]
+    return [
+        SystemMessage(content="You are a world-class technical author. You strictly follow formatting rules for math."),
+        HumanMessage(content=prompt)
+    ]
+
+def _revise_sections(state: AgentState) -> str:
+    """Rewrite only the sections the editor flagged and splice them back into the draft."""
+    sections = split_sections(state.draft)
+    # Sections rewritten before an interruption are reused when this step is resumed
+    done = progress.scope("writer")
+    for item in state.section_feedback:
+        index = item["index"]
+        if index >= len(sections):
+            continue
+        logger.info(f"Revising section {index}: {section_heading(sections[index])}")
+        messages = _section_messages(state, sections, item)
+        content = done.memo(f"section:{index}:{section_hash(sections[index])}",
+                            lambda: _stream_llm(messages, "writer"))
+        sections = splice(sections, index, _fix_latex(content))
+    return join_sections(sections)
+
+async def _arevise_sections(state: AgentState) -> str:
+    sections = split_sections(state.draft)
+    done = progress.scope("writer")
+    for item in state.section_feedback:
+        index = item["index"]
+        if index >= len(sections):
+            continue
+        logger.info(f"Revising section {index}: {section_heading(sections[index])}")
+        messages = _section_messages(state, sections, item)
+        content = await done.amemo(f"section:{index}:{section_hash(sections[index])}",
+                                   lambda: _astream_llm(messages, "writer"))
+        sections = splice(sections, index, _fix_latex(content))
+    return join_sections(sections)
+
+def _writer_messages(state: AgentState):
+    query = " ".join([state.topic, *state.plan, state.critique])
+    data_context = _packed_context(state, query, WRITER_CONTEXT_TOKENS)
     
     prompt = r"""
     Topic: """ + state.topic + r"""
@@ -70,71 +357,183 @@ def writer_node(state: AgentState):
     - Provide deep mathematical derivations for all core concepts.
     - Address any previous critique: """ + state.critique + r"""
     """
-    response = llm.invoke([
+    return [
         SystemMessage(content="You are a world-class technical author. You strictly follow formatting rules for math."),
         HumanMessage(content=prompt)
-    ])
-    
-    content = response.content
-    
-    # Post-processing to fix common LaTeX delimiter mistakes
-    content = content.replace(r"\[", "$$").replace(r"\]", "$$")
-    content = content.replace(r"\(", "$").replace(r"\)", "$")
-    
+    ]
+
+def writer_node(state: AgentState):
+    logger.info(f"Writing draft (Revision {state.revision_count + 1})")
+    if state.draft and state.section_feedback:
+        draft = _revise_sections(state)
+    else:
+        draft = _fix_latex(_stream_llm(_writer_messages(state), "writer"))
     return {
-        "draft": content,
-        "revision_count": state.revision_count + 1
+        "draft": draft,
+        "revision_count": state.revision_count + 1,
+        "section_feedback": [],
     }
 
-def editor_node(state: AgentState):
-    logger.info("Editing draft - waiting 5s to avoid rate limits")
-    time.sleep(5)
-    
-    try:
-        editor_llm = llm.with_structured_output(EditorFeedback)
-        prompt = f"Critically review this draft for topic '{state.topic}'. Ensure it has math ($$). Be concise.\n\nDraft: {state.draft[:4000]}"
-        response = editor_llm.invoke([
+async def awriter_node(state: AgentState):
+    logger.info(f"Writing draft (Revision {state.revision_count + 1})")
+    if state.draft and state.section_feedback:
+        draft = await _arevise_sections(state)
+    else:
+        draft = _fix_latex(await _astream_llm(_writer_messages(state), "writer"))
+    return {
+        "draft": draft,
+        "revision_count": state.revision_count + 1,
+        "section_feedback": [],
+    }
+
+def check_convergence(state: AgentState, critique: str, approved: bool, next_node: str) -> dict:
+    """Compare this review with the previous one and decide whether another revision is worth it."""
+    signature = minhash.text_signature(state.draft)
+    decision = {"revision": state.revision_count, "draft_similarity": None, "critique_similarity": None,
+                "feedback_repeated": False, "converged": False, "route": next_node}
+    if state.draft_signature and state.critique:
+        decision["draft_similarity"] = round(MinHash.similarity(signature, state.draft_signature), 3)
+        decision["critique_similarity"] = round(text_similarity(critique, state.critique, k=3), 3)
+        decision["feedback_repeated"] = decision["critique_similarity"] >= CONVERGENCE_CRITIQUE_SIMILARITY
+        stalled = decision["draft_similarity"] >= CONVERGENCE_DRAFT_SIMILARITY or decision["feedback_repeated"]
+        # Only cut writer loops; approval and research requests route as the editor asked
+        if stalled and not approved and next_node == "writer":
+            decision.update(converged=True, route="publisher")
+            logger.info(f"Revisions converged (draft similarity {decision['draft_similarity']}, "
+                        f"critique similarity {decision['critique_similarity']}); publishing")
+    return {
+        "draft_signature": signature,
+        "converged": decision["converged"],
+        "convergence_log": state.convergence_log + [decision],
+    }
+
+def _editor_prompts(state: AgentState):
+    """Split the draft and build one review prompt per batch of sections changed since the last review."""
+    sections = split_sections(state.draft)
+    reviewed = set(state.reviewed_sections)
+    # Only sections changed since the last review are sent in full; the rest appear in the outline
+    pending = [i for i, section in enumerate(sections) if section_hash(section) not in reviewed] or list(range(len(sections)))
+    prompts = []
+    for batch in batch_by_chars(pending, sections, EDITOR_REVIEW_CHARS) or [[]]:
+        body = "\n\n".join(f"[{i}]\n{sections[i]}" for i in batch)
+        prompt = (
+            f"Critically review this draft for topic '{state.topic}'. Ensure it has math ($$). Be concise.\n\n"
+            f"Outline of the full report (untagged sections were already reviewed):\n{outline(sections, batch)}\n\n"
+            f"Sections under review:\n{body}\n\n"
+            "List feedback per section (by [index]) only for sections under review that must change."
+        )
+        prompts.append(("review:" + section_hash(prompt), [
             SystemMessage(content="You are a meticulous editor-in-chief. Use concise feedback."),
             HumanMessage(content=prompt)
-        ])
-    except Exception as e:
-        logger.error(f"Structured output failed: {e}")
-        return {
-            "approved": False,
-            "critique": "Draft needs more depth and mathematical rigor.",
-            "next_node": "writer"
-        }
-    
+        ]))
+    return sections, pending, prompts
+
+def editor_node(state: AgentState):
+    logger.info("Editing draft")
+    sections, pending, prompts = _editor_prompts(state)
+    # Batches reviewed before an interruption are reused when this step is resumed. A batch that
+    # still fails after retries fails the step instead of producing a made-up critique.
+    done = progress.scope("editor")
+    editor_llm = llm.with_structured_output(EditorFeedback)
+    responses = [
+        done.memo(key, lambda: retry_policy.call(editor_llm.invoke, messages),
+                  dump=lambda r: r.model_dump(), load=EditorFeedback.model_validate)
+        for key, messages in prompts
+    ]
+    return _editor_update(state, sections, pending, responses)
+
+async def aeditor_node(state: AgentState):
+    logger.info("Editing draft")
+    sections, pending, prompts = _editor_prompts(state)
+    done = progress.scope("editor")
+    editor_llm = llm.with_structured_output(EditorFeedback)
+
+    async def review(key, messages):
+        return await done.amemo(key, lambda: retry_policy.acall(editor_llm.ainvoke, messages),
+                                dump=lambda r: r.model_dump(), load=EditorFeedback.model_validate)
+
+    # Batches are reviewed concurrently; every finished one is memoized before a failure is raised
+    responses = await asyncio.gather(*(review(key, messages) for key, messages in prompts), return_exceptions=True)
+    for response in responses:
+        if isinstance(response, BaseException):
+            raise response
+    return _editor_update(state, sections, pending, responses)
+
+def _editor_update(state: AgentState, sections: List[str], pending: List[int], responses) -> dict:
+    flagged = {}
+    for response in responses:
+        for item in getattr(response, "sections", None) or []:
+            if 0 <= item.index < len(sections) and item.index in pending:
+                flagged.setdefault(item.index, []).append(item.feedback)
+    approved = all(r.approved for r in responses) and not flagged
+    research_needed = any(r.research_needed for r in responses)
+    section_feedback = [
+        {"index": i, "heading": section_heading(sections[i]), "feedback": " ".join(feedback)}
+        for i, feedback in sorted(flagged.items())
+    ]
+    critique = " ".join(r.feedback for r in responses)
+    if section_feedback:
+        critique += "\n" + "\n".join(f"- {f['heading']}: {f['feedback']}" for f in section_feedback)
+    logger.info(f"Reviewed {len(pending)}/{len(sections)} sections, {len(section_feedback)} flagged")
+    next_node = "researcher" if research_needed else "writer" if not approved else "publisher"
     return {
-        "approved": response.approved,
-        "critique": response.feedback,
-        "next_node": "researcher" if response.research_needed else "writer" if not response.approved else "publisher"
+        "approved": approved,
+        "critique": critique,
+        "section_feedback": section_feedback,
+        "reviewed_sections": [section_hash(s) for i, s in enumerate(sections) if i not in flagged],
+        "next_node": next_node,
+        **check_convergence(state, critique, approved, next_node),
     }
 
-def qa_node(state: AgentState, user_question: str):
-    logger.info(f"Answering user question: {user_question}")
+def qa_context(thread_id: Optional[str], report: str, research_data: List[str], user_question: str) -> str:
+    """Top-k report/research chunks for a question, from the thread's persisted index."""
+    if not thread_id:
+        return report
+    index = get_report_index(QA_INDEX_DIR, thread_id, report, research_data)
+    return "\n\n---\n\n".join(index.search(user_question, QA_TOP_K)) or report[:2000]
+
+def _qa_messages(state: AgentState, context: str, user_question: str):
     prompt = f"""
     You are a technical expert on the topic: {state.topic}.
-    Research Context: {state.draft}
+    Research Context: {context}
     USER QUESTION: {user_question}
     """
-    response = llm.invoke([
+    return [
         SystemMessage(content="Analyse the context and answer the user question politely. If off-topic, decline."),
         HumanMessage(content=prompt)
-    ])
+    ]
+
+def qa_node(state: AgentState, user_question: str, thread_id: Optional[str] = None, on_token=None):
+    logger.info(f"Answering user question: {user_question}")
+    context = qa_context(thread_id, state.draft, state.research_data, user_question)
+    answer = _stream_llm(_qa_messages(state, context, user_question), "qa", on_token)
     
-    new_history = state.chat_history + [{"role": "user", "content": user_question}, {"role": "assistant", "content": response.content}]
+    new_history = state.chat_history + [{"role": "user", "content": user_question}, {"role": "assistant", "content": answer}]
     return {"chat_history": new_history}
 
-def publisher_node(state: AgentState):
+async def aqa_node(state: AgentState, user_question: str, thread_id: Optional[str] = None, on_token=None):
+    logger.info(f"Answering user question: {user_question}")
+    # Loading or building the index reads files; keep it off the event loop
+    context = await asyncio.to_thread(qa_context, thread_id, state.draft, state.research_data, user_question)
+    answer = await _astream_llm(_qa_messages(state, context, user_question), "qa", on_token)
+    new_history = state.chat_history + [{"role": "user", "content": user_question}, {"role": "assistant", "content": answer}]
+    return {"chat_history": new_history}
+
+def publisher_node(state: AgentState, config: RunnableConfig):
     logger.info("Publishing report")
-    filename = f"report_{state.topic.lower().replace(' ', '_')}.md"
-    filename = "".join([c for c in filename if c.isalnum() or c in ("_", ".")]).strip()
-    
     try:
-        with open(filename, "w") as f:
-            f.write(state.draft)
-        return {"report_path": filename, "approved": True}
+        report = reports.put(config["configurable"]["thread_id"], state.topic, state.draft)
     except Exception as e:
         logger.error(f"Failed to save report: {e}")
         return {"approved": False}
+
+    try:
+        publish_report_index(QA_INDEX_DIR, config["configurable"]["thread_id"], state.draft, state.research_data)
+    except Exception as e:
+        # Q&A falls back to building the index lazily on the first question
+        logger.warning(f"Failed to build Q&A index: {e}")
+    return {"report_path": report["path"], "report_hash": report["hash"], "approved": True}
+
+async def apublisher_node(state: AgentState, config: RunnableConfig):
+    # File writes and index building are blocking; run them on a worker thread
+    return await asyncio.to_thread(publisher_node, state, config)
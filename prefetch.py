@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from cache import normalize_query
+from catalog import pending_nodes
+
+logger = logging.getLogger("ResearchSuite")
+
+
+class SearchPrefetcher:
+    """Speculatively runs plan searches while the plan waits for human approval.
+
+    Attached as a checkpointer listener: once a checkpoint is pending on
+    `researcher`, every question of its plan is searched in the background
+    and the future is staged under (thread_id, normalized question).
+    `researcher_node` then `take`s staged results for unchanged questions and
+    searches only edited or new ones, and calls `discard` when done. Staged
+    entries older than `ttl` seconds (abandoned plans) are cancelled and dropped
+    on the next `stage`, `take` or checkpoint, and by a timer while any are
+    staged, so an idle process does not hold on to them.
+    """
+
+    def __init__(self, search_fn: Callable[[str, str], object], max_workers: int = 4, ttl: float = 900.0,
+                 trigger: str = "researcher"):
+        self.search_fn = search_fn
+        self.ttl = ttl
+        self.trigger = trigger
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._staged: Dict[Tuple[str, str], Tuple[Future, float]] = {}
+        self._timer: Optional[threading.Timer] = None
+        self.stats = {"staged": 0, "used": 0, "discarded": 0, "expired": 0}
+
+    def on_checkpoint(self, config, checkpoint, metadata):
+        """Checkpointer listener: stage searches for a plan that is waiting on `researcher`."""
+        if config["configurable"].get("checkpoint_ns"):
+            return
+        self.gc()
+        values = checkpoint["channel_values"]
+        if self.trigger in pending_nodes(values) and values.get("plan"):
+            self.stage(config["configurable"]["thread_id"], values["plan"])
+
+    def stage(self, thread_id: str, questions: Iterable[str]):
+        self.gc()
+        now = time.time()
+        with self._lock:
+            for question in questions:
+                key = (str(thread_id), normalize_query(question))
+                if key in self._staged:
+                    continue
+                self._staged[key] = (self._pool.submit(self.search_fn, question, thread_id), now)
+                self.stats["staged"] += 1
+                logger.info(f"Prefetching search for {thread_id}: {question}")
+            self._schedule_gc()
+
+    def take(self, thread_id: str, question: str) -> Optional[Future]:
+        """Claim the staged search for a question, if there is one."""
+        self.gc()
+        with self._lock:
+            entry = self._staged.pop((str(thread_id), normalize_query(question)), None)
+            if entry is not None:
+                self.stats["used"] += 1
+        return entry[0] if entry else None
+
+    def discard(self, thread_id: str) -> int:
+        """Cancel and drop a thread's remaining speculation (e.g. questions edited out of the plan)."""
+        with self._lock:
+            keys = [k for k in self._staged if k[0] == str(thread_id)]
+            for key in keys:
+                self._staged.pop(key)[0].cancel()
+            self.stats["discarded"] += len(keys)
+        return len(keys)
+
+    def gc(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            keys = [k for k, (_, created) in self._staged.items() if created < cutoff]
+            for key in keys:
+                self._staged.pop(key)[0].cancel()
+            self.stats["expired"] += len(keys)
+        return len(keys)
+
+    def _schedule_gc(self):
+        # Called with the lock held; one timer at a time, none once nothing is staged
+        if self._timer is None and self._staged:
+            self._timer = threading.Timer(self.ttl / 2, self._sweep)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _sweep(self):
+        self.gc()
+        with self._lock:
+            self._timer = None
+            self._schedule_gc()
+
+    def pending(self, thread_id: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(1 for k in self._staged if thread_id is None or k[0] == str(thread_id))
+
+    def shutdown(self):
+        with self._lock:
+            for future, _ in self._staged.values():
+                future.cancel()
+            self._staged.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from langgraph.config import get_config
+
+from checkpointing import CHECKPOINT_DB, connect
+from metrics import annotate
+
+logger = logging.getLogger("ResearchSuite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS node_progress (
+    thread_id TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    node TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_id, node, key)
+);
+"""
+
+
+class ProgressStore:
+    """Finished sub-items (searches, LLM calls) of node runs that are not checkpointed yet.
+
+    Entries are keyed on the thread and the checkpoint the node started
+    from, which is the same when a crashed or interrupted node is resumed,
+    so the rerun skips the items it already finished. Once a newer
+    checkpoint is written (`on_checkpoint`, attached as a checkpointer
+    listener) the node's own output is saved and its entries are dropped.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB):
+        self.path = path
+        self._local = threading.local()
+        self._setup_done = False
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            if not self._setup_done:
+                conn.executescript(SCHEMA)
+                self._setup_done = True
+        return conn
+
+    def scope(self, node: str, config: Optional[dict] = None) -> "NodeProgress":
+        """Progress of `node` in the current graph run; a no-op scope outside a run."""
+        if config is None:
+            try:
+                config = get_config()
+            except RuntimeError:
+                config = {}
+        configurable = (config or {}).get("configurable", {})
+        thread_id = configurable.get("thread_id")
+        checkpoint_id = (configurable.get("checkpoint_map") or {}).get("")
+        if thread_id is None or checkpoint_id is None:
+            return NodeProgress(None, None, None, node)
+        return NodeProgress(self, str(thread_id), checkpoint_id, node)
+
+    def get(self, thread_id: str, checkpoint_id: str, node: str, key: str) -> Optional[Any]:
+        row = self.conn.execute(
+            "SELECT value FROM node_progress WHERE thread_id = ? AND checkpoint_id = ? AND node = ? AND key = ?",
+            (thread_id, checkpoint_id, node, key),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, thread_id: str, checkpoint_id: str, node: str, key: str, value: Any):
+        conn = self.conn
+        conn.execute(
+            "INSERT OR REPLACE INTO node_progress (thread_id, checkpoint_id, node, key, value, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_id, node, key, json.dumps(value), time.time()),
+        )
+        conn.commit()
+
+    def count(self, thread_id: Optional[str] = None) -> int:
+        if thread_id is None:
+            return self.conn.execute("SELECT COUNT(*) FROM node_progress").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM node_progress WHERE thread_id = ?", (str(thread_id),)).fetchone()[0]
+
+    def on_checkpoint(self, config, checkpoint, metadata):
+        """Checkpointer listener: drop entries of node runs whose output is now checkpointed."""
+        if config["configurable"].get("checkpoint_ns"):
+            return
+        conn = self.conn
+        conn.execute(
+            "DELETE FROM node_progress WHERE thread_id = ? AND checkpoint_id != ?",
+            (str(config["configurable"]["thread_id"]), checkpoint["id"]),
+        )
+        conn.commit()
+
+
+class NoProgress:
+    """A progress store that keeps nothing; resumed node runs start over (checkpointers without listeners)."""
+
+    def scope(self, node: str, config: Optional[dict] = None) -> "NodeProgress":
+        return NodeProgress(None, None, None, node)
+
+    def count(self, thread_id: Optional[str] = None) -> int:
+        return 0
+
+    def on_checkpoint(self, config, checkpoint, metadata):
+        pass
+
+
+class NodeProgress:
+    """One node run's view of a `ProgressStore`. Values must be JSON-serialisable."""
+
+    def __init__(self, store: Optional[ProgressStore], thread_id: Optional[str], checkpoint_id: Optional[str], node: str):
+        self.store = store
+        self.thread_id = thread_id
+        self.checkpoint_id = checkpoint_id
+        self.node = node
+
+    def _load(self, key: str) -> Optional[Any]:
+        try:
+            saved = self.store.get(self.thread_id, self.checkpoint_id, self.node, key)
+        except Exception as e:
+            logger.warning(f"Reading progress for {self.node} failed: {e}")
+            return None
+        if saved is not None:
+            annotate(resumed=1)
+        return saved
+
+    def _save(self, key: str, value: Any):
+        try:
+            self.store.put(self.thread_id, self.checkpoint_id, self.node, key, value)
+        except Exception as e:
+            logger.warning(f"Saving progress for {self.node} failed: {e}")
+
+    def memo(self, key: str, fn: Callable[[], Any], dump: Optional[Callable] = None, load: Optional[Callable] = None) -> Any:
+        """`fn()`, or the value it returned when this node run was interrupted earlier.
+
+        `dump` / `load` convert values that are not JSON-serialisable (e.g. Pydantic models).
+        """
+        if self.store is None:
+            return fn()
+        saved = self._load(key)
+        if saved is not None:
+            return load(saved) if load else saved
+        value = fn()
+        self._save(key, dump(value) if dump else value)
+        return value
+
+    async def amemo(self, key: str, fn: Callable[[], Awaitable[Any]], dump: Optional[Callable] = None,
+                    load: Optional[Callable] = None) -> Any:
+        """`memo` for a coroutine function; the store is read and written on a worker thread."""
+        if self.store is None:
+            return await fn()
+        saved = await asyncio.to_thread(self._load, key)
+        if saved is not None:
+            return load(saved) if load else saved
+        value = await fn()
+        await asyncio.to_thread(self._save, key, dump(value) if dump else value)
+        return value
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+from metrics import annotate
+
+logger = logging.getLogger("ResearchSuite")
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` units, refilled continuously at `rate` units/s."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the bucket are clamped so they can still proceed once full
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def drain(self):
+        self.level = 0.0
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_RATE_LIMIT_MESSAGE = re.compile(r"\b429\b.*(too many requests|rate limit)|(too many requests|rate limit).*\b429\b",
+                                 re.IGNORECASE | re.DOTALL)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429
+    # Provider SDKs (groq, openai, ...) raise a `RateLimitError`; otherwise the message must name both
+    if any(cls.__name__ == "RateLimitError" for cls in type(error).__mro__):
+        return True
+    return bool(_RATE_LIMIT_MESSAGE.search(str(error)))
+
+
+class RateLimiter:
+    """Process-wide limiter over requests/min and tokens/min.
+
+    `acquire` only sleeps when a bucket is actually empty. `call` additionally
+    retries rate-limit errors with jittered exponential backoff, honouring any
+    `retry-after` header and pausing every other caller of the same limiter.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Take one request (and `tokens` tokens) if available; otherwise the seconds to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            wait = max(self.requests.wait_time(1), self.blocked_until - now)
+            if self.tokens is not None and tokens:
+                self.tokens.refill(now)
+                wait = max(wait, self.tokens.wait_time(tokens))
+            if wait <= 0:
+                self.requests.consume(1)
+                if self.tokens is not None and tokens:
+                    self.tokens.consume(tokens)
+            return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request (and `tokens` tokens) may proceed. Returns seconds waited."""
+        waited = 0.0
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """`acquire` for async callers: waits on the event loop instead of blocking a thread."""
+        waited = 0.0
+        while (wait := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    def penalize(self, delay: float):
+        """Pause all callers for `delay` seconds and empty the buckets after a 429."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.requests.drain()
+            if self.tokens is not None:
+                self.tokens.drain()
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to back off before retrying a rate-limited call, or None to give up."""
+        if not is_rate_limit_error(error) or attempt >= self.max_retries:
+            return None
+        delay = max(_retry_after(error) or 0.0, self.backoff(attempt))
+        logger.warning(f"Rate limited, backing off {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        self.penalize(delay)
+        annotate(retries=1)
+        return delay
+
+    def call(self, fn, *args, tokens: int = 0, **kwargs):
+        attempt = 0
+        while True:
+            annotate(wait_seconds=self.acquire(tokens))
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if self._retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+
+    async def acall(self, fn, *args, tokens: int = 0, **kwargs):
+        """`call` for a coroutine function."""
+        attempt = 0
+        while True:
+            annotate(wait_seconds=await self.aacquire(tokens))
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if self._retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+
+    def stream(self, fn, *args, tokens: int = 0, **kwargs):
+        """`call` for a streaming `fn`: rate limits raised before the first chunk are retried.
+
+        Once a chunk has been yielded the caller has seen output, so later errors propagate.
+        """
+        attempt = 0
+        while True:
+            annotate(wait_seconds=self.acquire(tokens))
+            try:
+                chunks = iter(fn(*args, **kwargs))
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                if self._retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+                continue
+            yield first
+            yield from chunks
+            return
+
+    async def astream(self, fn, *args, tokens: int = 0, **kwargs):
+        """`stream` for an async iterator `fn`."""
+        attempt = 0
+        while True:
+            annotate(wait_seconds=await self.aacquire(tokens))
+            try:
+                chunks = fn(*args, **kwargs).__aiter__()
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                if self._retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+                continue
+            yield first
+            async for chunk in chunks:
+                yield chunk
+            return
+
+
+def estimate_tokens(payload) -> int:
+    """Rough prompt size (~4 characters per token) used to charge the token bucket."""
+    if isinstance(payload, (list, tuple)):
+        return sum(estimate_tokens(p) for p in payload)
+    content = getattr(payload, "content", payload)
+    return len(str(content)) // 4 + 1
+
+
+class Throttled:
+    """Routes `invoke` / `stream` of a client through a shared `RateLimiter`.
+
+    `with_structured_output` returns a throttled wrapper around the structured
+    runnable, so the limiter covers every call path of a chat model.
+    """
+
+    def __init__(self, client, limiter: RateLimiter):
+        self.client = client
+        self.limiter = limiter
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def with_structured_output(self, *args, **kwargs):
+        return Throttled(self.client.with_structured_output(*args, **kwargs), self.limiter)
+
+    def invoke(self, payload, *args, **kwargs):
+        return self.limiter.call(self.client.invoke, payload, *args, tokens=estimate_tokens(payload), **kwargs)
+
+    def stream(self, payload, *args, **kwargs):
+        yield from self.limiter.stream(self.client.stream, payload, *args, tokens=estimate_tokens(payload), **kwargs)
+
+    async def ainvoke(self, payload, *args, **kwargs):
+        return await self.limiter.acall(self.client.ainvoke, payload, *args, tokens=estimate_tokens(payload), **kwargs)
+
+    async def astream(self, payload, *args, **kwargs):
+        async for chunk in self.limiter.astream(self.client.astream, payload, *args, tokens=estimate_tokens(payload), **kwargs):
+            yield chunk
+
+
+# Shared by every node and session in the process
+llm_limiter = RateLimiter(
+    requests_per_minute=float(os.getenv("LLM_RPM", "30")),
+    tokens_per_minute=float(os.getenv("LLM_TPM", "8000")),
+    max_retries=int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5")),
+)
+# Groq limits each model separately
+small_llm_limiter = RateLimiter(
+    requests_per_minute=float(os.getenv("LLM_SMALL_RPM", "30")),
+    tokens_per_minute=float(os.getenv("LLM_SMALL_TPM", "8000")),
+    max_retries=int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5")),
+)
+search_limiter = RateLimiter(
+    requests_per_minute=float(os.getenv("SEARCH_RPM", "100")),
+    max_retries=int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5")),
+)
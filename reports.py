@@ -0,0 +1,240 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+from checkpointing import CHECKPOINT_DB, connect
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("ResearchSuite")
+
+REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(os.path.dirname(CHECKPOINT_DB), "reports"))
+REPORT_COMPRESS = os.getenv("REPORT_COMPRESS", "0") == "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    thread_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    topic TEXT,
+    hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (thread_id, version)
+);
+CREATE INDEX IF NOT EXISTS idx_reports_topic ON reports (topic, created DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_hash ON reports (hash);
+"""
+
+COLUMNS = ("thread_id", "version", "topic", "hash", "path", "bytes", "created")
+
+_IMAGE_RE = re.compile(r"!\[(.*?)\]\((.*?)\)")
+
+
+def parse_segments(markdown: str) -> List[dict]:
+    """Split a report into markdown text and image segments, in order (what the UI renders)."""
+    segments = []
+    position = 0
+    for match in _IMAGE_RE.finditer(markdown):
+        if match.start() > position:
+            segments.append({"type": "markdown", "text": markdown[position:match.start()]})
+        caption, path = match.groups()
+        segments.append({"type": "image", "caption": caption, "path": path.strip()})
+        position = match.end()
+    if position < len(markdown):
+        segments.append({"type": "markdown", "text": markdown[position:]})
+    return segments
+
+
+@lru_cache(maxsize=1024)
+def _existing_image(path: str) -> str:
+    # Raising keeps misses out of the cache
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return os.path.abspath(path)
+
+
+def resolve_image(path: str) -> Optional[str]:
+    """Absolute path of a local report image, or None if it does not exist (yet).
+
+    Found images are remembered for the process; a missing one is checked again on every call.
+    """
+    try:
+        return _existing_image(path)
+    except FileNotFoundError:
+        return None
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ReportStore:
+    """Published reports, stored once per content hash and indexed by thread, topic and version.
+
+    Each report is written atomically to `objects/<hash[:2]>/<hash>.md`
+    (`.md.zst` / `.md.gz` when compressed) next to its pre-parsed segment list,
+    so identical drafts share one file and readers never see a partial write.
+    The `reports` table in the checkpoint database maps every
+    `(thread_id, version)` to its hash; publishing the same content again
+    (e.g. a retried publisher) does not add a version. With `db=None` the
+    table is kept in memory (apps on the in-memory checkpointer).
+    """
+
+    def __init__(self, root: str = REPORTS_DIR, db: Optional[str] = CHECKPOINT_DB, compress: bool = REPORT_COMPRESS):
+        self.root = root
+        self.db = db
+        self.compress = compress
+        self._local = threading.local()
+        self._memory = None
+        # The in-memory connection is shared by all threads; other processes are kept apart by BEGIN IMMEDIATE
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self):
+        if self.db is None:
+            with self._lock:
+                if self._memory is None:
+                    self._memory = sqlite3.connect(":memory:", check_same_thread=False)
+                    self._memory.executescript(SCHEMA)
+                return self._memory
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Every connection ensures the schema: the file may be new to this thread (e.g. a relative path)
+            conn = self._local.conn = connect(self.db)
+            conn.executescript(SCHEMA)
+        return conn
+
+    def _object(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + suffix)
+
+    def _find(self, digest: str) -> Optional[str]:
+        for suffix in (".md", ".md.zst", ".md.gz"):
+            path = self._object(digest, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _write(self, digest: str, markdown: str) -> str:
+        data = markdown.encode("utf-8")
+        if not self.compress:
+            path, payload = self._object(digest, ".md"), data
+        elif zstandard is not None:
+            path, payload = self._object(digest, ".md.zst"), zstandard.ZstdCompressor(level=3).compress(data)
+        else:
+            path, payload = self._object(digest, ".md.gz"), gzip.compress(data, 6)
+        # Segments first: a report file on disk always has its parse next to it
+        _atomic_write(self._object(digest, ".segments.json"), json.dumps(parse_segments(markdown)).encode("utf-8"))
+        _atomic_write(path, payload)
+        return path
+
+    def put(self, thread_id: str, topic: str, markdown: str) -> dict:
+        """Store `markdown` as the thread's newest version (unless it already is). Returns its index row."""
+        digest = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+        # Content files are idempotent, so they are written outside the index transaction
+        path = self._find(digest) or self._write(digest, markdown)
+        with self._lock:
+            conn = self.conn
+            # BEGIN IMMEDIATE takes the write lock before reading the latest version,
+            # so concurrent publishes of one thread cannot pick the same version number
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self._select(conn, "WHERE thread_id = ? ORDER BY version DESC LIMIT 1", (str(thread_id),))
+                if latest and latest[0]["hash"] == digest:
+                    conn.rollback()
+                    return latest[0]
+                row = {"thread_id": str(thread_id), "version": (latest[0]["version"] if latest else 0) + 1,
+                       "topic": topic, "hash": digest, "path": path, "bytes": os.path.getsize(path),
+                       "created": time.time()}
+                conn.execute(f"INSERT INTO reports ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                             tuple(row[c] for c in COLUMNS))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return row
+
+    def read(self, digest: str) -> str:
+        path = self._find(digest)
+        if path is None:
+            raise KeyError(f"No report with hash {digest}")
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise ValueError("Report is zstd-compressed but 'zstandard' is not installed")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        elif path.endswith(".gz"):
+            data = gzip.decompress(data)
+        return data.decode("utf-8")
+
+    def segments(self, digest: str) -> List[dict]:
+        """The segment list saved at publish time (parsed again only if it is missing)."""
+        try:
+            with open(self._object(digest, ".segments.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return parse_segments(self.read(digest))
+
+    @staticmethod
+    def _select(conn, where: str, params: tuple) -> List[dict]:
+        cur = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM reports {where}", params)
+        return [dict(zip(COLUMNS, row)) for row in cur.fetchall()]
+
+    def _rows(self, where: str, params: tuple) -> List[dict]:
+        with self._lock:
+            return self._select(self.conn, where, params)
+
+    def latest(self, thread_id: str) -> Optional[dict]:
+        rows = self._rows("WHERE thread_id = ? ORDER BY version DESC LIMIT 1", (str(thread_id),))
+        return rows[0] if rows else None
+
+    def versions(self, thread_id: str) -> List[dict]:
+        return self._rows("WHERE thread_id = ? ORDER BY version", (str(thread_id),))
+
+    def by_topic(self, topic: str, limit: int = 20) -> List[dict]:
+        return self._rows("WHERE topic = ? ORDER BY created DESC LIMIT ?", (topic, limit))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Published report index")
+    parser.add_argument("--db", default=CHECKPOINT_DB, help="Path to the checkpoint database")
+    parser.add_argument("--root", default=REPORTS_DIR, help="Report store directory")
+    parser.add_argument("--thread", help="List the versions of one thread")
+    parser.add_argument("--topic", help="List reports on a topic")
+    args = parser.parse_args(argv)
+
+    store = ReportStore(args.root, args.db)
+    if args.thread:
+        rows = store.versions(args.thread)
+    elif args.topic:
+        rows = store.by_topic(args.topic)
+    else:
+        rows = store._rows("ORDER BY created DESC LIMIT 20", ())
+    for row in rows:
+        print(f"{row['thread_id']:<40} v{row['version']:<3} {row['hash'][:12]} {row['bytes']:>8} B  {row['path']}")
+
+
+if __name__ == "__main__":
+    main()
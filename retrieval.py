@@ -0,0 +1,263 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ratelimit import estimate_tokens
+from sections import split_sections
+
+logger = logging.getLogger("ResearchSuite")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def chunk_text(text: str, max_chars: int = 800) -> List[str]:
+    """Split on paragraph, then sentence boundaries into pieces of at most ~max_chars."""
+    chunks = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            chunks.append(paragraph)
+            continue
+        current = ""
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = ""
+            # Hard-wrap sentences that are longer than a chunk on their own
+            while len(sentence) > max_chars:
+                chunks.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            current = f"{current} {sentence}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, scored with NumPy.
+
+    Term weights are kept as posting lists in compressed sparse column form
+    (`indptr`, `doc_ids`, `values`: the postings of term `t` are
+    `[indptr[t]:indptr[t + 1]]`), so memory grows with the number of
+    (document, term) pairs rather than documents x vocabulary.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        doc_ids, term_ids, freqs, lengths = [], [], [], []
+        for i, document in enumerate(documents):
+            tf = {}
+            for t in tokenize(document):
+                term = self.vocab.setdefault(t, len(self.vocab))
+                tf[term] = tf.get(term, 0) + 1
+            doc_ids.extend([i] * len(tf))
+            term_ids.extend(tf)
+            freqs.extend(tf.values())
+            lengths.append(sum(tf.values()))
+
+        # Group the (document, term) pairs by term
+        term_ids = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self.doc_ids = np.array(doc_ids, dtype=np.int32)[order]
+        df = np.bincount(term_ids, minlength=len(self.vocab))
+        self.indptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+
+        lengths = np.array(lengths, dtype=np.float32)
+        avg_len = lengths.mean() if len(documents) else 0.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / (avg_len or 1.0))
+        # Precompute the per-term BM25 weights so a query only sums the postings of its terms
+        freqs = np.array(freqs, dtype=np.float32)[order]
+        self.values = ((freqs * (self.k1 + 1)) / (freqs + norm[self.doc_ids])).astype(np.float32)
+        self.idf = np.log(1 + (len(documents) - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    @classmethod
+    def from_arrays(cls, documents: List[str], terms: List[str], indptr: np.ndarray, doc_ids: np.ndarray,
+                    values: np.ndarray, idf: np.ndarray):
+        index = cls.__new__(cls)
+        index.documents = documents
+        index.vocab = {t: i for i, t in enumerate(terms)}
+        index.indptr = indptr
+        index.doc_ids = doc_ids
+        index.values = values
+        index.idf = idf
+        return index
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for t in {self.vocab[t] for t in tokenize(query) if t in self.vocab}:
+            start, end = self.indptr[t], self.indptr[t + 1]
+            # A document appears at most once in a term's postings, so plain fancy-index addition is safe
+            scores[self.doc_ids[start:end]] += self.values[start:end] * self.idf[t]
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Tuple[int, float]]:
+        scores = self.scores(query)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(int(i), float(scores[i])) for i in order]
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1(" ".join(tokenize(text)).encode("utf-8")).hexdigest()
+
+
+def pack_context(corpus: List[str], query: str, token_budget: int, max_chars: int = 800) -> Tuple[str, dict]:
+    """Select the most relevant, de-duplicated chunks of `corpus` that fit in `token_budget`.
+
+    Research entries of the form "Q: ...\\nA: ..." keep their question line on
+    every chunk. Selected chunks are emitted in their original order.
+    """
+    chunks, seen, duplicates = [], set(), 0
+    for entry in corpus:
+        header, body = "", entry
+        if entry.startswith("Q: ") and "\n" in entry:
+            header, body = entry.split("\n", 1)
+        for piece in chunk_text(body, max_chars):
+            fingerprint = _fingerprint(piece)
+            if fingerprint in seen:
+                duplicates += 1
+                continue
+            seen.add(fingerprint)
+            chunks.append(f"{header}\n{piece}" if header else piece)
+
+    total_tokens = sum(estimate_tokens(c) for c in chunks)
+    selected, used = [], 0
+    if chunks:
+        for i, _ in BM25Index(chunks).top_k(query, len(chunks)):
+            cost = estimate_tokens(chunks[i])
+            if used + cost > token_budget:
+                continue
+            selected.append(i)
+            used += cost
+
+    stats = {
+        "chunks": len(chunks),
+        "selected": len(selected),
+        "duplicates": duplicates,
+        "tokens_used": used,
+        "tokens_dropped": total_tokens - used,
+    }
+    return "\n\n".join(chunks[i] for i in sorted(selected)), stats
+
+
+def chunk_markdown(text: str, max_chars: int = 1200) -> List[str]:
+    """Split a markdown report into heading-delimited sections, each chunk prefixed by its heading."""
+    chunks = []
+    for section in split_sections(text, level=6):
+        heading, _, body = section.partition("\n")
+        if not heading.startswith("#"):
+            heading, body = "", section
+        for piece in chunk_text(body, max_chars) or [""]:
+            chunks.append(f"{heading}\n{piece}".strip())
+    return [c for c in chunks if c]
+
+
+class ReportIndex:
+    """Retrieval index over a published report and its research notes, persisted as .npz."""
+
+    def __init__(self, index: BM25Index):
+        self.index = index
+
+    @classmethod
+    def build(cls, report: str, research_data: List[str]) -> "ReportIndex":
+        chunks = chunk_markdown(report)
+        for entry in research_data:
+            chunks.extend(chunk_text(entry))
+        return cls(BM25Index(chunks))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        terms = sorted(self.index.vocab, key=self.index.vocab.get)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            documents=np.array(self.index.documents, dtype=str),
+            terms=np.array(terms, dtype=str),
+            indptr=self.index.indptr,
+            doc_ids=self.index.doc_ids,
+            values=self.index.values,
+            idf=self.index.idf,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ReportIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(BM25Index.from_arrays(data["documents"].tolist(), data["terms"].tolist(), data["indptr"],
+                                             data["doc_ids"], data["values"], data["idf"]))
+
+    def search(self, question: str, k: int = 4) -> List[str]:
+        return [self.index.documents[i] for i, score in self.index.top_k(question, k) if score > 0]
+
+
+# Loaded indexes, most recently used last, each with the (mtime, size) of the file it was read from
+QA_INDEX_CACHE_SIZE = int(os.getenv("QA_INDEX_CACHE_SIZE", "32"))
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def index_path(index_dir: str, thread_id: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in thread_id)
+    return os.path.join(index_dir, f"{safe}.npz")
+
+
+def _stamp(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _remember(path: str, stamp: Optional[tuple], index: ReportIndex):
+    with _index_lock:
+        _index_cache[path] = (stamp, index)
+        _index_cache.move_to_end(path)
+        while len(_index_cache) > QA_INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+
+
+def get_report_index(index_dir: str, thread_id: str, report: str = "", research_data: Optional[List[str]] = None) -> ReportIndex:
+    """Return the thread's index from memory, then disk, building and persisting it as a last resort.
+
+    A cached index is used only while its file is unchanged, so an index
+    republished by another process is picked up on the next question.
+    """
+    path = index_path(index_dir, thread_id)
+    stamp = _stamp(path)
+    with _index_lock:
+        cached = _index_cache.get(path)
+        if cached and cached[0] == stamp:
+            _index_cache.move_to_end(path)
+            return cached[1]
+    if stamp is not None:
+        index = ReportIndex.load(path)
+    else:
+        index = ReportIndex.build(report, research_data or [])
+        index.save(path)
+        stamp = _stamp(path)
+    _remember(path, stamp, index)
+    return index
+
+
+def publish_report_index(index_dir: str, thread_id: str, report: str, research_data: List[str]) -> ReportIndex:
+    """(Re)build the thread's index at publish time, replacing any stale copy."""
+    index = ReportIndex.build(report, research_data)
+    path = index_path(index_dir, thread_id)
+    index.save(path)
+    _remember(path, _stamp(path), index)
+    return index
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional, Tuple, Type
+
+import requests
+from langchain_core.exceptions import OutputParserException
+
+from metrics import annotate
+from ratelimit import is_rate_limit_error
+
+logger = logging.getLogger("ResearchSuite")
+
+# Network blips, timeouts and malformed structured output; HTTP 5xx responses are retried as well
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    requests.ConnectionError,
+    requests.Timeout,
+    OutputParserException,
+)
+
+
+def _status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+class RetryError(RuntimeError):
+    """A sub-item still failed after every attempt the policy allows."""
+
+    def __init__(self, error: Exception, attempts: int):
+        super().__init__(f"{type(error).__name__}: {error} (after {attempts} attempts)")
+        self.error = error
+        self.attempts = attempts
+
+
+class RetryPolicy:
+    """Retries one sub-item of a node (a search, an LLM call) on transient errors.
+
+    Delays grow exponentially from `base_delay` up to `max_delay`; each is
+    scaled by a random factor in [1 - jitter, 1] so concurrent retries spread
+    out. Only `retry_on` error classes and HTTP 5xx responses are retried.
+    Rate limits are not: `RateLimiter` has already backed off on those.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0, jitter: float = 0.5,
+                 retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = retry_on
+
+    def is_retryable(self, error: Exception) -> bool:
+        if is_rate_limit_error(error):
+            return False
+        status = _status(error)
+        return isinstance(error, self.retry_on) or (status is not None and status >= 500)
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * random.uniform(1 - self.jitter, 1.0)
+
+    def _next_delay(self, error: Exception, attempt: int) -> float:
+        if not self.is_retryable(error):
+            raise error
+        if attempt + 1 >= self.max_attempts:
+            raise RetryError(error, self.max_attempts) from error
+        delay = self.delay(attempt)
+        logger.warning(f"{type(error).__name__}: {error}; retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_attempts})")
+        annotate(retries=1)
+        return delay
+
+    def call(self, fn, *args, **kwargs):
+        """Run `fn`, retrying transient failures; raises `RetryError` once attempts run out."""
+        for attempt in range(self.max_attempts):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                time.sleep(self._next_delay(e, attempt))
+
+    def stream(self, fn, *args, **kwargs):
+        """Iterate `fn(...)`, retrying transient failures raised before the first chunk.
+
+        Later failures propagate: chunks already passed on (e.g. streamed draft
+        tokens) cannot be taken back, so a retry would repeat them.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                chunks = iter(fn(*args, **kwargs))
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                time.sleep(self._next_delay(e, attempt))
+                continue
+            yield first
+            yield from chunks
+            return
+
+    async def astream(self, fn, *args, **kwargs):
+        """`stream` for an async iterator `fn`."""
+        for attempt in range(self.max_attempts):
+            try:
+                chunks = fn(*args, **kwargs).__aiter__()
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                await asyncio.sleep(self._next_delay(e, attempt))
+                continue
+            yield first
+            async for chunk in chunks:
+                yield chunk
+            return
+
+    async def acall(self, fn, *args, **kwargs):
+        """`call` for a coroutine function; waits on the event loop between attempts."""
+        for attempt in range(self.max_attempts):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                await asyncio.sleep(self._next_delay(e, attempt))
+
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from cache import _current_node
+from metrics import Telemetry, telemetry
+
+logger = logging.getLogger("ResearchSuite")
+
+ROUTES = ("large", "small", "cascade")
+# Weight of the newest large-model latency in the running average used to estimate savings
+_LATENCY_ALPHA = 0.3
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    """`"planner=cascade,writer=large"` -> `{"planner": "cascade", "writer": "large"}`."""
+    routes = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        node, _, route = item.partition("=")
+        route = route.strip().lower()
+        if route not in ROUTES:
+            raise ValueError(f"Unknown route {route!r} for node {node.strip()!r}; expected one of {ROUTES}")
+        routes[node.strip()] = route
+    return routes
+
+
+def _accepted(result, min_confidence: float) -> Optional[str]:
+    """Why a structured reply from the small model should be escalated, or None to keep it."""
+    confidence = getattr(result, "confidence", None)
+    if isinstance(confidence, (int, float)) and confidence < min_confidence:
+        return "low_confidence"
+    check = getattr(result, "acceptable", None)
+    if callable(check) and not check():
+        return "rejected"
+    return None
+
+
+class ModelRouter:
+    """Chooses the chat model for each graph node.
+
+    Nodes are routed to the `large` model, the `small` one, or a `cascade`
+    that asks the small model first and escalates to the large one when the
+    call fails (including structured-output parsing), when a structured reply
+    reports a `confidence` below `min_confidence`, or when the schema's
+    `acceptable()` check rejects it. Streamed cascade calls escalate only if
+    the small model fails before its first token.
+
+    Every cascade is recorded as a `route` span: the model that answered,
+    why it escalated, and the seconds saved (or wasted on an escalated small
+    call) against the large model's average latency for that node.
+    """
+
+    def __init__(self, large, small=None, routes: Optional[Dict[str, str]] = None, default: str = "large",
+                 min_confidence: float = 0.7, registry: Optional[Telemetry] = None):
+        self.large = large
+        self.small = small
+        self.routes = dict(routes or {})
+        self.default = default
+        self.min_confidence = min_confidence
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._large_seconds: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def __getattr__(self, name):
+        return getattr(self.large, name)
+
+    def route(self, node: Optional[str] = None) -> str:
+        if self.small is None:
+            return "large"
+        return self.routes.get(node or _current_node(), self.default)
+
+    def with_structured_output(self, schema, **kwargs):
+        return _StructuredRoute(self, schema, kwargs)
+
+    def invoke(self, messages, *args, **kwargs):
+        return self._call(self.small, self.large, lambda client: client.invoke(messages, *args, **kwargs))
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return await self._acall(self.small, self.large, lambda client: client.ainvoke(messages, *args, **kwargs))
+
+    def stream(self, messages, *args, **kwargs):
+        node = _current_node()
+        route = self.route(node)
+        if route != "cascade":
+            yield from (self.small if route == "small" else self.large).stream(messages, *args, **kwargs)
+            return
+        with (self.registry or telemetry).span("route", "cascade") as span:
+            start = time.time()
+            try:
+                chunks = iter(self.small.stream(messages, *args, **kwargs))
+                first = next(chunks, None)
+            except Exception as e:
+                self._record(span, node, "large", f"error:{type(e).__name__}", time.time() - start)
+                chunks, first = iter(self.large.stream(messages, *args, **kwargs)), None
+            else:
+                self._record(span, node, "small", None, time.time() - start)
+        if first is not None:
+            yield first
+        yield from chunks
+
+    async def astream(self, messages, *args, **kwargs):
+        node = _current_node()
+        route = self.route(node)
+        if route != "cascade":
+            async for chunk in (self.small if route == "small" else self.large).astream(messages, *args, **kwargs):
+                yield chunk
+            return
+        with (self.registry or telemetry).span("route", "cascade") as span:
+            start = time.time()
+            try:
+                chunks = self.small.astream(messages, *args, **kwargs).__aiter__()
+                first = await anext(chunks, None)
+            except Exception as e:
+                self._record(span, node, "large", f"error:{type(e).__name__}", time.time() - start)
+                chunks, first = self.large.astream(messages, *args, **kwargs).__aiter__(), None
+            else:
+                self._record(span, node, "small", None, time.time() - start)
+        if first is not None:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    def _call(self, small, large, call):
+        node = _current_node()
+        route = self.route(node)
+        if route == "small":
+            return call(small)
+        if route == "large":
+            start = time.time()
+            result = call(large)
+            self._observe_large(node, time.time() - start)
+            return result
+        with (self.registry or telemetry).span("route", "cascade") as span:
+            start = time.time()
+            try:
+                result = call(small)
+                reason = _accepted(result, self.min_confidence)
+            except Exception as e:
+                reason = f"error:{type(e).__name__}"
+            small_seconds = time.time() - start
+            if reason is None:
+                self._record(span, node, "small", None, small_seconds)
+                return result
+            logger.info(f"Escalating {node} to the large model ({reason})")
+            start = time.time()
+            result = call(large)
+            self._observe_large(node, time.time() - start)
+            self._record(span, node, "large", reason, small_seconds)
+            return result
+
+    async def _acall(self, small, large, call):
+        """`_call` for coroutine-returning `call`s."""
+        node = _current_node()
+        route = self.route(node)
+        if route == "small":
+            return await call(small)
+        if route == "large":
+            start = time.time()
+            result = await call(large)
+            self._observe_large(node, time.time() - start)
+            return result
+        with (self.registry or telemetry).span("route", "cascade") as span:
+            start = time.time()
+            try:
+                result = await call(small)
+                reason = _accepted(result, self.min_confidence)
+            except Exception as e:
+                reason = f"error:{type(e).__name__}"
+            small_seconds = time.time() - start
+            if reason is None:
+                self._record(span, node, "small", None, small_seconds)
+                return result
+            logger.info(f"Escalating {node} to the large model ({reason})")
+            start = time.time()
+            result = await call(large)
+            self._observe_large(node, time.time() - start)
+            self._record(span, node, "large", reason, small_seconds)
+            return result
+
+    def _observe_large(self, node: str, seconds: float):
+        with self._lock:
+            for key in (node, "*"):
+                previous = self._large_seconds.get(key)
+                self._large_seconds[key] = seconds if previous is None else previous + _LATENCY_ALPHA * (seconds - previous)
+
+    def _record(self, span, node: str, model: str, reason: Optional[str], small_seconds: float):
+        escalated = reason is not None
+        with self._lock:
+            # Until this node has escalated once, compare against large calls made by any node
+            baseline = self._large_seconds.get(node, self._large_seconds.get("*"))
+            stats = self._stats.setdefault(node, {"cascades": 0, "escalations": 0, "saved_seconds": 0.0, "wasted_seconds": 0.0})
+            stats["cascades"] += 1
+            if escalated:
+                stats["escalations"] += 1
+                stats["wasted_seconds"] += small_seconds
+            elif baseline is not None:
+                stats["saved_seconds"] += max(0.0, baseline - small_seconds)
+        attrs = {"model": model, "escalations": int(escalated), "small_seconds": round(small_seconds, 4)}
+        if escalated:
+            attrs.update(reason=reason, wasted_seconds=round(small_seconds, 4))
+        elif baseline is not None:
+            attrs["saved_seconds"] = round(max(0.0, baseline - small_seconds), 4)
+        span.annotate(**attrs)
+
+    def routing_stats(self) -> dict:
+        """Per-node cascade counts, escalations and estimated seconds saved or wasted."""
+        with self._lock:
+            return {node: {k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()}
+                    for node, stats in self._stats.items()}
+
+
+class _StructuredRoute:
+    """`with_structured_output` view of a `ModelRouter`; both models' views are built up front."""
+
+    def __init__(self, router: ModelRouter, schema, kwargs):
+        self.router = router
+        self.large = router.large.with_structured_output(schema, **kwargs)
+        self.small = router.small.with_structured_output(schema, **kwargs) if router.small is not None else None
+
+    def invoke(self, messages, *args, **kwargs):
+        return self.router._call(self.small, self.large, lambda client: client.invoke(messages, *args, **kwargs))
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return await self.router._acall(self.small, self.large, lambda client: client.ainvoke(messages, *args, **kwargs))
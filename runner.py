@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import queue
+import threading
+
+logger = logging.getLogger("ResearchSuite")
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class GraphRunner:
+    """Drives a compiled graph through `astream` on one shared event loop.
+
+    `astream` / `ainvoke` are the native entry points: nodes await their LLM,
+    search and checkpoint I/O, so a single loop multiplexes any number of
+    concurrent runs. `stream` / `invoke` are thin wrappers for sync callers
+    (Streamlit, CLI, batch): they run `astream` on a background loop thread and
+    hand events back through a queue. Everything else (`get_state`,
+    `update_state`, ...) is delegated to the compiled graph.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.app, name)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="graph-loop", daemon=True).start()
+        return self._loop
+
+    async def astream(self, input, config, **kwargs):
+        async for event in self.app.astream(input, config, **kwargs):
+            yield event
+
+    async def ainvoke(self, input, config, **kwargs):
+        return await self.app.ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config, **kwargs):
+        events = queue.Queue()
+
+        async def pump():
+            # One task for the whole run, so context set up by `astream` survives between events
+            try:
+                async for event in self.astream(input, config, **kwargs):
+                    events.put(event)
+            except Exception as e:
+                events.put(_Failed(e))
+            finally:
+                events.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while (event := events.get()) is not _DONE:
+                if isinstance(event, _Failed):
+                    raise event.error
+                yield event
+        finally:
+            # The caller stopped early (or failed): stop the run too
+            future.cancel()
+
+    def invoke(self, input, config, **kwargs):
+        return asyncio.run_coroutine_threadsafe(self.ainvoke(input, config, **kwargs), self.loop).result()
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
@@ -0,0 +1,122 @@
+import json
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from retrieval import tokenize
+from similarity import MinHash, minhash
+
+# Source header written for every kept result: "[n] Title (url)"
+SOURCE_HEADER = re.compile(r"(?m)^(?:A: )?\[\d+\] .*\((https?://[^\s)]+)\)$")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for exact-duplicate checks: no scheme, www, fragment, tracking params or trailing slash."""
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def parse_results(raw) -> List[dict]:
+    """Records (url, title, content, score) from a Tavily response, a list of results, or plain text."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return [{"url": None, "title": "", "content": raw.strip(), "score": 0.0}] if raw.strip() else []
+    if isinstance(raw, dict):
+        raw = raw.get("results", [])
+    records = []
+    for item in raw or []:
+        if not isinstance(item, dict):
+            item = {"content": str(item)}
+        content = " ".join(str(item.get("content") or "").split())
+        if not content:
+            continue
+        records.append({
+            "url": item.get("url"),
+            "title": " ".join(str(item.get("title") or "").split()),
+            "content": content,
+            "score": float(item.get("score") or 0.0),
+        })
+    return records
+
+
+def best_sentences(text: str, query: str, max_chars: int) -> str:
+    """Most query-relevant sentences of `text` that fit in `max_chars`, in their original order."""
+    if len(text) <= max_chars:
+        return text
+    terms = set(tokenize(query))
+    sentences = [s for s in _SENTENCE.split(text) if s]
+    ranked = sorted(range(len(sentences)), key=lambda i: (-len(terms & set(tokenize(sentences[i]))), i))
+    chosen, used = [], 0
+    for i in ranked:
+        length = len(sentences[i]) + 1
+        if used + length > max_chars:
+            continue
+        chosen.append(i)
+        used += length
+    if not chosen:
+        # A single sentence longer than the budget: cut it at a word boundary
+        return text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+class ResultDeduper:
+    """Drops results already seen in this research run or in earlier loops.
+
+    Exact duplicates are matched on the normalized URL and near duplicates on
+    the MinHash similarity of their content (syndicated copies, mirrors).
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self.urls = set()
+        self.signatures: List[List[int]] = []
+        self.dropped = 0
+
+    def seed(self, entries: Iterable[str]):
+        """Register the sources and text of existing `research_data` entries."""
+        for entry in entries:
+            self.urls.update(normalize_url(url) for url in SOURCE_HEADER.findall(entry))
+            for block in SOURCE_HEADER.split(entry)[::2]:
+                if len(block.split()) >= 20:
+                    self.signatures.append(minhash.text_signature(block))
+        return self
+
+    def is_new(self, record: dict) -> bool:
+        url = normalize_url(record["url"]) if record.get("url") else None
+        if url and url in self.urls:
+            self.dropped += 1
+            return False
+        signature = minhash.text_signature(record["content"])
+        if any(MinHash.similarity(signature, seen) >= self.threshold for seen in self.signatures):
+            self.dropped += 1
+            return False
+        if url:
+            self.urls.add(url)
+        self.signatures.append(signature)
+        return True
+
+
+def format_entry(question: str, records: List[dict], budget: int, deduper: Optional[ResultDeduper] = None) -> Optional[str]:
+    """Compact `research_data` entry: the highest-scoring new results, trimmed to `budget` characters.
+
+    Returns None when every result was a duplicate.
+    """
+    fresh = [r for r in sorted(records, key=lambda r: -r["score"]) if deduper is None or deduper.is_new(r)]
+    if not fresh:
+        return None
+    parts, remaining = [], budget
+    for n, record in enumerate(fresh, 1):
+        header = f"[{n}] {record['title'] or record['url']} ({record['url']})\n" if record.get("url") else ""
+        # Split what is left evenly over the remaining results (at least 200 chars), so one long page cannot crowd out the rest
+        share = max(remaining // (len(fresh) - n + 1), min(remaining, 200)) - len(header)
+        if share < 80:
+            break
+        snippet = best_sentences(record["content"], question, share)
+        parts.append(header + snippet)
+        remaining -= len(header) + len(snippet) + 2
+    return f"Q: {question}\nA: " + "\n\n".join(parts)
@@ -0,0 +1,98 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+HEADING = re.compile(r"(#{1,6})\s+\S")
+FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+
+
+def headings(text: str) -> List[Tuple[int, int]]:
+    """(offset, level) of each heading line, skipping `#` lines inside ``` / ~~~ code fences."""
+    found, fence, offset = [], None, 0
+    for line in text.splitlines(keepends=True):
+        marker = FENCE.match(line)
+        if fence:
+            # A fence closes on a bare run of the same character, at least as long as the opener
+            if marker and marker.group(1)[0] == fence[0] and len(marker.group(1)) >= len(fence) \
+                    and not line[marker.end():].strip():
+                fence = None
+        elif marker:
+            fence = marker.group(1)
+        else:
+            heading = HEADING.match(line)
+            if heading:
+                found.append((offset, len(heading.group(1))))
+        offset += len(line)
+    return found
+
+
+def section_level(text: str) -> int:
+    """Heading level that delimits sections: the shallowest level used more than once.
+
+    A report with one `# Title` and several `## Parts` splits on `##`, so the
+    title stays with the preamble instead of swallowing the whole document.
+    """
+    counts = Counter(level for _, level in headings(text))
+    for level in sorted(counts):
+        if counts[level] > 1:
+            return level
+    return min(counts) if counts else 1
+
+
+def split_sections(text: str, level: Optional[int] = None) -> List[str]:
+    """Split markdown into sections at `level` headings (default `section_level`); deeper headings stay inside their section."""
+    if not text.strip():
+        return []
+    level = level or section_level(text)
+    cuts = [offset for offset, depth in headings(text) if depth <= level]
+    bounds = [0] + cuts + [len(text)]
+    pieces = (text[start:end] for start, end in zip(bounds, bounds[1:]))
+    return [p.strip() for p in pieces if p.strip()]
+
+
+def join_sections(sections: Iterable[str]) -> str:
+    return "\n\n".join(s.strip() for s in sections if s.strip()) + "\n"
+
+
+def section_heading(section: str) -> str:
+    first = section.split("\n", 1)[0].strip()
+    return first if first.startswith("#") else "(preamble)"
+
+
+def section_hash(section: str) -> str:
+    return hashlib.sha1(section.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def outline(sections: List[str], highlight: Iterable[int] = (), label: str = "under review") -> str:
+    """One line per section (index, heading, length); sections in `highlight` are tagged with `label`."""
+    highlight = set(highlight)
+    lines = []
+    for i, section in enumerate(sections):
+        tag = f", {label}" if i in highlight else ""
+        lines.append(f"[{i}] {section_heading(section)} ({len(section.split())} words{tag})")
+    return "\n".join(lines)
+
+
+def splice(sections: List[str], index: int, replacement: str) -> List[str]:
+    """Replace one section, keeping its original heading if the rewrite dropped it."""
+    replacement = replacement.strip()
+    heading = section_heading(sections[index])
+    if heading != "(preamble)" and not replacement.startswith("#"):
+        replacement = f"{heading}\n{replacement}"
+    return sections[:index] + [replacement] + sections[index + 1:]
+
+
+def batch_by_chars(indices: List[int], sections: List[str], max_chars: int) -> List[List[int]]:
+    """Group section indices into consecutive batches of at most `max_chars` (one oversize section per batch)."""
+    batches, current, size = [], [], 0
+    for i in indices:
+        length = len(sections[i])
+        if current and size + length > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,64 @@
+import hashlib
+import re
+from typing import Iterable, List, Set
+
+import numpy as np
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod P
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, k: int = 5) -> Set[int]:
+    """Hashed word k-shingles of `text` (lower-cased, punctuation dropped)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < k:
+        return {_hash(" ".join(words))} if words else set()
+    return {_hash(" ".join(words[i:i + k])) for i in range(len(words) - k + 1)}
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def text_similarity(a: str, b: str, k: int = 5) -> float:
+    return jaccard(shingles(a, k), shingles(b, k))
+
+
+class MinHash:
+    """Fixed-size MinHash signatures; the fraction of equal slots estimates Jaccard similarity.
+
+    Signatures are plain int lists so they can be stored in graph state.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, items: Iterable[int]) -> List[int]:
+        values = np.fromiter(items, dtype=np.uint64)
+        if values.size == 0:
+            return [_MAX_HASH] * self.num_perm
+        # (a * x + b) mod P with uint64 wraparound, vectorised over all permutations
+        hashed = (np.outer(values, self.a) + self.b) % np.uint64(_PRIME) & np.uint64(_MAX_HASH)
+        return hashed.min(axis=0).astype(np.int64).tolist()
+
+    def text_signature(self, text: str, k: int = 5) -> List[int]:
+        return self.signature(shingles(text, k))
+
+    @staticmethod
+    def similarity(a: List[int], b: List[int]) -> float:
+        if not a or not b or len(a) != len(b):
+            return 0.0
+        return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+minhash = MinHash()
@@ -8,9 +8,16 @@ class AgentState(BaseModel):
     research_data: Annotated[List[str], operator.add] = Field(default_factory=list, description="Gathered research findings")
     draft: str = Field(default="", description="The current version of the report")
     critique: str = Field(default="", description="Feedback from the editor")
+    section_feedback: List[dict] = Field(default_factory=list, description="Sections flagged by the editor ({index, heading, feedback}) for the writer to rewrite")
+    reviewed_sections: List[str] = Field(default_factory=list, description="Hashes of draft sections the editor has already accepted")
+    draft_signature: List[int] = Field(default_factory=list, description="MinHash signature of the last reviewed draft")
+    converged: bool = Field(default=False, description="Whether revisions stopped improving the draft")
+    convergence_log: List[dict] = Field(default_factory=list, description="Per-review convergence measurements and routing decisions")
+    failures: Annotated[List[dict], operator.add] = Field(default_factory=list, description="Searches and calls that still failed after retries ({node, item, error, attempts})")
     revision_count: int = Field(default=0, description="Number of revisions made")
     approved: bool = Field(default=False, description="Whether the report is finalized")
     report_path: Optional[str] = Field(default=None, description="Path to the saved report")
+    report_hash: Optional[str] = Field(default=None, description="Content hash of the published report in the report store")
     next_node: Optional[str] = Field(default=None, description="The next node to execute (for supervisor logic)")
     chat_history: List[dict] = Field(default_factory=list, description="History of Q&A sessions")
     image_urls: List[str] = Field(default_factory=list, description="List of generated image URLs for the report")
@@ -0,0 +1,49 @@
+"""Stub graphs shared by the tests: the node shapes of the real workflow, without LLM or search calls.
+
+Plain factories rather than pytest fixtures, so the unittest-style tests import them directly
+(`from tests.conftest import pipeline_graph`) under both pytest and `python -m unittest`.
+"""
+import time
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, END
+
+from state import AgentState
+
+
+def pipeline_graph(checkpointer=None, interrupt_before=("researcher",), delay: float = 0.0):
+    """planner -> researcher -> publisher.
+
+    Topics containing "short" get a two-question plan, others three. A plan of
+    `["boom"]` makes the researcher fail; `delay` slows the planner down.
+    """
+    def planner(state):
+        time.sleep(delay)
+        return {"plan": ["Q1", "Q2"] if "short" in state.topic else ["Q1", "Q2", "Q3"]}
+
+    def researcher(state):
+        if state.plan == ["boom"]:
+            raise RuntimeError("search exploded")
+        return {"research_data": [f"data for {q}" for q in state.plan]}
+
+    def publisher(state):
+        return {"report_path": f"report_{state.topic}.md", "revision_count": state.revision_count + 1}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("planner", planner)
+    workflow.add_node("researcher", researcher)
+    workflow.add_node("publisher", publisher)
+    workflow.set_entry_point("planner")
+    workflow.add_edge("planner", "researcher")
+    workflow.add_edge("researcher", "publisher")
+    workflow.add_edge("publisher", END)
+    return workflow.compile(checkpointer=checkpointer or InMemorySaver(), interrupt_before=list(interrupt_before))
+
+
+def revision_loop_graph(checkpointer, revisions: int = 3):
+    """A writer that appends "x" to the draft until `revision_count` reaches `revisions`."""
+    workflow = StateGraph(AgentState)
+    workflow.add_node("writer", lambda state: {"draft": state.draft + "x", "revision_count": state.revision_count + 1})
+    workflow.set_entry_point("writer")
+    workflow.add_conditional_edges("writer", lambda state: END if state.revision_count >= revisions else "writer")
+    return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+os.environ.setdefault("TAVILY_API_KEY", "fake")
+
+from fakes import FakeLLM, FakeSearch
+from nodes import aresearcher_node
+from progress import ProgressStore
+from ratelimit import RateLimiter
+from retry import RetryError, RetryPolicy
+from runner import GraphRunner
+from state import AgentState
+
+
+class TestAsyncPrimitives(unittest.TestCase):
+
+    def test_acall_retries_on_the_loop(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError("reset")
+            return "ok"
+
+        async def down():
+            raise TimeoutError()
+
+        policy = RetryPolicy(max_attempts=2, base_delay=0)
+        self.assertEqual(asyncio.run(policy.acall(flaky)), "ok")
+        with self.assertRaises(RetryError):
+            asyncio.run(policy.acall(down))
+
+    def test_aacquire_waits_without_blocking_the_loop(self):
+        limiter = RateLimiter(requests_per_minute=600)  # bucket of 600, refilled at 10/s
+        limiter.requests.level = 0
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            waited, _ = await asyncio.gather(limiter.aacquire(), ticker())
+            return waited
+
+        self.assertGreater(asyncio.run(main()), 0.05)
+        self.assertEqual(len(ticks), 5)
+
+    def test_sqlite_stores_are_used_off_the_loop(self):
+        from langchain_core.messages import HumanMessage
+        from cache import CachedLLM, CachedSearch, SqliteCache
+        from progress import NodeProgress
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = SqliteCache(os.path.join(tmp, "cache.sqlite"))
+            store = ProgressStore(os.path.join(tmp, "progress.sqlite"))
+            threads = set()
+            for obj, name in ((cache, "get"), (cache, "put"), (store, "get"), (store, "put")):
+                original = getattr(obj, name)
+
+                def record(*args, _original=original, **kwargs):
+                    threads.add(threading.get_ident())
+                    return _original(*args, **kwargs)
+                setattr(obj, name, record)
+
+            async def value():
+                return {"v": 1}
+
+            async def main():
+                await CachedSearch(FakeSearch(latency=0), cache).ainvoke("q")
+                await CachedLLM(FakeLLM(latency=0), cache).ainvoke([HumanMessage(content="hi")])
+                await NodeProgress(store, "t", "c", "writer").amemo("k", value)
+                return threading.get_ident()
+
+            loop_thread = asyncio.run(main())
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+
+
+class TestAsyncNodes(unittest.TestCase):
+
+    def test_researcher_records_failures_and_timeouts(self):
+        class Search:
+            async def ainvoke(self, question):
+                if question == "slow":
+                    await asyncio.sleep(1)
+                if question == "down":
+                    raise ValueError("bad query")
+                return f"result for {question}"
+
+        with patch("nodes.search", Search()), patch("nodes.RESEARCH_TIMEOUT", 0.1), \
+                patch("nodes.retry_policy", RetryPolicy(base_delay=0)):
+            result = asyncio.run(aresearcher_node(AgentState(topic="AI", plan=["ok", "slow", "down"])))
+
+        self.assertEqual([r.split("\n")[0] for r in result["research_data"]], ["Q: ok"])
+        self.assertEqual(sorted(f["item"] for f in result["failures"]), ["down", "slow"])
+
+
+class TestAsyncGraph(unittest.TestCase):
+
+    def setUp(self):
+        from backends import app_config
+        from graph import workflow
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.llm = FakeLLM(latency=0.01, approve_rate=1.0, tokens=20)
+        self.search = FakeSearch(latency=0.01)
+        patches = [patch("nodes.llm", self.llm), patch("nodes.search", self.search),
+                   patch("nodes.progress", ProgressStore(os.path.join(self.tmp.name, "progress.sqlite"))),
+                   patch("nodes.QA_INDEX_DIR", os.path.join(self.tmp.name, "qa"))]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        # Reports are written to the working directory
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        self.app = workflow.compile(checkpointer=InMemorySaver(), interrupt_before=app_config()["interrupt_before"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def run_thread(self, thread_id: str) -> dict:
+        config = {"configurable": {"thread_id": thread_id}}
+        input = {"topic": f"topic {thread_id}"}
+        while True:
+            await self.app.ainvoke(input, config)
+            snapshot = await self.app.aget_state(config)
+            if not snapshot.next:
+                return snapshot.values
+            input = None
+
+    def test_one_loop_multiplexes_many_threads(self):
+        threads_before = threading.active_count()
+
+        async def main():
+            return await asyncio.gather(*(self.run_thread(f"t{i}") for i in range(30)))
+
+        results = asyncio.run(main())
+        self.assertTrue(all(r.get("report_path") for r in results))
+        self.assertEqual(self.search.calls, 30 * 4)
+        # Checkpoint I/O borrows a few executor threads; nothing scales with the number of runs
+        self.assertLess(threading.active_count() - threads_before, 30)
+
+    def test_runner_streams_events_for_sync_callers(self):
+        runner = GraphRunner(self.app)
+        self.addCleanup(runner.close)
+        config = {"configurable": {"thread_id": "sync"}}
+        list(runner.stream({"topic": "sync"}, config, stream_mode="updates"))
+        self.assertEqual(runner.get_state(config).next, ("researcher",))
+
+        modes = [mode for mode, _ in runner.stream(None, config, stream_mode=["updates", "custom"])]
+        self.assertIn("custom", modes)  # writer tokens
+        self.assertEqual(runner.get_state(config).next, ("publisher",))
+        runner.invoke(None, config)
+        self.assertTrue(runner.get_state(config).values["report_path"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from backends import BACKENDS, Clients, Lazy, app_config, clients, create, register
+from progress import NoProgress, ProgressStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestBackends(unittest.TestCase):
+
+    def test_registry_and_unknown_backend(self):
+        self.assertEqual(set(BACKENDS["llm"]), {"groq", "fake"})
+        with self.assertRaises(ValueError):
+            create("search", app_config(search="bing"))
+        with self.assertRaises(ValueError):
+            register("vectorstore", "x")
+
+        @register("search", "static")
+        def static(config):
+            return {"results": []}
+        self.addCleanup(BACKENDS["search"].pop, "static")
+        self.assertEqual(create("search", app_config(search="static")), {"results": []})
+
+    def test_lazy_client_is_created_on_first_use(self):
+        registry = Clients()
+        registry.configure(app_config(search="fake", search_options={"latency": 0, "results": 2}))
+        search = Lazy("search", registry)
+        self.assertEqual(registry._clients, {})
+        self.assertEqual(len(search.invoke("q")["results"]), 2)
+        self.assertIs(registry.get("search"), registry.get("search"))
+
+    def test_build_app_with_fake_backends(self):
+        from graph import build_app
+
+        self.addCleanup(clients.configure, None)
+        app = build_app({"llm": "fake", "search": "fake", "checkpointer": "memory",
+                         "llm_options": {"latency": 0, "approve_rate": 1.0}, "search_options": {"latency": 0}})
+        config = {"configurable": {"thread_id": "factory"}}
+        app.invoke({"topic": "backends"}, config)
+        self.assertEqual(app.get_state(config).next, ("researcher",))
+        app.invoke(None, config)
+        self.assertEqual(app.get_state(config).next, ("publisher",))
+        self.assertEqual(clients.get("search").calls, 4)
+        # The in-memory checkpointer has no listener to clear memoized progress, so none is kept
+        self.assertIsInstance(clients.get("progress"), NoProgress)
+
+    def test_progress_follows_checkpointer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = os.path.join(tmp, "c.sqlite")
+            store = create("progress", app_config(checkpoint_db=db, checkpointer="sqlite"))
+            self.assertIsInstance(store, ProgressStore)
+            self.assertEqual(store.path, db)
+        self.assertEqual(app_config(checkpointer="memory")["progress"], "none")
+        self.assertEqual(app_config(checkpointer="memory", progress="sqlite")["progress"], "sqlite")
+
+    def test_reports_follow_checkpointer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = os.path.join(tmp, "c.sqlite")
+            store = create("reports", app_config(checkpoint_db=db, reports_dir=tmp, checkpointer="sqlite"))
+            self.assertEqual((store.db, store.root), (db, tmp))
+            store = create("reports", app_config(reports_dir=tmp, checkpointer="memory"))
+            self.assertIsNone(store.db)
+
+    def test_import_has_no_side_effects(self):
+        env = {k: v for k, v in os.environ.items() if k not in ("GROQ_API_KEY", "TAVILY_API_KEY")}
+        env["PYTHONPATH"] = ROOT
+        script = ("import sys, graph, nodes\n"
+                  "print(sorted(m for m in ('langchain_groq', 'langchain_tavily') if m in sys.modules))")
+        with tempfile.TemporaryDirectory() as tmp:
+            out = subprocess.run([sys.executable, "-c", script], cwd=tmp, env=env, capture_output=True,
+                                 text=True, check=True).stdout
+            self.assertEqual(os.listdir(tmp), [])
+        self.assertEqual(out.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import json
+import unittest
+
+from batch import MinQuestions, batch_thread_id, make_policy, read_topics, run_batch
+from tests.conftest import pipeline_graph
+
+
+class TestBatchMode(unittest.TestCase):
+
+    def test_read_topics_formats(self):
+        self.assertEqual(read_topics(io.StringIO('{"topic": "A"}\n{"topic": "B"}\n')), [{"topic": "A"}, {"topic": "B"}])
+        self.assertEqual(read_topics(io.StringIO("topic,owner\nA,me\n")), [{"topic": "A", "owner": "me"}])
+        self.assertEqual(read_topics(io.StringIO("A\n\nB\n")), [{"topic": "A"}, {"topic": "B"}])
+
+    def test_auto_policy_publishes_all(self):
+        out = io.StringIO()
+        results = run_batch(pipeline_graph(interrupt_before=["researcher", "publisher"]), [{"topic": f"t{i}"} for i in range(5)], make_policy("auto"), workers=3, out=out)
+
+        self.assertEqual({r["status"] for r in results}, {"published"})
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertIn("planner", lines[0]["node_seconds"])
+
+    def test_duplicate_topics_run_once(self):
+        items = [{"topic": "same"}, {"topic": "other"}, {"topic": "same"}]
+        results = run_batch(pipeline_graph(interrupt_before=["researcher", "publisher"]), items, make_policy("auto"), workers=3)
+        self.assertEqual(sorted(r["topic"] for r in results), ["other", "same"])
+        self.assertEqual({r["topic"]: r["duplicates_dropped"] for r in results}, {"same": 1, "other": 0})
+
+    def test_min_questions_parks_short_plans(self):
+        results = run_batch(pipeline_graph(interrupt_before=["researcher", "publisher"]), [{"topic": "short"}, {"topic": "long"}], MinQuestions(3))
+        status = {r["topic"]: r["status"] for r in results}
+        self.assertEqual(status, {"short": "parked_at_researcher", "long": "published"})
+
+    def test_rerun_resumes_parked_thread(self):
+        app = pipeline_graph(interrupt_before=["researcher", "publisher"])
+        first = run_batch(app, [{"topic": "resume me"}], make_policy("review"))
+        self.assertEqual(first[0]["status"], "parked_at_researcher")
+
+        second = run_batch(app, [{"topic": "resume me"}], make_policy("auto"))
+        self.assertEqual(second[0]["status"], "published")
+        self.assertNotIn("planner", second[0]["node_seconds"])
+        self.assertEqual(second[0]["thread_id"], batch_thread_id("resume me"))
+
+
+if __name__ == "__main__":
+    unittest.main()
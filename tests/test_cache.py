@@ -0,0 +1,127 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from cache import SqliteCache, CachedSearch, CachedLLM, ReplayMiss, normalize_query
+
+
+class Verdict(BaseModel):
+    approved: bool
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalized_hit(self):
+        client = MagicMock()
+        client.invoke.return_value = {"results": [{"url": "https://a"}]}
+        search = CachedSearch(client, SqliteCache(self.path))
+
+        first = search.invoke("What is  LangGraph?")
+        second = search.invoke("what is langgraph")
+
+        self.assertEqual(first, second)
+        client.invoke.assert_called_once()
+        self.assertEqual(search.cache.stats()["hits"], 1)
+
+    def test_persists_across_instances(self):
+        client = MagicMock()
+        client.invoke.return_value = {"results": []}
+        CachedSearch(client, SqliteCache(self.path)).invoke("q")
+
+        replay = CachedSearch(MagicMock(), SqliteCache(self.path), mode="replay")
+        self.assertEqual(replay.invoke("q"), {"results": []})
+        with self.assertRaises(ReplayMiss):
+            replay.invoke("unseen question")
+
+    def test_ttl_expiry(self):
+        cache = SqliteCache(self.path, ttl=0.05)
+        cache.put("k", 1)
+        self.assertEqual(cache.get("k"), 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("k"))
+
+    def test_lru_eviction(self):
+        cache = SqliteCache(self.path, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Hello\n World?? "), "hello world")
+
+
+
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SqliteCache(os.path.join(self.tmp.name, "llm.sqlite"))
+        self.raw = MagicMock(model_name="test-model", temperature=0)
+        self.messages = [SystemMessage(content="sys"), HumanMessage(content="prompt")]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_plain_invoke_cached(self):
+        self.raw.invoke.return_value = AIMessage(content="answer")
+        llm = CachedLLM(self.raw, self.cache)
+
+        first = llm.invoke(self.messages)
+        second = llm.invoke(self.messages)
+
+        self.assertEqual(second.content, first.content)
+        self.raw.invoke.assert_called_once()
+        self.assertEqual(llm.stats()["nodes"]["qa"], {"hits": 1, "misses": 1, "bypassed": 0})
+
+    def test_structured_output_cached_per_schema(self):
+        self.raw.with_structured_output.return_value.invoke.return_value = Verdict(approved=True)
+        self.raw.invoke.return_value = AIMessage(content="plain")
+        llm = CachedLLM(self.raw, self.cache)
+
+        self.assertTrue(llm.with_structured_output(Verdict).invoke(self.messages).approved)
+        result = llm.with_structured_output(Verdict).invoke(self.messages)
+        self.assertIsInstance(result, Verdict)
+        self.raw.with_structured_output.return_value.invoke.assert_called_once()
+        # Same prompt without a schema is a different key
+        self.assertEqual(llm.invoke(self.messages).content, "plain")
+
+    def test_stream_shares_cache_with_invoke(self):
+        self.raw.stream.return_value = iter([AIMessageChunk(content="par"), AIMessageChunk(content="tial")])
+        llm = CachedLLM(self.raw, self.cache)
+
+        self.assertEqual("".join(c.content for c in llm.stream(self.messages)), "partial")
+        self.assertEqual("".join(c.content for c in llm.stream(self.messages)), "partial")
+        self.assertEqual(llm.invoke(self.messages).content, "partial")
+        self.raw.stream.assert_called_once()
+        self.raw.invoke.assert_not_called()
+
+    def test_node_opt_out(self):
+        self.raw.invoke.return_value = AIMessage(content="fresh")
+        llm = CachedLLM(self.raw, self.cache, nodes=["planner"])
+
+        with patch('cache._current_node', return_value="writer"):
+            llm.invoke(self.messages)
+            llm.invoke(self.messages)
+
+        self.assertEqual(self.raw.invoke.call_count, 2)
+        self.assertEqual(llm.stats()["nodes"]["writer"]["bypassed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from catalog import SessionCatalog
+from checkpointing import PooledSqliteSaver
+from tests.conftest import pipeline_graph
+
+
+class TestSessionCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoints.sqlite")
+        self.catalog = SessionCatalog(self.path)
+        self.saver = PooledSqliteSaver(self.path, listeners=[self.catalog.on_checkpoint])
+        self.app = pipeline_graph(self.saver)
+
+    def tearDown(self):
+        self.saver.close()
+        self.tmp.cleanup()
+
+    def test_status_follows_graph(self):
+        config = {"configurable": {"thread_id": "t1"}}
+        self.app.invoke({"topic": "Quantum"}, config)
+        self.assertEqual(self.catalog.get("t1")["status"], "plan_review")
+        self.assertEqual(self.catalog.get("t1")["topic"], "Quantum")
+
+        self.app.invoke(None, config)
+        row = self.catalog.get("t1")
+        self.assertEqual(row["status"], "published")
+        self.assertEqual(row["report_path"], "report_Quantum.md")
+        self.assertEqual(row["revision_count"], 1)
+
+    def test_pagination_and_filters(self):
+        for i in range(5):
+            self.app.invoke({"topic": f"Topic {i}"}, {"configurable": {"thread_id": f"t{i}"}})
+        self.app.invoke(None, {"configurable": {"thread_id": "t0"}})
+
+        self.assertEqual(self.catalog.count(), 5)
+        self.assertEqual(len(self.catalog.list(limit=2, offset=4)), 1)
+        self.assertEqual([s["thread_id"] for s in self.catalog.list(status="published")], ["t0"])
+        self.assertEqual(self.catalog.count(search="Topic 3"), 1)
+        # Newest first
+        self.assertEqual(self.catalog.list(limit=1)[0]["thread_id"], "t0")
+
+    def test_backfill_existing_threads(self):
+        self.app.invoke({"topic": "Old"}, {"configurable": {"thread_id": "old"}})
+        fresh = SessionCatalog(os.path.join(self.tmp.name, "checkpoints.sqlite"))
+        fresh.conn.execute("DELETE FROM sessions")
+        fresh.conn.commit()
+        self.assertTrue(fresh.is_empty())
+
+        self.assertEqual(fresh.backfill(self.saver), 1)
+        self.assertEqual(fresh.get("old")["status"], "plan_review")
+
+
+if __name__ == "__main__":
+    unittest.main()
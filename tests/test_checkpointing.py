@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from langgraph.graph import StateGraph, END
+
+from checkpointing import CompressedSerializer, DELTA_DEPTH, PooledSqliteSaver, maintain
+from langgraph.checkpoint.sqlite import SqliteSaver
+from state import AgentState
+from tests.conftest import revision_loop_graph
+
+
+class TestCheckpointStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoints.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def count(self, thread_id):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_wal_mode(self):
+        saver = PooledSqliteSaver(self.path)
+        revision_loop_graph(saver).invoke({"topic": "AI"}, {"configurable": {"thread_id": "t"}})
+        mode = sqlite3.connect(self.path).execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        saver.close()
+
+    def test_concurrent_threads(self):
+        saver = PooledSqliteSaver(self.path)
+        app = revision_loop_graph(saver)
+        errors = []
+
+        def run(i):
+            try:
+                app.invoke({"topic": f"T{i}"}, {"configurable": {"thread_id": f"t{i}"}})
+            except Exception as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        self.assertEqual(errors, [])
+        for i in range(8):
+            state = app.get_state({"configurable": {"thread_id": f"t{i}"}})
+            self.assertEqual(state.values["revision_count"], 3)
+        saver.close()
+
+    def test_keep_last_retention(self):
+        saver = PooledSqliteSaver(self.path, keep_last=2)
+        app = revision_loop_graph(saver)
+        config = {"configurable": {"thread_id": "t"}}
+        app.invoke({"topic": "AI"}, config)
+
+        self.assertEqual(self.count("t"), 2)
+        self.assertEqual(app.get_state(config).values["draft"], "xxx")
+        saver.close()
+
+    def test_maintain_reports_sizes(self):
+        saver = PooledSqliteSaver(self.path)
+        revision_loop_graph(saver).invoke({"topic": "AI"}, {"configurable": {"thread_id": "t"}})
+        saver.close()
+        before = self.count("t")
+
+        report = maintain(self.path, keep_last=1)
+
+        self.assertEqual(self.count("t"), 1)
+        self.assertEqual(report["checkpoints_removed"], before - 1)
+        self.assertGreater(report["bytes_before"], 0)
+        self.assertIn("bytes_after", report)
+
+
+
+def build_research_graph(saver):
+    # Each step appends research and rewrites a large draft, like the real writer/researcher loop
+    def step(state):
+        return {
+            "research_data": [f"Q: q{state.revision_count}\nA: " + "finding " * 200],
+            "draft": "# Report\n" + "body text " * 500 + str(state.revision_count),
+            "revision_count": state.revision_count + 1,
+        }
+    workflow = StateGraph(AgentState)
+    workflow.add_node("writer", step)
+    workflow.set_entry_point("writer")
+    workflow.add_conditional_edges("writer", lambda state: END if state.revision_count >= 5 else "writer")
+    return workflow.compile(checkpointer=saver)
+
+
+class TestDeltaCheckpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoints.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def bytes_stored(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT SUM(LENGTH(checkpoint)) FROM checkpoints").fetchone()[0]
+        finally:
+            conn.close()
+
+    def run_graph(self, saver):
+        config = {"configurable": {"thread_id": "t"}}
+        build_research_graph(saver).invoke({"topic": "AI"}, config)
+        return build_research_graph(saver).get_state(config).values
+
+    def test_delta_roundtrip_and_smaller(self):
+        plain = self.run_graph(PooledSqliteSaver(self.path))
+        plain_bytes = self.bytes_stored()
+        os.remove(self.path)
+
+        saver = PooledSqliteSaver(self.path, delta=True, serde=CompressedSerializer())
+        values = self.run_graph(saver)
+        self.assertEqual(values, plain)
+        self.assertEqual(len(values["research_data"]), 5)
+        self.assertLess(self.bytes_stored(), plain_bytes / 2)
+
+        # A fresh saver (no in-memory cache) reconstructs every historical checkpoint
+        fresh = PooledSqliteSaver(self.path, serde=CompressedSerializer())
+        history = list(fresh.list({"configurable": {"thread_id": "t"}}))
+        counts = [len(h.checkpoint["channel_values"].get("research_data", [])) for h in history]
+        self.assertEqual(counts[0], 5)
+        self.assertNotIn(DELTA_DEPTH, history[0].checkpoint)
+
+    def test_prune_materializes_delta_base(self):
+        saver = PooledSqliteSaver(self.path, delta=True)
+        expected = self.run_graph(saver)
+        saver.prune("t", 1)
+
+        fresh = PooledSqliteSaver(self.path)
+        values = fresh.get_tuple({"configurable": {"thread_id": "t"}}).checkpoint["channel_values"]
+        self.assertEqual(values["research_data"], expected["research_data"])
+        self.assertEqual(values["draft"], expected["draft"])
+
+    def test_compressed_rows_readable_by_default_serde(self):
+        serde = CompressedSerializer(threshold=10)
+        type_, blob = serde.dumps_typed({"draft": "x" * 1000})
+        self.assertTrue(type_.endswith(("+zstd", "+zlib")))
+        self.assertLess(len(blob), 200)
+        self.assertEqual(serde.loads_typed((type_, blob)), {"draft": "x" * 1000})
+        # Uncompressed rows written by the stock serializer still load
+        self.assertEqual(serde.loads_typed(SqliteSaver(sqlite3.connect(":memory:")).serde.dumps_typed([1, 2])), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import unittest
+
+from executor import RunExecutor
+from tests.conftest import pipeline_graph
+
+
+def wait_idle(executor, thread_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while executor.is_busy(thread_id):
+        if time.monotonic() > deadline:
+            raise TimeoutError(thread_id)
+        time.sleep(0.01)
+
+
+class TestRunExecutor(unittest.TestCase):
+
+    def test_runs_until_interrupt_then_resumes_with_update(self):
+        app = pipeline_graph()
+        executor = RunExecutor(app)
+        config = {"configurable": {"thread_id": "t"}}
+
+        executor.submit("t", input={"topic": "AI"})
+        wait_idle(executor, "t")
+        progress = executor.progress("t")
+        self.assertEqual(progress["status"], "waiting")
+        self.assertEqual(progress["next"], ["researcher"])
+        self.assertEqual(progress["events"][0]["node"], "planner")
+
+        executor.submit("t", update={"plan": ["Edited"]})
+        wait_idle(executor, "t")
+        self.assertEqual(executor.progress("t")["status"], "done")
+        self.assertEqual(app.get_state(config).values["research_data"], ["data for Edited"])
+        executor.shutdown()
+
+    def test_threads_run_concurrently_without_blocking_caller(self):
+        app = pipeline_graph(delay=0.3)
+        executor = RunExecutor(app, max_workers=4)
+
+        start = time.monotonic()
+        for i in range(4):
+            executor.submit(f"t{i}", input={"topic": f"T{i}"})
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertTrue(executor.is_busy("t0"))
+        for i in range(4):
+            wait_idle(executor, f"t{i}")
+        self.assertLess(time.monotonic() - start, 1.0)
+        executor.shutdown()
+
+    def test_error_is_reported(self):
+        executor = RunExecutor(pipeline_graph())
+        executor.submit("t", input={"topic": "AI"})
+        wait_idle(executor, "t")
+        executor.submit("t", update={"plan": ["boom"]})
+        wait_idle(executor, "t")
+
+        progress = executor.progress("t")
+        self.assertEqual(progress["status"], "error")
+        self.assertIn("search exploded", progress["error"])
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+os.environ.setdefault("TAVILY_API_KEY", "fake")
+
+from fakes import FakeLLM, FakeSearch, FakeServiceError
+from nodes import EditorFeedback, ResearchPlan
+
+
+class TestFakes(unittest.TestCase):
+
+    def test_llm_is_deterministic_and_stream_matches_invoke(self):
+        llm = FakeLLM(latency=0, tokens=30, sections=0)
+        reply = llm.invoke("prompt").content
+        self.assertEqual(reply, FakeLLM(latency=0, tokens=30, sections=0).invoke("prompt").content)
+        self.assertEqual("".join(c.content for c in llm.stream("prompt")), reply)
+        self.assertEqual(len(reply.split()), 30)
+        self.assertNotEqual(reply, llm.invoke("other prompt").content)
+        self.assertEqual(FakeLLM(latency=0, tokens=40, sections=4).invoke("prompt").content.count("## Section"), 4)
+
+    def test_structured_output_fills_schema(self):
+        llm = FakeLLM(latency=0, plan_questions=3, approve_rate=1.0)
+        self.assertEqual(len(llm.with_structured_output(ResearchPlan).invoke("p").questions), 3)
+        feedback = llm.with_structured_output(EditorFeedback).invoke("p")
+        self.assertTrue(feedback.approved)
+        self.assertFalse(feedback.research_needed)
+        # Structured views count against the parent client
+        self.assertEqual(llm.calls, 2)
+
+    def test_failure_rate(self):
+        llm = FakeLLM(latency=0, failure_rate=1.0)
+        with self.assertRaises(FakeServiceError):
+            llm.with_structured_output(ResearchPlan).invoke("p")
+        self.assertEqual(llm.failures, 1)
+
+    def test_search_shape(self):
+        result = FakeSearch(latency=0, results=2).invoke("query")
+        self.assertEqual(len(result["results"]), 2)
+        self.assertEqual(result, FakeSearch(latency=0, results=2).invoke("query"))
+
+    def test_full_graph_run(self):
+        from backends import app_config
+        from graph import workflow
+
+        graph = workflow.compile(checkpointer=InMemorySaver(), interrupt_before=app_config()["interrupt_before"])
+        config = {"configurable": {"thread_id": "fake-run"}}
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch("nodes.llm", FakeLLM(latency=0, approve_rate=0.5)), \
+                patch("nodes.search", FakeSearch(latency=0)), \
+                patch("nodes.QA_INDEX_DIR", os.path.join(tmp, "qa")):
+            os.chdir(tmp)
+            try:
+                graph.invoke({"topic": "fake topic"}, config)
+                while graph.get_state(config).next:
+                    graph.invoke(None, config)
+                values = graph.get_state(config).values
+                self.assertTrue(os.path.exists(values["report_path"]))
+            finally:
+                os.chdir(cwd)
+        self.assertGreaterEqual(values["revision_count"], 1)
+        self.assertEqual(len(values["research_data"]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
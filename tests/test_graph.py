@@ -1,15 +1,19 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import os
+import time
 from pydantic import BaseModel
+from langchain_core.messages import AIMessageChunk
+from langgraph.graph import StateGraph, END
 
 # Mock env
 os.environ["OPENAI_API_KEY"] = "fake"
 os.environ["TAVILY_API_KEY"] = "fake"
 
 from state import AgentState
-from nodes import planner_node, editor_node
+from nodes import planner_node, editor_node, researcher_node, writer_node, qa_node
 from graph import router_logic
+import nodes
 
 class TestProductionGraph(unittest.TestCase):
 
@@ -50,5 +54,188 @@ class TestProductionGraph(unittest.TestCase):
             self.assertTrue(result["approved"])
             self.assertEqual(result["next_node"], "publisher")
 
+    def test_researcher_parallel_plan_order(self):
+        mock_search = MagicMock()
+        # Earlier questions finish last; output must still follow the plan
+        delays = {"Q1": 0.3, "Q2": 0.2, "Q3": 0.1, "Q4": 0.0}
+        def slow_invoke(question):
+            time.sleep(delays[question])
+            return f"result for {question}"
+        mock_search.invoke.side_effect = slow_invoke
+
+        with patch('nodes.search', mock_search), patch('nodes.RESEARCH_MAX_CONCURRENCY', 4):
+            state = AgentState(topic="AI", plan=["Q1", "Q2", "Q3", "Q4"])
+            start = time.monotonic()
+            result = researcher_node(state)
+            elapsed = time.monotonic() - start
+
+        self.assertEqual([r.split("\n")[0] for r in result["research_data"]], ["Q: Q1", "Q: Q2", "Q: Q3", "Q: Q4"])
+        self.assertLess(elapsed, 0.55)
+
+    def test_researcher_timeout_drops_question(self):
+        mock_search = MagicMock()
+        def invoke(question):
+            if question == "slow":
+                time.sleep(0.5)
+            return "ok"
+        mock_search.invoke.side_effect = invoke
+
+        with patch('nodes.search', mock_search), patch('nodes.RESEARCH_TIMEOUT', 0.1):
+            state = AgentState(topic="AI", plan=["slow", "fast"])
+            result = researcher_node(state)
+
+        self.assertEqual(result["research_data"], ["Q: fast\nA: ok"])
+
+    def test_researcher_dedupes_sources(self):
+        shared = {"url": "https://example.com/attention", "title": "Attention", "content": "Attention weights sum to one.", "score": 0.9}
+        mock_search = MagicMock()
+        mock_search.invoke.side_effect = lambda q: {"results": [shared, {"url": f"https://{q}.org", "title": q, "content": f"About {q}.", "score": 0.5}]}
+        earlier = "Q: Q0\nA: [1] Old (https://old.org/page)\nOld text."
+
+        with patch('nodes.search', mock_search):
+            result = researcher_node(AgentState(topic="AI", plan=["Q1", "Q2"], research_data=[earlier]))
+
+        self.assertEqual(result["research_data"], [
+            "Q: Q1\nA: [1] Attention (https://example.com/attention)\nAttention weights sum to one.\n\n[2] Q1 (https://Q1.org)\nAbout Q1.",
+            "Q: Q2\nA: [1] Q2 (https://Q2.org)\nAbout Q2.",
+        ])
+
+    def test_writer_streams_tokens(self):
+        mock_llm = MagicMock()
+        mock_llm.stream.return_value = iter([AIMessageChunk(content="# Title\n"), AIMessageChunk(content="Body \\(x\\)")])
+
+        workflow = StateGraph(AgentState)
+        workflow.add_node("writer", writer_node)
+        workflow.set_entry_point("writer")
+        workflow.add_edge("writer", END)
+        graph = workflow.compile()
+
+        with patch('nodes.llm', mock_llm):
+            events = list(graph.stream({"topic": "AI"}, stream_mode=["custom", "values"]))
+
+        tokens = [payload["token"] for mode, payload in events if mode == "custom"]
+        self.assertEqual(tokens, ["# Title\n", "Body \\(x\\)"])
+        final = [payload for mode, payload in events if mode == "values"][-1]
+        self.assertEqual(final["draft"], "# Title\nBody $x$")
+        self.assertEqual(final["revision_count"], 1)
+
+    def test_editor_reviews_whole_draft_and_flags_sections(self):
+        draft = "\n\n".join(f"## Part {i}\n" + "word " * 400 for i in range(6))
+        mock_llm = MagicMock()
+        class MockEditor(BaseModel):
+            approved: bool = False
+            feedback: str = "Fix part 5"
+            research_needed: bool = False
+            sections: list = []
+        mock_llm.with_structured_output.return_value.invoke.side_effect = [
+            MockEditor(), MockEditor(sections=[nodes.SectionFeedback(index=5, feedback="Add math")])
+        ]
+
+        with patch('nodes.llm', mock_llm), patch('nodes.EDITOR_REVIEW_CHARS', 8000):
+            result = editor_node(AgentState(topic="AI", draft=draft))
+
+        # Beyond the old 4000-char cut-off: the last section is reviewed, in a second call
+        prompts = [c.args[0][1].content for c in mock_llm.with_structured_output.return_value.invoke.call_args_list]
+        self.assertEqual(len(prompts), 2)
+        self.assertIn("## Part 5", prompts[1].split("Sections under review:")[1])
+        self.assertEqual(result["section_feedback"], [{"index": 5, "heading": "## Part 5", "feedback": "Add math"}])
+        self.assertEqual(len(result["reviewed_sections"]), 5)
+        self.assertEqual(result["next_node"], "writer")
+
+    def test_writer_revises_only_flagged_sections(self):
+        draft = "## A\nalpha\n\n## B\nbeta\n\n## C\ngamma\n"
+        mock_llm = MagicMock()
+        mock_llm.stream.return_value = iter([AIMessageChunk(content="## B\nbeta with \\(x\\)")])
+        state = AgentState(topic="AI", draft=draft, revision_count=1,
+                           section_feedback=[{"index": 1, "heading": "## B", "feedback": "Add math"}])
+
+        with patch('nodes.llm', mock_llm):
+            result = writer_node(state)
+
+        self.assertEqual(mock_llm.stream.call_count, 1)
+        prompt = mock_llm.stream.call_args.args[0][1].content
+        self.assertIn("CURRENT SECTION:\n    ## B\nbeta", prompt)
+        self.assertNotIn("gamma", prompt)
+        self.assertEqual(result["draft"], "## A\nalpha\n\n## B\nbeta with $x$\n\n## C\ngamma\n")
+        self.assertEqual(result["section_feedback"], [])
+
+    def test_editor_skips_reviewed_sections(self):
+        from sections import section_hash, split_sections
+        draft = "## A\nalpha\n\n## B\nbeta\n"
+        mock_llm = MagicMock()
+        class MockEditor(BaseModel):
+            approved: bool = True
+            feedback: str = "OK"
+            research_needed: bool = False
+        mock_llm.with_structured_output.return_value.invoke.return_value = MockEditor()
+        state = AgentState(topic="AI", draft=draft, reviewed_sections=[section_hash(split_sections(draft)[0])])
+
+        with patch('nodes.llm', mock_llm):
+            result = editor_node(state)
+
+        prompt = mock_llm.with_structured_output.return_value.invoke.call_args.args[0][1].content
+        body = prompt.split("Sections under review:")[1]
+        self.assertIn("beta", body)
+        self.assertNotIn("alpha", body)
+        self.assertTrue(result["approved"])
+        self.assertEqual(len(result["reviewed_sections"]), 2)
+
+    def test_editor_detects_convergence(self):
+        draft = "## A\n" + " ".join(f"word{i}" for i in range(300))
+        mock_llm = MagicMock()
+        class MockEditor(BaseModel):
+            approved: bool = False
+            feedback: str = "Needs more rigorous derivations in the main section"
+            research_needed: bool = False
+        mock_llm.with_structured_output.return_value.invoke.return_value = MockEditor()
+
+        with patch('nodes.llm', mock_llm):
+            first = editor_node(AgentState(topic="AI", draft=draft, revision_count=1))
+            # Same draft again, same complaint: another writer pass would not help
+            second = editor_node(AgentState(topic="AI", draft=draft, revision_count=2, critique=first["critique"],
+                                            draft_signature=first["draft_signature"],
+                                            convergence_log=first["convergence_log"]))
+
+        self.assertFalse(first["converged"])
+        self.assertEqual(first["convergence_log"][0]["draft_similarity"], None)
+        self.assertTrue(second["converged"])
+        self.assertEqual(len(second["convergence_log"]), 2)
+        decision = second["convergence_log"][-1]
+        self.assertEqual(decision["draft_similarity"], 1.0)
+        self.assertTrue(decision["feedback_repeated"])
+        self.assertEqual(decision["route"], "publisher")
+        self.assertEqual(router_logic(AgentState(topic="AI", revision_count=2, next_node="writer", converged=True)), "publisher")
+
+    def test_editor_keeps_revising_changed_drafts(self):
+        draft_a = "## A\n" + " ".join(f"alpha{i}" for i in range(300))
+        draft_b = "## A\n" + " ".join(f"beta{i}" for i in range(300))
+        mock_llm = MagicMock()
+        feedback = iter(["Expand the proofs of lemma one", "Clarify notation used for tensors"])
+        class MockEditor(BaseModel):
+            approved: bool = False
+            feedback: str
+            research_needed: bool = False
+        mock_llm.with_structured_output.return_value.invoke.side_effect = lambda *a, **k: MockEditor(feedback=next(feedback))
+
+        with patch('nodes.llm', mock_llm):
+            first = editor_node(AgentState(topic="AI", draft=draft_a, revision_count=1))
+            second = editor_node(AgentState(topic="AI", draft=draft_b, revision_count=2, critique=first["critique"],
+                                            draft_signature=first["draft_signature"]))
+
+        self.assertFalse(second["converged"])
+        self.assertLess(second["convergence_log"][-1]["draft_similarity"], 0.5)
+        self.assertEqual(router_logic(AgentState(topic="AI", revision_count=2, next_node=second["next_node"])), "writer")
+
+    def test_qa_streams_to_callback(self):
+        mock_llm = MagicMock()
+        mock_llm.stream.return_value = iter([AIMessageChunk(content="Hel"), AIMessageChunk(content="lo")])
+        seen = []
+
+        with patch('nodes.llm', mock_llm):
+            result = qa_node(AgentState(topic="AI", draft="report"), "hi?", on_token=seen.append)
+
+        self.assertEqual(seen, ["Hel", "lo"])
+        self.assertEqual(result["chat_history"][-1], {"role": "assistant", "content": "Hello"})
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from backends import clients
+from batch import AutoApprove
+import jobqueue
+from jobqueue import JobQueue
+from progress import ProgressStore
+from worker import Worker
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.jobs = JobQueue(os.path.join(self.tmp.name, "jobs.sqlite"), lease=60, max_attempts=2, retry_delay=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_one_active_job_per_thread(self):
+        job_id = self.jobs.enqueue("t1", {"topic": "AI"})
+        with self.assertRaises(ValueError):
+            self.jobs.enqueue("t1", {"topic": "AI"})
+        job = self.jobs.claim("w1")
+        self.assertEqual((job["id"], job["input"], job["attempts"]), (job_id, {"topic": "AI"}, 1))
+        self.assertIsNone(self.jobs.claim("w2"))
+
+        self.assertTrue(self.jobs.park(job_id, "w1", "researcher", "ckpt-1"))
+        self.assertEqual(self.jobs.resume("t1", {"plan": ["Q1"]}), job_id)
+        job = self.jobs.claim("w2")
+        self.assertEqual((job["command"], job["state_update"], job["checkpoint_id"]), ("resume", {"plan": ["Q1"]}, "ckpt-1"))
+        self.assertTrue(self.jobs.complete(job_id, "w2"))
+        # Finished jobs do not block a new one for the same thread
+        self.assertNotEqual(self.jobs.resume("t1"), job_id)
+
+    def test_cli_rejects_a_second_active_job(self):
+        db = os.path.join(self.tmp.name, "jobs.sqlite")
+        with redirect_stdout(io.StringIO()):
+            jobqueue.main(["--db", db, "start", "AI", "--thread-id", "t1"])
+        with self.assertRaises(SystemExit) as ctx:
+            jobqueue.main(["--db", db, "resume", "t1"])
+        self.assertEqual(ctx.exception.code, "error: Thread t1 already has an active job")
+
+    def test_expired_lease_is_claimed_by_another_worker(self):
+        self.jobs.lease = 0.05
+        job_id = self.jobs.enqueue("t1", {"topic": "AI"})
+        self.jobs.claim("dead")
+        time.sleep(0.1)
+        self.assertEqual(self.jobs.claim("w2")["id"], job_id)
+        self.assertFalse(self.jobs.heartbeat(job_id, "dead"))
+        self.assertFalse(self.jobs.complete(job_id, "dead"))
+        self.assertTrue(self.jobs.heartbeat(job_id, "w2"))
+
+        # Second expiry uses up the last attempt
+        time.sleep(0.1)
+        self.assertIsNone(self.jobs.claim("w3"))
+        self.assertEqual(self.jobs.get(job_id)["status"], "failed")
+
+    def test_failed_job_is_retried_then_failed(self):
+        job_id = self.jobs.enqueue("t1", {"topic": "AI"})
+        job = self.jobs.claim("w1")
+        self.jobs.fail(job_id, "w1", "boom", job["attempts"])
+        job = self.jobs.claim("w1")
+        self.assertEqual((job["id"], job["error"]), (job_id, "boom"))
+        self.jobs.fail(job_id, "w1", "boom again", job["attempts"])
+        self.assertIsNone(self.jobs.claim("w1"))
+        self.assertEqual(self.jobs.counts(), {"failed": 1})
+
+
+class TestWorker(unittest.TestCase):
+
+    def setUp(self):
+        from graph import build_app
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(clients.configure, None)
+        patches = [patch("nodes.QA_INDEX_DIR", os.path.join(self.tmp.name, "qa")),
+                   patch("nodes.progress", ProgressStore(os.path.join(self.tmp.name, "progress.sqlite")))]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        # Reports are written to the working directory
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        self.app = build_app({"llm": "fake", "search": "fake", "checkpointer": "memory",
+                              "llm_options": {"latency": 0, "approve_rate": 1.0}, "search_options": {"latency": 0}})
+        self.jobs = JobQueue(os.path.join(self.tmp.name, "jobs.sqlite"), lease=60)
+
+    def run_worker(self, **kwargs):
+        worker = Worker(self.app, self.jobs, concurrency=4, poll_interval=0.01, **kwargs)
+        return asyncio.run(worker.run(until_idle=True))
+
+    def next_node(self, thread_id):
+        return self.app.get_state({"configurable": {"thread_id": thread_id}}).next
+
+    def test_jobs_park_at_interrupts_until_resumed(self):
+        for i in range(3):
+            self.jobs.enqueue(f"t{i}", {"topic": f"topic {i}"})
+        self.assertEqual(self.run_worker()["parked"], 3)
+        self.assertEqual(self.jobs.counts(), {"parked": 3})
+        self.assertEqual(self.next_node("t0"), ("researcher",))
+
+        # Nothing moves until approval arrives; the update is applied before resuming
+        self.jobs.resume("t0", {"plan": ["Q1?", "Q2?", "Q3?"]})
+        self.run_worker()
+        state = self.app.get_state({"configurable": {"thread_id": "t0"}})
+        self.assertEqual(state.next, ("publisher",))
+        self.assertEqual(len(state.values["research_data"]), 3)
+        self.assertEqual(self.next_node("t1"), ("researcher",))
+
+        self.jobs.resume("t0")
+        self.run_worker()
+        self.assertEqual(self.jobs.active("t0"), None)
+        self.assertTrue(self.app.get_state({"configurable": {"thread_id": "t0"}}).values["report_path"])
+
+    def test_dead_workers_job_is_resumed(self):
+        self.jobs.lease = 0.05
+        job_id = self.jobs.enqueue("t1", {"topic": "crash"})
+        self.jobs.claim("dead")
+        time.sleep(0.1)
+        stats = self.run_worker(policy=AutoApprove())
+        self.assertEqual(stats["done"], 1)
+        self.assertEqual(self.jobs.get(job_id)["attempts"], 2)
+
+    def test_stopped_worker_releases_its_jobs(self):
+        job_id = self.jobs.enqueue("t1", {"topic": "stop"})
+        worker = Worker(self.app, self.jobs, poll_interval=0.01)
+
+        async def main():
+            stop = asyncio.Event()
+            run = asyncio.create_task(worker.run(stop=stop))
+            while not worker._running:
+                await asyncio.sleep(0)
+            stop.set()
+            await run
+
+        asyncio.run(main())
+        job = self.jobs.get(job_id)
+        self.assertEqual((job["status"], job["attempts"]), ("queued", 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import contextvars
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest.mock import patch
+from urllib.request import urlopen
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from fakes import FakeLLM, FakeSearch
+from metrics import Instrumented, Telemetry, instrument_node, read_spans, start_metrics_server, thread_breakdown
+from ratelimit import RateLimiter, Throttled
+from state import AgentState
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.trace = os.path.join(self.tmp.name, "spans.jsonl")
+        self.telemetry = Telemetry(self.trace)
+
+    def tearDown(self):
+        self.telemetry.close()
+        self.tmp.cleanup()
+
+    def build(self):
+        llm = Instrumented(Throttled(FakeLLM(latency=0, tokens=20), RateLimiter(6000)), "llm", self.telemetry)
+        search = Instrumented(FakeSearch(latency=0), "search", self.telemetry)
+
+        def planner(state: AgentState):
+            return {"plan": llm.with_structured_output(_Plan).invoke("plan " + state.topic).questions}
+
+        def researcher(state: AgentState):
+            with ThreadPoolExecutor(2) as pool:
+                futures = [pool.submit(contextvars.copy_context().run, search.invoke, q) for q in state.plan]
+                return {"research_data": [str(f.result()) for f in futures]}
+
+        def writer(state: AgentState, config: RunnableConfig):
+            draft = "".join(c.content for c in llm.stream("write " + config["configurable"]["thread_id"]))
+            return {"draft": draft}
+
+        workflow = StateGraph(AgentState)
+        for name, fn in (("planner", planner), ("researcher", researcher), ("writer", writer)):
+            workflow.add_node(name, instrument_node(name, fn, self.telemetry))
+        workflow.set_entry_point("planner")
+        workflow.add_edge("planner", "researcher")
+        workflow.add_edge("researcher", "writer")
+        workflow.add_edge("writer", END)
+        return workflow.compile(checkpointer=InMemorySaver())
+
+    def test_spans_and_breakdown(self):
+        self.build().invoke({"topic": "AI"}, {"configurable": {"thread_id": "t1"}})
+        self.build().invoke({"topic": "ML"}, {"configurable": {"thread_id": "t2"}})
+
+        spans = read_spans(self.trace, "t1")
+        self.assertEqual({s["attributes"]["thread_id"] for s in spans}, {"t1"})
+        names = [s["name"] for s in spans]
+        self.assertEqual(names.count("search invoke"), 4)
+        self.assertIn("llm stream", names)
+
+        # Calls are children of their node span, including searches run on the researcher's pool
+        node_ids = {s["attributes"]["node"]: s["spanId"] for s in spans if s["name"].startswith("node")}
+        for span in spans:
+            if span["name"] == "search invoke":
+                self.assertEqual(span["parentSpanId"], node_ids["researcher"])
+        writer = next(s for s in spans if s["name"] == "node writer")
+        self.assertGreater(writer["attributes"]["completion_tokens"], 0)
+        stream = next(s for s in spans if s["name"] == "llm stream")
+        # Rate-limit waits are reported by Throttled underneath the instrumented client
+        self.assertIn("wait_seconds", stream["attributes"])
+        self.assertEqual(stream["parentSpanId"], writer["spanId"])
+
+        rows = {r["node"]: r for r in thread_breakdown(spans)}
+        self.assertEqual(rows["researcher"]["search_calls"], 4)
+        self.assertEqual(rows["planner"]["llm_calls"], 1)
+
+    def test_prometheus_export(self):
+        self.build().invoke({"topic": "AI"}, {"configurable": {"thread_id": "t1"}})
+        text = self.telemetry.prometheus()
+        self.assertIn('research_span_duration_seconds_count{kind="node",node="writer",name="writer",outcome="ok"} 1', text)
+        self.assertIn('research_span_duration_seconds_count{kind="search",node="researcher",name="invoke",outcome="ok"} 4', text)
+        self.assertIn('research_prompt_tokens_total{kind="llm",node="planner"}', text)
+        # Thread ids never become labels
+        self.assertNotIn("t1", text)
+
+    def test_metrics_server_binds_localhost_by_default(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("METRICS_HOST", None)
+            server = start_metrics_server(0, self.telemetry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        self.assertEqual(host, "127.0.0.1")
+        with urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            self.assertEqual(response.status, 200)
+
+    def test_errors_are_recorded(self):
+        llm = Instrumented(FakeLLM(latency=0, failure_rate=1.0), "llm", self.telemetry)
+        with self.assertRaises(Exception):
+            llm.invoke("prompt")
+        span = json.loads(open(self.trace).readline())
+        self.assertEqual(span["status"]["code"], "ERROR")
+        self.assertEqual(span["attributes"]["node"], "qa")
+
+    def test_trace_file_rotates(self):
+        telemetry = Telemetry(self.trace, max_bytes=2000)
+        for i in range(20):
+            with telemetry.span("llm", "invoke", node="qa", thread_id="t1"):
+                pass
+        telemetry.close()
+        self.assertTrue(os.path.exists(self.trace + ".1"))
+        self.assertLess(os.path.getsize(self.trace), 2000)
+
+    def test_read_spans_indexes_appended_lines(self):
+        telemetry = Telemetry(self.trace)
+        for thread_id in ("t1", "t2", "t1"):
+            with telemetry.span("llm", "invoke", node="qa", thread_id=thread_id):
+                pass
+        self.assertEqual(len(read_spans(self.trace, "t1")), 2)
+        with telemetry.span("llm", "invoke", node="qa", thread_id="t1"):
+            pass
+        telemetry.close()
+        self.assertEqual(len(read_spans(self.trace, "t1")), 3)
+        self.assertEqual(len(read_spans(self.trace, "t1", limit=1)), 1)
+        self.assertEqual(len(read_spans(self.trace)), 4)
+
+
+class _Plan(BaseModel):
+    questions: List[str]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+os.environ.setdefault("TAVILY_API_KEY", "fake")
+
+from checkpointing import create_checkpointer
+from fakes import FakeLLM, FakeSearch
+from prefetch import SearchPrefetcher
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_stage_take_and_discard(self):
+        gate = threading.Event()
+        calls = []
+
+        def search(question, thread_id):
+            calls.append(question)
+            gate.wait(1)
+            return f"results for {question}"
+
+        prefetcher = SearchPrefetcher(search, max_workers=1)
+        prefetcher.stage("t1", ["Q1", "Q2", "Q3"])
+        prefetcher.stage("t1", ["q1 "])  # same question after normalization: not staged twice
+        self.assertEqual(prefetcher.pending("t1"), 3)
+
+        future = prefetcher.take("t1", "Q1")
+        gate.set()
+        self.assertEqual(future.result(1), "results for Q1")
+        self.assertIsNone(prefetcher.take("t2", "Q2"))
+        self.assertEqual(prefetcher.discard("t1"), 2)
+        self.assertEqual(prefetcher.pending(), 0)
+        prefetcher.shutdown()
+
+    def test_abandoned_speculation_expires(self):
+        prefetcher = SearchPrefetcher(lambda q, t: q, ttl=0.05)
+        prefetcher.stage("t1", ["Q1"])
+        time.sleep(0.1)
+        self.assertIsNone(prefetcher.take("t1", "Q1"))
+        self.assertEqual(prefetcher.stats["expired"], 1)
+        prefetcher.shutdown()
+
+    def test_idle_prefetcher_collects_expired_speculation(self):
+        prefetcher = SearchPrefetcher(lambda q, t: q, ttl=0.05)
+        prefetcher.stage("t1", ["Q1", "Q2"])
+        # Nothing else is staged or taken; the timer drops them
+        time.sleep(0.2)
+        self.assertEqual(prefetcher.pending(), 0)
+        self.assertEqual(prefetcher.stats["expired"], 2)
+        self.assertIsNone(prefetcher._timer)
+        prefetcher.shutdown()
+
+    def test_graph_uses_staged_results_for_unchanged_questions(self):
+        import nodes
+        from backends import app_config, clients
+        from graph import workflow
+
+        search = FakeSearch(latency=0)
+        prefetcher = SearchPrefetcher(lambda q, t: search.invoke(q))
+        live = []
+
+        def live_search(question):
+            live.append(question)
+            return search.invoke(question)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            clients.configure(app_config(checkpoint_db=os.path.join(tmp, "c.sqlite")))
+            self.addCleanup(clients.configure, None)
+            saver = create_checkpointer(os.path.join(tmp, "c.sqlite"))
+            saver.listeners.append(prefetcher.on_checkpoint)
+            graph = workflow.compile(checkpointer=saver, interrupt_before=app_config()["interrupt_before"])
+            config = {"configurable": {"thread_id": "p1"}}
+            with patch("nodes.prefetcher", prefetcher), patch("nodes.llm", FakeLLM(latency=0)), \
+                    patch.object(nodes.search, "invoke", side_effect=live_search):
+                graph.invoke({"topic": "AI"}, config)
+                plan = graph.get_state(config).values["plan"]
+                self.assertEqual(prefetcher.pending("p1"), 4)
+
+                # The reviewer edits one question before approving
+                edited = plan[:3] + ["An edited question?"]
+                graph.update_state(config, {"plan": edited})
+                self.assertEqual(prefetcher.pending("p1"), 5)
+                graph.invoke(None, config, interrupt_after=["researcher"])
+
+            values = graph.get_state(config).values
+            saver.close()
+
+        self.assertEqual([r.split("\n")[0] for r in values["research_data"]], [f"Q: {q}" for q in edited])
+        self.assertEqual(live, [])
+        self.assertEqual(prefetcher.stats["used"], 4)
+        # Speculation on the question edited out of the plan was cancelled
+        self.assertEqual(prefetcher.stats["discarded"], 1)
+        self.assertEqual(prefetcher.pending(), 0)
+        prefetcher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
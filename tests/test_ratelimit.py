@@ -0,0 +1,107 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ratelimit import RateLimiter, Throttled, is_rate_limit_error
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("Error code: 429 - rate limit reached")
+        self.response = MagicMock(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_no_wait_under_limit(self):
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        start = time.monotonic()
+        for _ in range(5):
+            self.assertEqual(limiter.acquire(tokens=100), 0.0)
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_waits_when_bucket_empty(self):
+        # 1200 rpm -> one request every 50ms once the burst is spent
+        limiter = RateLimiter(requests_per_minute=1200)
+        limiter.requests.drain()
+        waited = limiter.acquire()
+        self.assertGreater(waited, 0.03)
+
+    def test_retries_429_with_retry_after(self):
+        limiter = RateLimiter(requests_per_minute=6000, base_backoff=0.01)
+        fn = MagicMock(side_effect=[RateLimitError(retry_after="0.05"), "ok"])
+
+        start = time.monotonic()
+        self.assertEqual(limiter.call(fn, "x"), "ok")
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(fn.call_count, 2)
+
+    def test_gives_up_after_max_retries(self):
+        limiter = RateLimiter(requests_per_minute=6000, max_retries=2, base_backoff=0.001)
+        fn = MagicMock(side_effect=RateLimitError())
+        with self.assertRaises(RateLimitError):
+            limiter.call(fn)
+        self.assertEqual(fn.call_count, 3)
+
+    def test_other_errors_not_retried(self):
+        limiter = RateLimiter(requests_per_minute=6000)
+        fn = MagicMock(side_effect=ValueError("bad input"))
+        with self.assertRaises(ValueError):
+            limiter.call(fn)
+        fn.assert_called_once()
+        self.assertFalse(is_rate_limit_error(ValueError("bad input")))
+        # The digits alone are not a rate limit: ports, byte counts, request ids...
+        self.assertFalse(is_rate_limit_error(ConnectionError("connection to 10.0.0.1:4290 refused")))
+        self.assertFalse(is_rate_limit_error(ValueError("request req_4291 failed: 429 bytes written")))
+        self.assertTrue(is_rate_limit_error(RuntimeError("HTTP 429 Too Many Requests")))
+        self.assertTrue(is_rate_limit_error(type("RateLimitError", (Exception,), {})("slow down")))
+
+    def test_throttled_structured_output(self):
+        limiter = RateLimiter(requests_per_minute=6000)
+        client = MagicMock()
+        client.with_structured_output.return_value.invoke.return_value = "parsed"
+
+        with patch.object(limiter, "acquire", wraps=limiter.acquire) as acquire:
+            result = Throttled(client, limiter).with_structured_output(dict).invoke(["hello"])
+
+        self.assertEqual(result, "parsed")
+        acquire.assert_called_once()
+
+    def test_stream_retries_429_before_first_chunk(self):
+        limiter = RateLimiter(requests_per_minute=6000, base_backoff=0.001)
+        calls = []
+
+        def stream(payload):
+            calls.append(payload)
+            if len(calls) == 1:
+                raise RateLimitError()
+            yield "a"
+            yield "b"
+
+        client = MagicMock(stream=stream)
+        self.assertEqual(list(Throttled(client, limiter).stream("x")), ["a", "b"])
+        self.assertEqual(len(calls), 2)
+        self.assertGreater(limiter.blocked_until, 0)
+
+    def test_stream_error_after_first_chunk_propagates(self):
+        limiter = RateLimiter(requests_per_minute=6000, base_backoff=0.001)
+        calls = []
+
+        async def astream(payload):
+            calls.append(payload)
+            yield "a"
+            raise RateLimitError()
+
+        async def consume():
+            return [chunk async for chunk in Throttled(MagicMock(astream=astream), limiter).astream("x")]
+
+        with self.assertRaises(RateLimitError):
+            asyncio.run(consume())
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
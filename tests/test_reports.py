@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import reports
+from reports import ReportStore, parse_segments
+from state import AgentState
+
+REPORT = "# Title\n\nIntro text.\n\n![Chart](charts/a.png)\n\nMore text.\n"
+
+
+class TestParseSegments(unittest.TestCase):
+
+    def test_splits_text_and_images_in_order(self):
+        segments = parse_segments(REPORT)
+        self.assertEqual([s["type"] for s in segments], ["markdown", "image", "markdown"])
+        self.assertEqual(segments[1], {"type": "image", "caption": "Chart", "path": "charts/a.png"})
+        self.assertEqual("".join(s.get("text", "") for s in segments), "# Title\n\nIntro text.\n\n\n\nMore text.\n")
+
+    def test_plain_markdown(self):
+        self.assertEqual(parse_segments("just text"), [{"type": "markdown", "text": "just text"}])
+        self.assertEqual(parse_segments(""), [])
+
+
+class TestReportStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = os.path.join(self.tmp.name, "checkpoints.sqlite")
+        self.store = ReportStore(os.path.join(self.tmp.name, "reports"), self.db)
+
+    def test_same_content_is_stored_once(self):
+        first = self.store.put("t1", "AI", REPORT)
+        self.assertEqual(self.store.put("t1", "AI", REPORT), first)
+        other = self.store.put("t2", "AI", REPORT)
+        self.assertEqual((other["version"], other["path"]), (1, first["path"]))
+        self.assertEqual(self.store.read(first["hash"]), REPORT)
+        self.assertEqual(self.store.segments(first["hash"]), parse_segments(REPORT))
+        # No temp files left behind by the atomic writes
+        leftovers = [f for _, _, files in os.walk(self.store.root) for f in files if f.startswith(".tmp-")]
+        self.assertEqual(leftovers, [])
+
+    def test_new_content_adds_a_version(self):
+        self.store.put("t1", "AI", REPORT)
+        second = self.store.put("t1", "AI", REPORT + "\nRevised.\n")
+        self.assertEqual(second["version"], 2)
+        self.assertEqual([r["version"] for r in self.store.versions("t1")], [1, 2])
+        self.assertEqual(self.store.latest("t1")["hash"], second["hash"])
+        self.assertEqual(len(self.store.by_topic("AI")), 2)
+        with self.assertRaises(KeyError):
+            self.store.read("0" * 64)
+
+    def test_compressed_round_trip(self):
+        store = ReportStore(os.path.join(self.tmp.name, "compressed"), self.db, compress=True)
+        row = store.put("t1", "AI", REPORT * 50)
+        self.assertTrue(row["path"].endswith((".zst", ".gz")))
+        self.assertLess(row["bytes"], len(REPORT * 50))
+        self.assertEqual(store.read(row["hash"]), REPORT * 50)
+
+        with patch("reports.zstandard", None):
+            gz = ReportStore(os.path.join(self.tmp.name, "gz"), self.db, compress=True)
+            row = gz.put("t2", "AI", REPORT)
+            self.assertTrue(row["path"].endswith(".md.gz"))
+            self.assertEqual(gz.read(row["hash"]), REPORT)
+
+    def test_missing_segments_are_parsed_again(self):
+        row = self.store.put("t1", "AI", REPORT)
+        os.remove(self.store._object(row["hash"], ".segments.json"))
+        self.assertEqual(self.store.segments(row["hash"]), parse_segments(REPORT))
+
+    def test_publisher_stores_report(self):
+        import nodes
+
+        state = AgentState(topic="AI", draft=REPORT)
+        config = {"configurable": {"thread_id": "t1"}}
+        with patch("nodes.reports", self.store), \
+                patch("nodes.QA_INDEX_DIR", os.path.join(self.tmp.name, "qa")), \
+                patch("nodes.publish_report_index"):
+            result = nodes.publisher_node(state, config)
+        self.assertTrue(result["approved"])
+        self.assertEqual(result["report_hash"], self.store.latest("t1")["hash"])
+        self.assertTrue(os.path.exists(result["report_path"]))
+
+    def test_concurrent_puts_get_distinct_versions(self):
+        # Two stores on one db, as in two processes publishing the same thread
+        other = ReportStore(self.store.root, self.db)
+        rows = []
+        def publish(store, n):
+            for i in range(n):
+                rows.append(store.put("t1", "AI", f"{REPORT}\n{id(store)}-{i}\n"))
+        workers = [threading.Thread(target=publish, args=(s, 10)) for s in (self.store, other)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        self.assertEqual(sorted(r["version"] for r in rows), list(range(1, 21)))
+        self.assertEqual([r["version"] for r in self.store.versions("t1")], list(range(1, 21)))
+
+    def test_memory_index(self):
+        store = ReportStore(os.path.join(self.tmp.name, "reports"), db=None)
+        first = store.put("t1", "AI", REPORT)
+        self.assertEqual(store.put("t1", "AI", REPORT + "\nRevised.\n")["version"], 2)
+        self.assertEqual(store.latest("t1")["version"], 2)
+        self.assertEqual(store.read(first["hash"]), REPORT)
+        self.assertFalse(os.path.exists(self.db))
+
+    def test_resolve_image_checks_existence(self):
+        image = os.path.join(self.tmp.name, "chart.png")
+        self.assertIsNone(reports.resolve_image(image))
+        # A miss is not cached, so the image shows up once it is written
+        open(image, "wb").close()
+        self.assertEqual(reports.resolve_image(image), os.path.abspath(image))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import retrieval
+from retrieval import BM25Index, ReportIndex, chunk_markdown, chunk_text, get_report_index, pack_context
+
+REPORT = """# Overview
+Intro text about the report.
+
+## Attention
+Scaled dot-product attention divides by the square root of the key dimension.
+
+## Optimisation
+Adam keeps running averages of gradients and squared gradients.
+"""
+
+
+class TestContextPacking(unittest.TestCase):
+
+    def test_chunk_text_respects_limit(self):
+        text = "First sentence here. " * 50 + "\n\nShort paragraph."
+        chunks = chunk_text(text, max_chars=100)
+        self.assertTrue(all(len(c) <= 100 for c in chunks))
+        self.assertEqual(chunks[-1], "Short paragraph.")
+
+    def test_bm25_ranks_relevant_document_first(self):
+        index = BM25Index([
+            "Cooking pasta requires boiling water.",
+            "Transformers use self attention over token sequences.",
+            "Attention heads compute softmax over query key products.",
+        ])
+        top = [i for i, _ in index.top_k("self attention transformers", 2)]
+        self.assertEqual(top[0], 1)
+        self.assertIn(2, top)
+
+    def test_bm25_stores_one_weight_per_document_term_pair(self):
+        index = BM25Index(["a a b", "b c", "d"])
+        self.assertEqual(len(index.values), 5)
+        self.assertEqual(index.doc_ids[index.indptr[index.vocab["b"]]:index.indptr[index.vocab["b"] + 1]].tolist(), [0, 1])
+        self.assertEqual(index.scores("zzz").tolist(), [0.0, 0.0, 0.0])
+
+    def test_pack_context_budget_and_dedup(self):
+        corpus = [
+            "Q: attention?\nA: Attention weights tokens by relevance.",
+            "Q: attention again?\nA: Attention weights tokens by relevance.",
+            "Q: cooking?\nA: " + "Pasta is boiled in salted water. " * 40,
+        ]
+        text, stats = pack_context(corpus, "attention tokens", token_budget=50)
+
+        self.assertIn("Attention weights tokens", text)
+        self.assertNotIn("Pasta", text)
+        self.assertEqual(stats["duplicates"], 1)
+        self.assertLessEqual(stats["tokens_used"], 50)
+        self.assertGreater(stats["tokens_dropped"], 0)
+
+    def test_pack_context_empty(self):
+        text, stats = pack_context([], "anything", token_budget=100)
+        self.assertEqual(text, "")
+        self.assertEqual(stats["chunks"], 0)
+
+
+
+class TestReportIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunk_markdown_by_heading(self):
+        chunks = chunk_markdown(REPORT)
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[1].startswith("## Attention"))
+
+    def test_chunk_markdown_keeps_code_blocks_whole(self):
+        report = REPORT + "\n```python\n# compute scores\nscores = q @ k.T\n```\n"
+        chunks = chunk_markdown(report)
+        # The code comment is not a heading: the block stays whole, under its section's heading
+        self.assertEqual([c.split("\n")[0] for c in chunks], ["# Overview", "## Attention", "## Optimisation", "## Optimisation"])
+        self.assertTrue(chunks[3].endswith("# compute scores\nscores = q @ k.T\n```"))
+
+    def test_search_returns_relevant_section(self):
+        index = ReportIndex.build(REPORT, ["Q: adam?\nA: Adam uses bias correction."])
+        hits = index.search("how does adam handle gradients", k=2)
+        self.assertTrue(any("Optimisation" in h for h in hits))
+        self.assertFalse(any("Attention" in h for h in hits))
+
+    def test_persisted_index_reused(self):
+        first = get_report_index(self.tmp.name, "thread/1", REPORT, [])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "thread_1.npz")))
+        self.assertIs(get_report_index(self.tmp.name, "thread/1"), first)
+
+        loaded = ReportIndex.load(os.path.join(self.tmp.name, "thread_1.npz"))
+        self.assertEqual(loaded.search("square root key dimension", k=1), first.search("square root key dimension", k=1))
+
+    def test_republished_index_is_reloaded(self):
+        first = get_report_index(self.tmp.name, "t1", REPORT, [])
+        # Another process replaces the file
+        ReportIndex.build("# Other\nSomething else entirely.", []).save(os.path.join(self.tmp.name, "t1.npz"))
+        reloaded = get_report_index(self.tmp.name, "t1")
+        self.assertIsNot(reloaded, first)
+        self.assertEqual(reloaded.search("something else", k=1), ["# Other\nSomething else entirely."])
+
+    def test_cache_is_bounded(self):
+        with patch("retrieval.QA_INDEX_CACHE_SIZE", 2):
+            for i in range(4):
+                get_report_index(self.tmp.name, f"t{i}", REPORT, [])
+            self.assertLessEqual(len(retrieval._index_cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
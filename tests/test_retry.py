@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, END
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+os.environ.setdefault("TAVILY_API_KEY", "fake")
+
+from fakes import FakeLLM, FakeServiceError
+from nodes import EditorFeedback, editor_node, researcher_node
+from progress import ProgressStore
+from retry import RetryError, RetryPolicy
+from state import AgentState
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_retries_transient_errors_then_succeeds(self):
+        fn = MagicMock(side_effect=[ConnectionError("reset"), TimeoutError(), "ok"])
+        with patch("retry.time.sleep") as sleep:
+            self.assertEqual(RetryPolicy(max_attempts=3, base_delay=1.0, jitter=0.5).call(fn), "ok")
+        delays = [c.args[0] for c in sleep.call_args_list]
+        self.assertTrue(0.5 <= delays[0] <= 1.0 and 1.0 <= delays[1] <= 2.0)
+
+    def test_gives_up_after_max_attempts(self):
+        fn = MagicMock(side_effect=FakeServiceError("down"))
+        with patch("retry.time.sleep"), self.assertRaises(RetryError) as ctx:
+            RetryPolicy(max_attempts=2).call(fn)
+        self.assertEqual((ctx.exception.attempts, fn.call_count), (2, 2))
+
+    def test_non_retryable_errors_propagate_immediately(self):
+        policy = RetryPolicy(max_attempts=5)
+        for error in (ValueError("bad input"), RateLimited("429 rate limit")):
+            fn = MagicMock(side_effect=error)
+            with self.assertRaises(type(error)):
+                policy.call(fn)
+            self.assertEqual(fn.call_count, 1)
+        server_error = Exception("boom")
+        server_error.status_code = 503
+        self.assertTrue(policy.is_retryable(server_error))
+        self.assertTrue(RetryPolicy(retry_on=(ValueError,)).is_retryable(ValueError()))
+
+    def test_stream_retries_only_before_first_chunk(self):
+        policy = RetryPolicy(max_attempts=3, base_delay=0)
+        opened = []
+
+        def stream(fail_after):
+            opened.append(fail_after)
+            if len(opened) == 1:
+                raise ConnectionError("reset")
+            yield "a"
+            if fail_after:
+                raise ConnectionError("reset mid-stream")
+            yield "b"
+
+        self.assertEqual(list(policy.stream(stream, False)), ["a", "b"])
+        self.assertEqual(len(opened), 2)
+
+        opened.clear()
+        chunks = []
+        with self.assertRaises(ConnectionError):
+            for chunk in policy.stream(stream, True):
+                chunks.append(chunk)
+        # Not reopened once a chunk was passed on, so nothing is repeated
+        self.assertEqual((chunks, len(opened)), (["a"], 2))
+
+
+class TestNodeRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.progress = ProgressStore(os.path.join(self.tmp.name, "progress.sqlite"))
+        patches = [patch("nodes.progress", self.progress), patch("nodes.retry_policy", RetryPolicy(base_delay=0))]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_researcher_records_failed_searches(self):
+        search = MagicMock()
+        calls = []
+
+        def invoke(question):
+            calls.append(question)
+            if question == "flaky" and calls.count("flaky") == 1:
+                raise ConnectionError("reset")
+            if question == "down":
+                raise FakeServiceError("unavailable")
+            return f"result for {question}"
+        search.invoke.side_effect = invoke
+
+        with patch("nodes.search", search):
+            result = researcher_node(AgentState(topic="AI", plan=["ok", "flaky", "down"]))
+
+        self.assertEqual([r.split("\n")[0] for r in result["research_data"]], ["Q: ok", "Q: flaky"])
+        self.assertEqual(len(result["failures"]), 1)
+        self.assertEqual(result["failures"][0]["item"], "down")
+        self.assertEqual(result["failures"][0]["attempts"], 3)
+
+    def test_resumed_editor_skips_finished_batches(self):
+        draft = "\n\n".join(f"## Part {i}\n" + ("words " * 200) for i in range(3))
+        llm = FakeLLM(latency=0, approve_rate=1.0)
+        structured = llm.with_structured_output(EditorFeedback)
+        reviews = []
+
+        def review(messages):
+            reviews.append(messages)
+            if len(reviews) == 2:
+                raise ValueError("process died")  # not retryable: the step fails
+            return structured.invoke(messages)
+
+        mock_llm = MagicMock()
+        mock_llm.with_structured_output.return_value.invoke.side_effect = review
+        workflow = StateGraph(AgentState)
+        workflow.add_node("editor", editor_node)
+        workflow.set_entry_point("editor")
+        workflow.add_edge("editor", END)
+        graph = workflow.compile(checkpointer=InMemorySaver())
+        config = {"configurable": {"thread_id": "resume"}}
+
+        with patch("nodes.llm", mock_llm), patch("nodes.EDITOR_REVIEW_CHARS", 1500):
+            with self.assertRaises(ValueError):
+                graph.invoke({"topic": "AI", "draft": draft}, config)
+            self.assertEqual(self.progress.count("resume"), 1)
+            graph.invoke(None, config)
+
+        # Batch 1 was reviewed again after the failure, batch 0 was not
+        self.assertEqual(len(reviews), 4)
+        self.assertEqual(reviews[1], reviews[2])
+        self.assertIn(graph.get_state(config).values["next_node"], ("writer", "researcher", "publisher"))
+
+        # Once a newer checkpoint is written, the step's memoized progress is dropped
+        self.progress.on_checkpoint({"configurable": {"thread_id": "resume"}}, {"id": "newer"}, {})
+        self.assertEqual(self.progress.count("resume"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+os.environ.setdefault("TAVILY_API_KEY", "fake")
+
+from fakes import FakeLLM, FakeSearch, FakeServiceError
+from metrics import Instrumented, Telemetry, read_spans, thread_breakdown
+from nodes import EditorFeedback, ResearchPlan
+from routing import ModelRouter, parse_routes
+
+
+class TestRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.telemetry = Telemetry(os.path.join(self.tmp.name, "spans.jsonl"))
+        self.small = FakeLLM(latency=0, model_name="small")
+        self.large = FakeLLM(latency=0, model_name="large")
+
+    def tearDown(self):
+        self.telemetry.close()
+        self.tmp.cleanup()
+
+    def router(self, route="cascade", **kwargs):
+        # Calls outside a graph run are routed as node "qa"
+        return ModelRouter(self.large, self.small, routes={"qa": route}, registry=self.telemetry, **kwargs)
+
+    def test_parse_routes(self):
+        self.assertEqual(parse_routes("planner=cascade, writer=LARGE,"), {"planner": "cascade", "writer": "large"})
+        with self.assertRaises(ValueError):
+            parse_routes("planner=medium")
+
+    def test_small_reply_is_kept(self):
+        plan = self.router().with_structured_output(ResearchPlan).invoke("plan")
+        self.assertEqual(len(plan.questions), 4)
+        self.assertEqual((self.small.calls, self.large.calls), (1, 0))
+
+    def test_escalates_on_parse_failure(self):
+        self.small.invalid_rate = 1.0
+        router = self.router()
+        router.with_structured_output(EditorFeedback).invoke("review")
+        self.assertEqual((self.small.calls, self.large.calls), (1, 1))
+        self.assertEqual(router.routing_stats()["qa"]["escalations"], 1)
+
+    def test_escalates_on_low_confidence_or_rejected_reply(self):
+        self.small.confidence = 0.2
+        router = self.router()
+        router.with_structured_output(EditorFeedback).invoke("review")
+        self.assertEqual(self.large.calls, 1)
+
+        self.small.confidence, self.small.plan_questions = 0.9, 1
+        router.with_structured_output(ResearchPlan).invoke("plan")
+        self.assertEqual(self.large.calls, 2)
+
+    def test_fixed_routes_and_no_small_model(self):
+        self.router("large").invoke("text")
+        self.router("small").invoke("text")
+        ModelRouter(self.large, None, routes={"qa": "cascade"}).invoke("text")
+        self.assertEqual((self.small.calls, self.large.calls), (1, 2))
+
+    def test_stream_escalates_before_first_token(self):
+        self.small.failure_rate = 1.0
+        reply = "".join(c.content for c in self.router().stream("text"))
+        self.assertEqual(reply, self.large.invoke("text").content)
+        with self.assertRaises(FakeServiceError):
+            self.router("small").invoke("text")
+
+    def test_savings_are_recorded_against_large_latency(self):
+        router = self.router()
+        router._observe_large("qa", 0.5)
+        router.with_structured_output(ResearchPlan).invoke("plan")
+        self.assertGreater(router.routing_stats()["qa"]["saved_seconds"], 0.4)
+
+    def test_graph_run_records_routing_per_node(self):
+        from backends import app_config, clients
+        from graph import workflow
+
+        # Node progress comes from the configured backends, like the app built by `build_app`
+        clients.configure(app_config(checkpointer="memory"))
+        self.addCleanup(clients.configure, None)
+        small = Instrumented(FakeLLM(latency=0, approve_rate=1.0, model_name="small"), "llm", self.telemetry)
+        large = Instrumented(FakeLLM(latency=0, approve_rate=1.0, model_name="large"), "llm", self.telemetry)
+        router = ModelRouter(large, small, routes={"planner": "cascade", "editor": "cascade", "writer": "large"},
+                             registry=self.telemetry)
+        config = {"configurable": {"thread_id": "routed"}}
+        graph_app = workflow.compile(checkpointer=InMemorySaver(), interrupt_before=app_config()["interrupt_before"])
+        with patch("nodes.llm", router), patch("nodes.search", FakeSearch(latency=0)), \
+                patch("metrics.telemetry", self.telemetry):
+            graph_app.invoke({"topic": "routing"}, config)
+            graph_app.invoke(None, config)
+
+        self.assertEqual(small.client.calls, 2)  # planner and editor
+        self.assertEqual(large.client.calls, 1)  # writer
+        rows = {r["node"]: r for r in thread_breakdown(read_spans(self.telemetry.trace_path, "routed"))}
+        self.assertEqual(rows["editor"]["route_calls"], 1)
+        self.assertEqual(rows["writer"].get("route_calls", 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from search_results import ResultDeduper, best_sentences, format_entry, normalize_url, parse_results
+
+LOREM = " ".join(f"token{i}" for i in range(60))
+
+
+def tavily(*results):
+    return {"query": "q", "follow_up_questions": None, "answer": None, "images": [], "response_time": 1.2,
+            "results": [dict(title=t, url=u, content=c, score=s, raw_content=None) for t, u, c, s in results]}
+
+
+class TestSearchResults(unittest.TestCase):
+
+    def test_parse_tavily_and_plain_text(self):
+        records = parse_results(tavily(("A", "https://a.com/x", "  some   text ", 0.9)))
+        self.assertEqual(records, [{"url": "https://a.com/x", "title": "A", "content": "some text", "score": 0.9}])
+        self.assertEqual(parse_results("just text")[0]["content"], "just text")
+        self.assertEqual(parse_results('{"results": [{"url": "u", "content": "c"}]}')[0]["url"], "u")
+        self.assertEqual(parse_results(""), [])
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url("https://www.Example.com/a/?utm_source=x&id=2#top"), normalize_url("http://example.com/a?id=2"))
+
+    def test_entry_is_compact_and_ordered_by_score(self):
+        raw = tavily(("Low", "https://b.com", "Low relevance. " * 5, 0.1), ("High", "https://a.com", "High relevance text.", 0.9))
+        entry = format_entry("relevance", parse_results(raw), 1500)
+        self.assertTrue(entry.startswith("Q: relevance\nA: [1] High (https://a.com)\nHigh relevance text."))
+        self.assertIn("[2] Low (https://b.com)", entry)
+        # No Python repr noise
+        self.assertNotIn("'score'", entry)
+        self.assertNotIn("response_time", entry)
+
+    def test_budget_keeps_relevant_sentences(self):
+        text = "Filler sentence about nothing. " * 30 + "Transformers use attention heads. " + "More filler here. " * 30
+        snippet = best_sentences(text, "attention heads in transformers", 200)
+        self.assertIn("Transformers use attention heads.", snippet)
+        self.assertLessEqual(len(snippet), 200)
+        entry = format_entry("attention", parse_results(tavily(("T", "https://a.com", text, 1.0))), 400)
+        self.assertLessEqual(len(entry), 400 + len("Q: attention\nA: "))
+
+    def test_dedupe_across_questions_and_loops(self):
+        deduper = ResultDeduper()
+        first = format_entry("Q1", parse_results(tavily(("A", "https://a.com/p", LOREM, 0.5))), 1500, deduper)
+        # Same URL (different tracking params) and a near-copy of the content on another site
+        second = format_entry("Q2", parse_results(tavily(
+            ("A again", "https://www.a.com/p/?utm_medium=x", "different words entirely " * 10, 0.5),
+            ("Mirror", "https://mirror.org/p", LOREM + " extra", 0.4),
+        )), 1500, deduper)
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(deduper.dropped, 2)
+
+        # A later research loop starts from the stored entries
+        later = ResultDeduper().seed([first])
+        self.assertFalse(later.is_new({"url": "https://a.com/p", "content": "x"}))
+        self.assertFalse(later.is_new({"url": None, "content": LOREM}))
+        self.assertTrue(later.is_new({"url": "https://c.com", "content": "unrelated " * 30}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from sections import batch_by_chars, join_sections, outline, section_level, split_sections, splice
+
+REPORT = """# Title
+Intro text.
+
+## Background
+Some $x$.
+
+### Detail
+Nested.
+
+## Method
+$$ y = x^2 $$
+"""
+
+
+class TestSections(unittest.TestCase):
+
+    def test_split_on_repeated_level(self):
+        self.assertEqual(section_level(REPORT), 2)
+        sections = split_sections(REPORT)
+        self.assertEqual([s.split("\n")[0] for s in sections], ["# Title", "## Background", "## Method"])
+        # Deeper headings stay inside their section
+        self.assertIn("### Detail", sections[1])
+        self.assertEqual(split_sections(join_sections(sections)), sections)
+
+    def test_headings_inside_code_fences_are_ignored(self):
+        draft = ("## Attention\nText.\n\n```python\n# compute scores\nscores = q @ k.T\n"
+                 "# normalize\nscores /= d\n```\n\n## Training\n~~~\n# not a heading\n~~~\nMore.\n")
+        self.assertEqual(section_level(draft), 2)
+        sections = split_sections(draft)
+        self.assertEqual([s.split("\n")[0] for s in sections], ["## Attention", "## Training"])
+        self.assertIn("# normalize\nscores /= d\n```", sections[0])
+        self.assertEqual(split_sections(join_sections(sections)), sections)
+
+    def test_plain_text_is_one_section(self):
+        self.assertEqual(split_sections("no headings here"), ["no headings here"])
+        self.assertEqual(split_sections(""), [])
+
+    def test_splice_keeps_heading(self):
+        sections = split_sections(REPORT)
+        updated = splice(sections, 2, "New method body.")
+        self.assertEqual(updated[2], "## Method\nNew method body.")
+        self.assertEqual(updated[:2], sections[:2])
+
+    def test_outline_and_batches(self):
+        sections = split_sections(REPORT)
+        self.assertIn("[1] ## Background (", outline(sections, [1]))
+        self.assertIn("under review", outline(sections, [1]).split("\n")[1])
+        self.assertNotIn("under review", outline(sections, [1]).split("\n")[0])
+        self.assertEqual(batch_by_chars([0, 1, 2], ["a" * 10, "b" * 10, "c" * 10], 25), [[0, 1], [2]])
+        self.assertEqual(batch_by_chars([0], ["a" * 50], 25), [[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
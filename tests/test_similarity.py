@@ -0,0 +1,28 @@
+import random
+import unittest
+
+from similarity import MinHash, jaccard, shingles, text_similarity
+
+
+class TestSimilarity(unittest.TestCase):
+
+    def test_shingle_jaccard(self):
+        self.assertEqual(text_similarity("the quick brown fox jumps over", "The quick, brown fox jumps over!"), 1.0)
+        self.assertEqual(text_similarity("alpha beta gamma delta epsilon", "zeta eta theta iota kappa"), 0.0)
+        self.assertEqual(jaccard(set(), set()), 1.0)
+        self.assertEqual(len(shingles("one two", k=5)), 1)
+
+    def test_minhash_estimates_jaccard(self):
+        rng = random.Random(0)
+        words = [f"w{rng.randrange(5000)}" for _ in range(1500)]
+        a = " ".join(words)
+        b = " ".join(words[:1200] + [f"x{i}" for i in range(300)])
+        mh = MinHash(num_perm=256)
+        estimate = MinHash.similarity(mh.text_signature(a), mh.text_signature(b))
+        self.assertAlmostEqual(estimate, text_similarity(a, b), delta=0.08)
+        self.assertEqual(MinHash.similarity(mh.text_signature(a), mh.text_signature(a)), 1.0)
+        self.assertEqual(MinHash.similarity([], mh.text_signature(a)), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
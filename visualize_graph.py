@@ -1,12 +1,9 @@
-import os
-# Set dummy env vars so we can import app without real keys
-os.environ["GROQ_API_KEY"] = "dummy"
-os.environ["TAVILY_API_KEY"] = "dummy"
-
-from graph import app
+from graph import build_app
 
 def save_graph_image():
     try:
+        # Only the graph's structure is needed: no clients are created and nothing is written
+        app = build_app({"checkpointer": "memory"})
         # Generate mermaid graph
         mermaid_graph = app.get_graph().draw_mermaid()
         
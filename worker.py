@@ -0,0 +1,177 @@
+"""Run queued research jobs (see jobqueue.py) until stopped.
+
+    python jobqueue.py start "Quantum error correction"
+    python worker.py --processes 2 --concurrency 8            # 16 graph runs at a time
+    python worker.py --policy auto --until-idle               # approve interrupts, exit when the queue is empty
+    python jobqueue.py resume <thread_id>                     # approve a job parked for review
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from batch import ParkForReview, make_policy
+from jobqueue import JobQueue, worker_id
+
+logger = logging.getLogger("ResearchSuite")
+
+
+class Worker:
+    """Runs up to `concurrency` claimed jobs at once on one event loop.
+
+    Each job drives its thread through `astream` until the graph finishes
+    (`complete`) or reaches an interrupt that neither the job's approval nor
+    the policy lets it pass (`park`). Leases of running jobs are renewed every
+    `lease / 3` seconds; a job whose lease was lost to another worker is
+    cancelled. On shutdown, unfinished jobs are released to the queue.
+    """
+
+    def __init__(self, app, jobs: JobQueue, concurrency: int = 4, policy=None, poll_interval: float = 1.0,
+                 name: Optional[str] = None):
+        self.app = app
+        self.jobs = jobs
+        self.concurrency = concurrency
+        self.policy = policy or ParkForReview()
+        self.poll_interval = poll_interval
+        self.name = name or worker_id()
+        self.stats = {"done": 0, "parked": 0, "failed": 0, "lost": 0}
+        self._running = {}
+
+    async def run(self, until_idle: bool = False, stop: Optional[asyncio.Event] = None):
+        """Claim and run jobs until `stop` is set (or, with `until_idle`, until nothing is left to claim)."""
+        stop = stop or asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while not stop.is_set():
+                while len(self._running) < self.concurrency:
+                    job = await asyncio.to_thread(self.jobs.claim, self.name)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._execute(job))
+                    self._running[job["id"]] = task
+                    task.add_done_callback(lambda _, job_id=job["id"]: self._running.pop(job_id, None))
+                if until_idle and not self._running:
+                    break
+                waiters = [*self._running.values(), asyncio.create_task(stop.wait())]
+                await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                waiters[-1].cancel()
+        finally:
+            heartbeat.cancel()
+            unfinished = dict(self._running)
+            for task in unfinished.values():
+                task.cancel()
+            await asyncio.gather(*unfinished.values(), return_exceptions=True)
+            for job_id in unfinished:
+                await asyncio.to_thread(self.jobs.release, job_id, self.name)
+        return self.stats
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.jobs.lease / 3)
+            for job_id, task in list(self._running.items()):
+                if not await asyncio.to_thread(self.jobs.heartbeat, job_id, self.name):
+                    logger.warning(f"Lost the lease on job {job_id}; another worker owns it now")
+                    self.stats["lost"] += 1
+                    task.cancel()
+
+    async def _advance(self, input, config):
+        async for _ in self.app.astream(input, config, stream_mode="updates"):
+            pass
+
+    async def _execute(self, job: dict):
+        config = {"configurable": {"thread_id": job["thread_id"]}}
+        try:
+            snapshot = await self.app.aget_state(config)
+            if job["command"] == "start" and not snapshot.values:
+                await self._advance(job["input"], config)
+                snapshot = await self.app.aget_state(config)
+
+            approved = job["checkpoint_id"]
+            if job["command"] == "resume":
+                current = snapshot.config["configurable"].get("checkpoint_id")
+                # A resume queued without a parked job approves wherever the thread is now
+                approved = approved or current
+                if job["state_update"] and approved == current:
+                    updated = await self.app.aupdate_state(config, job["state_update"])
+                    approved = updated["configurable"]["checkpoint_id"]
+                    snapshot = await self.app.aget_state(config)
+                elif job["state_update"]:
+                    logger.warning(f"Thread {job['thread_id']} moved on since job {job['id']} was parked; "
+                                   "ignoring its state update")
+                if approved != job["checkpoint_id"] or job["state_update"]:
+                    await asyncio.to_thread(self.jobs.approve, job["id"], self.name, approved)
+
+            while snapshot.next:
+                next_step = snapshot.next[0]
+                checkpoint_id = snapshot.config["configurable"].get("checkpoint_id")
+                if next_step in self.app.interrupt_before_nodes and checkpoint_id != approved \
+                        and self.policy.decide(next_step, snapshot.values) == "park":
+                    await asyncio.to_thread(self.jobs.park, job["id"], self.name, next_step, checkpoint_id)
+                    self.stats["parked"] += 1
+                    logger.info(f"Job {job['id']} parked at {next_step} for {job['thread_id']}")
+                    return
+                await self._advance(None, config)
+                snapshot = await self.app.aget_state(config)
+
+            await asyncio.to_thread(self.jobs.complete, job["id"], self.name)
+            self.stats["done"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job['id']} failed for {job['thread_id']}")
+            await asyncio.to_thread(self.jobs.fail, job["id"], self.name, f"{type(e).__name__}: {e}", job["attempts"])
+            self.stats["failed"] += 1
+
+
+def serve(concurrency: int, policy: str, until_idle: bool, poll_interval: float) -> dict:
+    """One worker process: build the app and run jobs until SIGTERM/SIGINT (or idle)."""
+    load_dotenv()
+    from graph import build_app, configure_logging
+
+    configure_logging()
+    worker = Worker(build_app(), JobQueue(), concurrency, make_policy(policy), poll_interval)
+
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        return await worker.run(until_idle, stop)
+
+    stats = asyncio.run(main())
+    logger.info(f"Worker {worker.name} stopped: {stats}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes (use up to one per CPU core)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Graph runs at a time in each process")
+    parser.add_argument("--policy", default="review", help="Interrupt policy: review (park) | auto | min-questions:N")
+    parser.add_argument("--until-idle", action="store_true", help="Exit once no job is left to claim")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between claims when the queue is empty")
+    args = parser.parse_args(argv)
+    make_policy(args.policy)  # fail fast on a bad spec
+
+    options = (args.concurrency, args.policy, args.until_idle, args.poll_interval)
+    if args.processes <= 1:
+        serve(*options)
+        return
+    processes = [multiprocessing.Process(target=serve, args=options, name=f"worker-{i}") for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children got the SIGINT too; wait for them to release their jobs
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()